@@ -64,6 +64,8 @@ void captureAndSendSnapshot() {
   HTTPClient http;
   http.begin(apiEndpoint);
   http.addHeader("Content-Type", "image/jpeg");
+  // identify this camera so the server keeps a separate history per device
+  http.addHeader("X-Device-Id", WiFi.macAddress());
 
   // send the fb buffer directly as the POST payload
   int code = http.sendRequest("POST", (uint8_t*)fb->buf, fb->len);
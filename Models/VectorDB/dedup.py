@@ -0,0 +1,188 @@
+import os
+import re
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+import numpy as np
+
+# Mersenne prime used by the MinHash permutations
+_PRIME = (1 << 31) - 1
+
+
+def normalize(text):
+    """Lowercase and collapse punctuation/whitespace so formatting differences do not hide duplicates."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+class ChunkDeduplicator:
+    """
+    Detects exact and near-duplicate chunks in a stream of texts.
+
+    Exact duplicates are found by hashing the normalized text. Near duplicates (repeated page headers and
+    footers, the same paragraph in two bulletins) are found with MinHash signatures over character shingles,
+    indexed with locality-sensitive hashing so each new chunk is only compared with a few candidates.
+
+    Args:
+        threshold: Estimated Jaccard similarity at or above which a chunk counts as a near duplicate
+        num_perm: Number of MinHash permutations
+        bands: Number of LSH bands (must divide num_perm)
+        shingle_size: Characters per shingle
+        seed: Seed for the permutations, so results are reproducible
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+        self._exact = {}        # normalized text hash -> kept index
+        self._buckets = {}      # (band, band signature) -> kept indices
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint64)  # signature per kept chunk
+        self._keys = []         # caller's key per kept chunk
+        self._kept = 0
+        self.duplicate_of = {}  # key of a duplicate -> key of the kept chunk it duplicates
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def signature(self, text):
+        """MinHash signature of a normalized text."""
+        n = self.shingle_size
+        shingles = {text[i:i + n] for i in range(max(1, len(text) - n + 1))}
+        x = np.fromiter((zlib.crc32(s.encode('utf-8')) % _PRIME for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def add(self, text, key=None):
+        """
+        Offer a chunk. Returns None if it is new (and keeps it for later comparisons), otherwise
+        "exact" or "near".
+
+        With a `key` (e.g. the chunk id), duplicates are recorded in `duplicate_of` against the key of the
+        chunk that was kept, so they can be restored if that chunk goes away.
+        """
+        self.seen += 1
+        norm = normalize(text)
+        digest = hashlib.sha1(norm.encode('utf-8')).digest()
+        if digest in self._exact:
+            self.exact_duplicates += 1
+            self._record(key, self._exact[digest])
+            return "exact"
+
+        signature = self.signature(norm)
+        band_keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+        candidates = set()
+        for band_key in band_keys:
+            candidates.update(self._buckets.get(band_key, ()))
+        if candidates:
+            candidates = list(candidates)
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            if similarity.max() >= self.threshold:
+                self.near_duplicates += 1
+                self._record(key, candidates[int(similarity.argmax())])
+                return "near"
+
+        index = self._kept
+        if index == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[index] = signature
+        self._kept += 1
+        self._keys.append(key)
+        self._exact[digest] = index
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(index)
+        return None
+
+    def _record(self, key, kept_index):
+        keeper = self._keys[kept_index]
+        if key is not None and keeper is not None:
+            self.duplicate_of[key] = keeper
+
+    def stats(self):
+        duplicates = self.exact_duplicates + self.near_duplicates
+        return {
+            "chunks_seen": self.seen,
+            "chunks_kept": self.seen - duplicates,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "reduction": round(duplicates / self.seen, 4) if self.seen else 0.0,
+        }
+
+
+def compact_store(vectorstore, deduplicator, dry_run=False, batch_size=5000, manifest=None):
+    """
+    Remove duplicate chunks from an existing vector store.
+
+    Chunks are visited in a stable order (by source file, then id) so the first copy is the one kept.
+    With the ingestion `manifest` ({path: record}, see main.py), each removed chunk is moved from its file's
+    `chunk_ids` to its `duplicate_of` map, so main.py re-indexes that file when the kept copy is replaced or
+    removed. The caller writes the updated manifest back.
+
+    Returns:
+        Report with chunk counts, estimated index size before and after, and embedding calls saved on re-ingest
+    """
+    records = vectorstore.get(include=["documents", "metadatas", "embeddings"])
+    ids, texts, metadatas = records["ids"], records["documents"], records["metadatas"]
+    dim = len(records["embeddings"][0]) if len(records["embeddings"]) else 0
+    order = sorted(range(len(ids)), key=lambda i: ((metadatas[i] or {}).get("file", ""), ids[i]))
+
+    duplicate_ids = [ids[i] for i in order if deduplicator.add(texts[i] or "", key=ids[i]) is not None]
+    if not dry_run:
+        for start in range(0, len(duplicate_ids), batch_size):
+            vectorstore.delete(ids=duplicate_ids[start:start + batch_size])
+        if manifest is not None:
+            owners = {doc_id: path for path, record in manifest.items() for doc_id in record["chunk_ids"]}
+            for doc_id in duplicate_ids:
+                path = owners.get(doc_id)
+                if path is None:
+                    continue
+                record = manifest[path]
+                record["chunk_ids"].remove(doc_id)
+                record.setdefault("duplicate_of", {})[doc_id] = deduplicator.duplicate_of[doc_id]
+
+    removed = set(duplicate_ids)
+    def index_bytes(keep):
+        # float32 vectors plus stored text
+        rows = [i for i in range(len(ids)) if keep(ids[i])]
+        return len(rows) * dim * 4 + sum(len((texts[i] or "").encode('utf-8')) for i in rows)
+
+    report = deduplicator.stats()
+    report.update({
+        "dry_run": dry_run,
+        "index_bytes_before": index_bytes(lambda _: True),
+        "index_bytes_after": index_bytes(lambda doc_id: doc_id not in removed),
+        "embedding_calls_saved": len(duplicate_ids),
+    })
+    return report
+
+
+if __name__ == '__main__':
+    from langchain_community.vectorstores import Chroma
+
+    parser = argparse.ArgumentParser(description="Remove exact and near-duplicate chunks from the vector database")
+    parser.add_argument("--persist-dir", default="vector_db")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity for near duplicates")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.persist_dir):
+        sys.exit(f"No vector database in {args.persist_dir}")
+    # The ingestion manifest records which file each removed chunk duplicated
+    import main
+    manifest = main.load_manifest()
+    report = compact_store(Chroma(persist_directory=args.persist_dir), ChunkDeduplicator(threshold=args.threshold), args.dry_run,
+                           manifest=manifest)
+    if not args.dry_run and os.path.exists(main.manifest_file):
+        main.compact_manifest(manifest)
+    print(json.dumps(report, indent=2))
@@ -1,42 +1,42 @@
 import os
+import sys
+import json
+import time
 import pickle
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
 from dotenv import load_dotenv
 
+# Shared helpers live in the parent Models directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_cache import CachedEmbeddings
+from dedup import ChunkDeduplicator
+
 load_dotenv()
 
 # Set paths
 documents_dir = "Information_About_Crops"
 vector_db_dir = "vector_db"
-checkpoint_file = "processed_documents.pkl"
-processed_files_file = "processed_files.pkl"
-
-# Initialize Google Gemini Embeddings (update model name and ensure proper API keys are set)
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
-
-# Create vector DB directory if it doesn't exist
-os.makedirs(vector_db_dir, exist_ok=True)
-
-# Load checkpoint if exists
-if os.path.exists(checkpoint_file):
-    with open(checkpoint_file, 'rb') as f:
-        documents = pickle.load(f)
-else:
-    documents = []
-
-# Load list of processed files if exists
-if os.path.exists(processed_files_file):
-    with open(processed_files_file, 'rb') as f:
-        processed_files = pickle.load(f)
-else:
-    processed_files = set()
+# Append-only manifest: one JSON line per stored or removed file, keyed by path, with the file's
+# content hash, the ids of the chunks it produced and, for chunks dropped as duplicates, the id of the chunk
+# kept in their place (the last line for a path wins)
+manifest_file = "manifest.jsonl"
+# Snapshot of every stored chunk, rewritten after each run; the offline benchmark, load and soak tests use it
+# as their corpus
+corpus_file = "processed_documents.pkl"
 
 
 def process_pdf(file_path, metadata):
-    print(f"Processing: {file_path}")
+    """
+    Parse and split one PDF. Runs in a worker process.
+    """
     loader = PyPDFLoader(file_path)
     docs = loader.load()
     splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=100)
@@ -47,6 +47,10 @@ def process_pdf(file_path, metadata):
 
 # Traverse the documents directory recursively
 def traverse_and_process(base_dir):
+    """
+    Collect (path, metadata) for every PDF under <class folder>/<subject folder>.
+    """
+    files = []
     for class_folder in os.listdir(base_dir):
         class_path = os.path.join(base_dir, class_folder)
         if not os.path.isdir(class_path):
@@ -65,43 +69,320 @@ def traverse_and_process(base_dir):
                     sub_path = os.path.join(subject_path, sub_subject)
                     if not os.path.isdir(sub_path):
                         continue
-                    _process_folder(sub_path, class_folder, subject_folder)
+                    _process_folder(sub_path, class_folder, subject_folder, files)
             else:
                 # Process files directly under subject_path
-                _process_folder(subject_path, class_folder, subject_folder)
+                _process_folder(subject_path, class_folder, subject_folder, files)
+    return files
 
 
-def _process_folder(folder_path, class_folder, subject_folder):
+def _process_folder(folder_path, class_folder, subject_folder, files):
     for entry in os.listdir(folder_path):
         entry_path = os.path.join(folder_path, entry)
         if os.path.isdir(entry_path):
             # Recurse into nested folders
-            _process_folder(entry_path, class_folder, subject_folder)
+            _process_folder(entry_path, class_folder, subject_folder, files)
         elif entry.lower().endswith('.pdf'):
-            if entry_path in processed_files:
-                continue
             metadata = {
                 "source": class_folder,
                 "crop": subject_folder,
                 "file": entry,
                 "page": "Unknown"
             }
-            try:
-                chunks = process_pdf(entry_path, metadata)
-                documents.extend(chunks)
-                processed_files.add(entry_path)
-                # Update checkpoint files after each successful processing
-                with open(checkpoint_file, 'wb') as f:
-                    pickle.dump(documents, f)
-                with open(processed_files_file, 'wb') as f:
-                    pickle.dump(processed_files, f)
-            except Exception as e:
-                print(f"Error processing {entry_path}: {e}")
+            files.append((entry_path, metadata))
+
+
+def file_hash(file_path):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest():
+    """Replay the append-only manifest into {path: {"sha256": ..., "chunk_ids": [...], "duplicate_of": {...}}}."""
+    manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("removed"):
+                    manifest.pop(record["path"], None)
+                else:
+                    manifest[record["path"]] = {
+                        "sha256": record["sha256"],
+                        "chunk_ids": record["chunk_ids"],
+                        "duplicate_of": record.get("duplicate_of", {}),
+                    }
+    return manifest
+
+
+def compact_manifest(manifest):
+    """Rewrite the manifest with one line per stored file."""
+    tmp_path = manifest_file + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for path, record in sorted(manifest.items()):
+            f.write(json.dumps({"path": path, **record}) + "\n")
+    os.replace(tmp_path, manifest_file)
+
+
+def diff_library(files, manifest):
+    """
+    Compare the files on disk with the manifest.
+
+    Unchanged files whose chunks were dropped as duplicates of chunks that are about to be deleted (because
+    the file holding the kept copy changed or was removed) are re-indexed too, as "requeued".
+
+    Returns:
+        (files to index as (path, metadata, sha256),
+         {"added", "changed", "unchanged", "removed", "requeued": [paths]})
+    """
+    to_index = []
+    diff = {"added": [], "changed": [], "unchanged": [], "removed": [], "requeued": []}
+    on_disk = set()
+    unchanged = {}
+    for path, metadata in files:
+        on_disk.add(path)
+        digest = file_hash(path)
+        record = manifest.get(path)
+        if record is None:
+            diff["added"].append(path)
+        elif record["sha256"] != digest:
+            diff["changed"].append(path)
+        else:
+            unchanged[path] = (path, metadata, digest)
+            continue
+        to_index.append((path, metadata, digest))
+    diff["removed"] = sorted(path for path in manifest if path not in on_disk)
+
+    # Chunks of re-indexed files may be deleted, so repeat until no other file depends on them
+    released = {doc_id for path in diff["changed"] + diff["removed"] for doc_id in manifest[path]["chunk_ids"]}
+    while released:
+        dependents = [path for path in unchanged
+                      if released.intersection(manifest[path].get("duplicate_of", {}).values())]
+        released = set()
+        for path in dependents:
+            to_index.append(unchanged.pop(path))
+            diff["requeued"].append(path)
+            released.update(manifest[path]["chunk_ids"])
+    diff["unchanged"] = list(unchanged)
+    return to_index, diff
+
+
+def export_corpus(vectorstore, path=corpus_file):
+    """Write every chunk in the store as a pickled list of Documents (the format of the old checkpoint file)."""
+    records = vectorstore.get(include=["documents", "metadatas"])
+    documents = [Document(page_content=text or "", metadata=metadata or {})
+                 for text, metadata in zip(records["documents"], records["metadatas"])]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(documents, f)
+    os.replace(tmp_path, path)
+    return len(documents)
+
+
+def chunk_id(file_path, digest, index):
+    """Deterministic chunk id, so re-running after an interruption upserts instead of duplicating."""
+    return hashlib.sha1(f"{file_path}\x00{digest}\x00{index}".encode('utf-8')).hexdigest()
+
+
+def ingest(files, vectorstore, workers, batch_size, embed_concurrency, on_file_stored, deduplicator=None):
+    """
+    Parse PDFs in a process pool and stream their chunks to the vector store in fixed-size batches.
+
+    At most `workers * 2` files are being parsed and `embed_concurrency * 2` batches are waiting to be
+    embedded at any time, so memory stays flat regardless of library size. `on_file_stored(path, sha256,
+    chunk_ids, duplicate_of)` is called once all of a file's chunks are stored. With a `deduplicator`, exact and
+    near-duplicate chunks are dropped before they are embedded and reported in `duplicate_of`.
+    """
+    started = time.perf_counter()
+    remaining = {}      # file -> number of its chunks not yet stored
+    produced = {}       # file -> (sha256, chunk ids)
+    duplicates = {}     # file -> {dropped chunk id: kept chunk id}
+    pending = []        # (id, document, file) waiting to fill a batch
+    batches = set()
+    stats = {"files": 0, "chunks": 0, "batches": 0, "errors": 0}
+
+    def stored(path):
+        digest, ids = produced.pop(path)
+        on_file_stored(path, digest, ids, duplicates.pop(path, {}))
+        stats["files"] += 1
+
+    def store(batch):
+        vectorstore.add_documents([doc for _, doc, _ in batch], ids=[doc_id for doc_id, _, _ in batch])
+        return batch
+
+    def finish(done):
+        for future in done:
+            batches.discard(future)
+            for _, _, path in future.result():
+                remaining[path] -= 1
+                if remaining[path] == 0:
+                    del remaining[path]
+                    stored(path)
+            stats["batches"] += 1
+
+    def submit_batch(embedder, batch):
+        # Bound the number of batches in flight before queueing another
+        while len(batches) >= embed_concurrency * 2:
+            done, _ = wait(batches, return_when=FIRST_COMPLETED)
+            finish(done)
+        batches.add(embedder.submit(store, batch))
+
+    with ProcessPoolExecutor(max_workers=workers) as parser, ThreadPoolExecutor(max_workers=embed_concurrency) as embedder:
+        queue = iter(files)
+        parsing = {}
+        while True:
+            # Keep a bounded number of files being parsed
+            while len(parsing) < workers * 2:
+                item = next(queue, None)
+                if item is None:
+                    break
+                path, metadata, digest = item
+                print(f"Processing: {path}")
+                parsing[parser.submit(process_pdf, path, metadata)] = (path, digest)
+            if not parsing:
+                break
+
+            done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, digest = parsing.pop(future)
+                try:
+                    chunks = future.result()
+                except Exception as e:
+                    print(f"Error processing {path}: {e}")
+                    stats["errors"] += 1
+                    continue
+                ids = [chunk_id(path, digest, index) for index in range(len(chunks))]
+                if deduplicator is not None:
+                    kept = [(doc_id, chunk) for doc_id, chunk in zip(ids, chunks) if deduplicator.add(chunk.page_content, key=doc_id) is None]
+                    duplicates[path] = {doc_id: deduplicator.duplicate_of[doc_id] for doc_id in ids if doc_id in deduplicator.duplicate_of}
+                    ids = [doc_id for doc_id, _ in kept]
+                    chunks = [chunk for _, chunk in kept]
+                produced[path] = (digest, ids)
+                if not chunks:
+                    stored(path)
+                    continue
+                remaining[path] = len(chunks)
+                stats["chunks"] += len(chunks)
+                for doc_id, chunk in zip(ids, chunks):
+                    pending.append((doc_id, chunk, path))
+                    if len(pending) >= batch_size:
+                        submit_batch(embedder, pending)
+                        pending = []
+
+        if pending:
+            submit_batch(embedder, pending)
+        while batches:
+            done, _ = wait(batches, return_when=FIRST_COMPLETED)
+            finish(done)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
 
 if __name__ == '__main__':
-    print("Starting document processing...")
-    traverse_and_process(documents_dir)
-    print("Creating Vector Database...")
-    vectorstore = Chroma.from_documents(documents, embeddings, persist_directory=vector_db_dir)
-    vectorstore.persist()
+    parser = argparse.ArgumentParser(description="Build the crop information vector database")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="PDF parsing processes")
+    parser.add_argument("--batch-size", type=int, default=128, help="Chunks embedded and stored per request")
+    parser.add_argument("--embed-concurrency", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--rebuild", action="store_true", help="Delete the vector database and manifest and start over")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which files would be added, re-indexed or removed")
+    parser.add_argument("--dedup", action="store_true", help="Skip exact and near-duplicate chunks (see dedup.py)")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8, help="Estimated Jaccard similarity for near duplicates")
+    args = parser.parse_args()
+
+    if args.rebuild and not args.dry_run:
+        shutil.rmtree(vector_db_dir, ignore_errors=True)
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+
+    # A store populated before the manifest existed has random chunk ids; indexing it again would store every
+    # chunk a second time under the deterministic ids
+    if not args.rebuild and not os.path.exists(manifest_file) and os.path.isdir(vector_db_dir):
+        existing = Chroma(persist_directory=vector_db_dir, embedding_function=None)._collection.count()
+        if existing:
+            print(f"{vector_db_dir} already holds {existing} chunks but there is no {manifest_file} to track them. "
+                  f"Run with --rebuild to index the library from scratch.")
+            sys.exit(1)
+
+    print("Scanning library...")
+    manifest = load_manifest()
+    files, diff = diff_library(traverse_and_process(documents_dir), manifest)
+    summary = {name: len(paths) for name, paths in diff.items()}
+    for name in ("added", "changed", "removed", "requeued"):
+        for path in diff[name]:
+            print(f"  {name}: {path}")
+    print(json.dumps(summary))
+    if args.dry_run:
+        sys.exit(0)
+
+    # Initialize Google Gemini Embeddings (update model name and ensure proper API keys are set)
+    # Vectors are cached locally so re-running ingestion does not re-embed chunks seen before
+    embeddings = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model="models/text-embedding-004"),
+        os.path.join("..", "embedding_cache.sqlite"),
+        model_name="models/text-embedding-004"
+    )
+
+    # Create vector DB directory if it doesn't exist
+    os.makedirs(vector_db_dir, exist_ok=True)
+    vectorstore = Chroma(persist_directory=vector_db_dir, embedding_function=embeddings)
+
+    deleted = 0
+
+    deduplicator = None
+    if args.dedup:
+        deduplicator = ChunkDeduplicator(threshold=args.dedup_threshold)
+        # Seed with chunks already stored, except those of files about to be replaced, removed or re-indexed
+        replaced = {doc_id for path in diff["changed"] + diff["removed"] + diff["requeued"] for doc_id in manifest[path]["chunk_ids"]}
+        existing = vectorstore.get(include=["documents"])
+        for doc_id, text in zip(existing["ids"], existing["documents"]):
+            if doc_id not in replaced:
+                deduplicator.add(text or "", key=doc_id)
+        seeded = deduplicator.stats()
+
+    def delete_chunks(ids):
+        global deleted
+        # Delete in batches to keep each request small
+        for start in range(0, len(ids), 5000):
+            vectorstore.delete(ids=ids[start:start + 5000])
+        deleted += len(ids)
+
+    with open(manifest_file, 'a', encoding='utf-8') as log:
+        def record(path, digest, ids, duplicate_of):
+            # The previous version's chunks are deleted only once the new version is stored, and before the
+            # manifest moves on, so an interrupted run never loses track of stale chunks. A requeued file keeps
+            # its chunk ids, so only the ones it no longer produces are deleted
+            previous = manifest.get(path)
+            if previous:
+                delete_chunks(sorted(set(previous["chunk_ids"]) - set(ids)))
+            manifest[path] = {"sha256": digest, "chunk_ids": ids, "duplicate_of": duplicate_of}
+            log.write(json.dumps({"path": path, **manifest[path]}) + "\n")
+            log.flush()
+
+        print("Starting document processing...")
+        stats = ingest(files, vectorstore, args.workers, args.batch_size, args.embed_concurrency, record, deduplicator)
+
+        for path in diff["removed"]:
+            delete_chunks(manifest.pop(path)["chunk_ids"])
+            log.write(json.dumps({"path": path, "removed": True}) + "\n")
+            log.flush()
+    compact_manifest(manifest)
+
+    stats.update(summary)
+    stats["chunks_deleted"] = deleted
+    stats["corpus_chunks"] = export_corpus(vectorstore)
+    if deduplicator is not None:
+        dedup_stats = deduplicator.stats()
+        stats["duplicates_skipped"] = (
+            dedup_stats["exact_duplicates"] + dedup_stats["near_duplicates"]
+            - seeded["exact_duplicates"] - seeded["near_duplicates"]
+        )
+    print(json.dumps(stats, indent=2))
     print(f"Vector Database stored in {vector_db_dir}")
@@ -0,0 +1,258 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain_core.prompts import ChatPromptTemplate
+
+from streaming import JsonFieldStream
+
+NOT_AVAILABLE = "Information not available"
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def response_text(agent_response: Any) -> str:
+    """Return the text of an AgentExecutor result (its `text` or `output` key) or of any other response."""
+    if isinstance(agent_response, dict):
+        if "text" in agent_response:
+            return agent_response["text"]
+        if "output" in agent_response:
+            return agent_response["output"]
+    return str(agent_response)
+
+
+def parse_json_object(text: Any) -> Dict[str, Any]:
+    """
+    Extract the first JSON object from an LLM answer.
+
+    The answer may be a plain JSON object, wrapped in a ```json code block, surrounded by prose, or (as
+    some models do) contain escaped quotes.
+
+    Raises:
+        ValueError: If no JSON object can be decoded from the text
+    """
+    if isinstance(text, dict):
+        if "output" not in text:
+            return text
+        text = text["output"]
+    text = str(text)
+
+    candidates = [match.group(1) for match in _CODE_FENCE.finditer(text)] + [text]
+    decoder = json.JSONDecoder()
+    for candidate in candidates + [c.replace(r'\"', '"') for c in candidates]:
+        start = candidate.find("{")
+        while start != -1:
+            try:
+                value, _ = decoder.raw_decode(candidate, start)
+                if isinstance(value, dict):
+                    return value
+            except ValueError:
+                pass
+            start = candidate.find("{", start + 1)
+    raise ValueError("No JSON object found in response")
+
+
+class AgentPipeline:
+    """
+    A tool-calling agent built once and shared by every request of one kind (e.g. disease analysis).
+
+    The prompt, the agent runnable and its AgentExecutor are constructed up front instead of per request, and
+    they hold no per-run state, so concurrent requests invoke the same executor. The only tool that varies
+    between requests is the retriever, which may be scoped to a crop; one executor is kept per retriever tool.
+    Because every retriever tool has the same name and schema, they all share one agent runnable.
+
+    Answers are parsed into `fields`. Fields listed in `query_fields` are only filled when the request's
+    query type is that field or "all"; the others are always filled. If the agent fails, `fallback` supplies
+    the field values (formatted with the run's `subject`) and the result is marked incomplete.
+
+    Args:
+        name: Label used in logs and stats
+        system_prompt: System message template; `{agent_scratchpad}` receives the retrieved context
+        fields: JSON fields extracted from the answer, in output order
+        llm: Chat model the agent runs on
+        tools: Tools shared by every run, added after the retriever tool
+        query_fields: Fields gated by the request's query type
+        fallback: Field values used when the agent fails, may contain a `{subject}` placeholder
+        verbose: Print AgentExecutor traces (slow and noisy; meant for debugging)
+    """
+
+    def __init__(self, name: str, system_prompt: str, fields: Sequence[str], llm, tools: Sequence[Any],
+                 query_fields: Iterable[str] = (), fallback: Optional[Dict[str, str]] = None, verbose: bool = False):
+        self.name = name
+        self.fields = list(fields)
+        self.query_fields = set(query_fields)
+        self.fallback = dict(fallback or {})
+        self.llm = llm
+        self.tools = list(tools)
+        self.verbose = verbose
+        self.prompt = ChatPromptTemplate([
+            ("system", system_prompt),
+            ("human", "{user_input}")
+        ])
+
+        self._agent = None
+        self._executors: Dict[int, Tuple[Any, AgentExecutor]] = {}
+        self._lock = threading.Lock()
+
+        self.runs = 0
+        self.failures = 0
+        self.parse_failures = 0
+        self.total_seconds = 0.0
+        self.total_iterations = 0
+        self.single_step_runs = 0
+        self.tool_calls = Counter()
+
+    def executor(self, retriever_tool) -> AgentExecutor:
+        """Return the executor that uses `retriever_tool`, building it the first time that tool is seen."""
+        entry = self._executors.get(id(retriever_tool))
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            entry = self._executors.get(id(retriever_tool))
+            if entry is None:
+                tools = [retriever_tool] + self.tools
+                if self._agent is None:
+                    self._agent = create_tool_calling_agent(self.llm, tools, self.prompt)
+                # The tool is kept alongside its executor so its id cannot be reused by another object
+                executor = AgentExecutor(agent=self._agent, tools=tools, verbose=self.verbose, return_intermediate_steps=True)
+                entry = (retriever_tool, executor)
+                self._executors[id(retriever_tool)] = entry
+        return entry[1]
+
+    def wants(self, field: str, query_type: str = "all") -> bool:
+        """Whether `field` is part of the answer for `query_type`."""
+        return field in self.fields and (field not in self.query_fields or query_type in (field, "all"))
+
+    def extract(self, data: Dict[str, Any], query_type: str = "all") -> Dict[str, Any]:
+        """Pick this pipeline's fields out of a parsed answer, honouring the query type."""
+        return {
+            field: data[field] if self.wants(field, query_type) and field in data else NOT_AVAILABLE
+            for field in self.fields
+        }
+
+    async def _stream(self, executor: AgentExecutor, inputs: Dict[str, Any], query_type: str,
+                      on_field: Callable[[str, Any], None]) -> Dict[str, Any]:
+        """
+        Invoke the executor while parsing the tokens of each LLM turn, calling `on_field` for every field as
+        soon as it is complete. Returns the executor's result like `ainvoke`.
+        """
+        result = None
+        parser = None
+        emitted = set()
+        async for event in executor.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_start":
+                parser = JsonFieldStream()
+            elif kind == "on_chat_model_stream" and parser is not None:
+                content = event["data"]["chunk"].content
+                if not isinstance(content, str):
+                    # Some models stream a list of content parts
+                    content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+                for field, value in parser.feed(content):
+                    if self.wants(field, query_type) and field not in emitted:
+                        emitted.add(field)
+                        on_field(field, value)
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                result = event["data"]["output"]
+        return result
+
+    async def run(self, inputs: Dict[str, Any], retriever_tool, query_type: str = "all", subject: str = "",
+                  on_field: Optional[Callable[[str, Any], None]] = None) -> Tuple[Dict[str, Any], str, bool]:
+        """
+        Invoke the agent and parse its answer.
+
+        Args:
+            inputs: Prompt variables (`user_input`, `agent_scratchpad` and any placeholders of the system prompt)
+            retriever_tool: Retriever tool for this request (e.g. scoped to the predicted crop)
+            query_type: Request query type used to gate `query_fields`
+            subject: What the request is about (disease or crop), used in the fallback text
+            on_field: Optional callback receiving (field, value) as each field of the answer is generated. It
+                only sees fields the model streamed; the returned fields are authoritative
+
+        Returns:
+            (fields, raw response text, whether the agent produced a parseable answer)
+        """
+        started = time.perf_counter()
+        complete = True
+        try:
+            executor = self.executor(retriever_tool)
+            if on_field is None:
+                agent_response = await executor.ainvoke(inputs)
+            else:
+                agent_response = await self._stream(executor, inputs, query_type, on_field)
+            self._record_steps(agent_response.get("intermediate_steps", []))
+            text = response_text(agent_response)
+        except Exception as e:
+            logging.error(f"Error in {self.name} agent execution: {e}")
+            self.failures += 1
+            complete = False
+            text = json.dumps({field: value.format(subject=subject) for field, value in self.fallback.items()})
+
+        try:
+            data = parse_json_object(text)
+        except Exception as e:
+            logging.error(f"Error parsing JSON from {self.name} response: {e}")
+            logging.info(f"Response text that failed to parse: {text}")
+            self.parse_failures += 1
+            complete = False
+            data = {}
+
+        self.runs += 1
+        self.total_seconds += time.perf_counter() - started
+        return self.extract(data, query_type), text, complete
+
+    def _record_steps(self, steps):
+        """
+        Count the LLM turns of a run: one per turn that requested tools (parallel tool calls of one turn share
+        its message) plus the final answer.
+        """
+        turns = set()
+        for action, _ in steps:
+            self.tool_calls[action.tool] += 1
+            message_log = getattr(action, "message_log", None)
+            turns.add(id(message_log[-1]) if message_log else id(action))
+        iterations = len(turns) + 1
+        self.total_iterations += iterations
+        if iterations == 1:
+            self.single_step_runs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.runs - self.failures
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "parse_failures": self.parse_failures,
+            "executors": len(self._executors),
+            "mean_seconds": round(self.total_seconds / self.runs, 3) if self.runs else None,
+            "mean_iterations": round(self.total_iterations / completed, 2) if completed else None,
+            "single_step_runs": self.single_step_runs,
+            "tool_calls": dict(self.tool_calls),
+            "verbose": self.verbose,
+        }
+
+
+class PipelineRegistry:
+    """Named AgentPipelines, constructed together at startup."""
+
+    def __init__(self, pipelines: Iterable[AgentPipeline] = ()):
+        self._pipelines: Dict[str, AgentPipeline] = {}
+        for pipeline in pipelines:
+            self.add(pipeline)
+
+    def add(self, pipeline: AgentPipeline) -> AgentPipeline:
+        self._pipelines[pipeline.name] = pipeline
+        return pipeline
+
+    def __getitem__(self, name: str) -> AgentPipeline:
+        return self._pipelines[name]
+
+    def names(self) -> List[str]:
+        return list(self._pipelines)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: pipeline.stats() for name, pipeline in self._pipelines.items()}
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cache import TTLCache
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude: float, longitude: float, precision: int = 5) -> str:
+    """
+    Encode coordinates as a geohash. Nearby points share a prefix; a precision of 5 gives cells of about
+    5 x 5 km, 4 of about 40 x 20 km.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits <<= 1
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+class AreaLookupCache:
+    """
+    Long-lived cache for lookups that only depend on an area (reverse geocoding, soil type), with
+    stale-while-revalidate.
+
+    A fresh entry is returned directly. An expired entry is still returned, and a refresh is started in
+    `executor` so the next caller gets the new value; requests never wait on the network for an area that
+    has been seen before. Only a missing key is fetched inline, and concurrent misses for the same key share
+    one fetch. Failed fetches are not cached. Results rejected by the caller's `is_valid` check (a search
+    that found nothing, a place without a name) are remembered in memory for `negative_ttl_seconds` only, so
+    the lookup is retried soon instead of a month later.
+
+    Args:
+        ttl_seconds: Age after which an entry is refreshed
+        max_entries: Maximum number of entries kept
+        persist_path: SQLite file the entries are kept in across restarts ("" or None keeps them in memory)
+        executor: Executor background refreshes run in (refreshes are done inline if None)
+        negative_ttl_seconds: How long a rejected result is reused before the lookup is tried again
+    """
+
+    def __init__(self, ttl_seconds: float = 30 * 86400, max_entries: int = 4096, persist_path: Optional[str] = None, executor=None,
+                 negative_ttl_seconds: float = 600.0):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, persist_path=persist_path, name="area")
+        self.executor = executor
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+        self._negative: Dict[str, Tuple[float, Any]] = {}  # key -> (fetched at, rejected value)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.rejected = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], is_valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for `key`, calling `fetch` (a blocking function) when it is missing.
+
+        Args:
+            key: Cache key
+            fetch: Blocking function producing the value
+            is_valid: Optional check of a fetched value; values it rejects are returned but only kept for
+                `negative_ttl_seconds`, and never replace a good value on refresh
+
+        Raises:
+            Whatever `fetch` raises on a miss
+        """
+        entry = self._cache.peek(key)
+        if entry is not None:
+            value, fresh = entry
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh_in_background(key, fetch, is_valid)
+            return value
+
+        with self._key_lock(key):
+            # Another thread may have fetched it while this one waited
+            entry = self._cache.peek(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            negative = self._negative.get(key)
+            if negative is not None and time.time() - negative[0] < self.negative_ttl_seconds:
+                self.negative_hits += 1
+                return negative[1]
+            self.misses += 1
+            value = fetch()
+            if is_valid is not None and not is_valid(value):
+                self.rejected += 1
+                with self._lock:
+                    now = time.time()
+                    if len(self._negative) >= self._cache.max_entries:
+                        self._negative = {k: v for k, v in self._negative.items() if now - v[0] < self.negative_ttl_seconds}
+                    self._negative[key] = (now, value)
+                return value
+            with self._lock:
+                self._negative.pop(key, None)
+            self._cache.set(key, value)
+            return value
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any], is_valid: Optional[Callable[[Any], bool]] = None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if self.executor is None:
+            self._refresh(key, fetch, is_valid)
+            return
+        try:
+            self.executor.submit(self._refresh, key, fetch, is_valid)
+        except RuntimeError:
+            # The executor is shutting down; the stale value is kept until the next start
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: str, fetch: Callable[[], Any], is_valid: Optional[Callable[[Any], bool]] = None):
+        try:
+            value = fetch()
+            if is_valid is not None and not is_valid(value):
+                raise ValueError(f"rejected result {value!r}")
+            self._cache.set(key, value)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            logging.error(f"Could not refresh area lookup {key}, keeping the stale value: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "ttl_seconds": self._cache.ttl_seconds,
+            "persistent": self._cache.stats()["persistent"],
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "rejected": self.rejected,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
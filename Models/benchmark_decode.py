@@ -0,0 +1,83 @@
+import argparse
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_processing import decode_for_model, decode_for_model_reference
+
+# Frame sizes supported by the ESP32-CAM (OV2640)
+CAMERA_RESOLUTIONS = {
+    "QVGA": (320, 240),
+    "VGA": (640, 480),
+    "SVGA": (800, 600),
+    "XGA": (1024, 768),
+    "SXGA": (1280, 1024),
+    "UXGA": (1600, 1200),
+}
+
+def synthetic_frame(width: int, height: int, quality: int = 90) -> bytes:
+    """
+    Build a leaf-like JPEG test frame (smooth gradients plus texture) at the given resolution.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    r = 60 + 40 * np.sin(x / 37.0)
+    g = 120 + 60 * np.cos(y / 53.0) + 20 * np.sin((x + y) / 11.0)
+    b = 50 + 30 * np.sin((x - y) / 29.0)
+    arr = np.stack([r, g, b], axis=-1) + rng.normal(0, 8, (height, width, 3))
+    img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    bio = io.BytesIO()
+    img.save(bio, format='JPEG', quality=quality)
+    return bio.getvalue()
+
+def time_path(func, buf: bytes, iterations: int) -> float:
+    func(buf)  # warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(buf)
+    return (time.perf_counter() - started) / iterations * 1000.0
+
+def run(frames, iterations: int):
+    results = []
+    for name, buf in frames:
+        old_ms = time_path(decode_for_model_reference, buf, iterations)
+        new_ms = time_path(decode_for_model, buf, iterations)
+        old_arr, _ = decode_for_model_reference(buf)
+        new_arr, _ = decode_for_model(buf)
+        diff = np.abs(old_arr.astype(np.float32) - new_arr)
+        results.append({
+            "frame": name,
+            "resolution": "x".join(map(str, Image.open(io.BytesIO(buf)).size)),
+            "jpeg_kb": round(len(buf) / 1024, 1),
+            "old_ms": round(old_ms, 3),
+            "new_ms": round(new_ms, 3),
+            "speedup": round(old_ms / new_ms, 2) if new_ms else None,
+            "mean_abs_diff": round(float(diff.mean()), 5),
+            "max_abs_diff": round(float(diff.max()), 5),
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the original and fast snapshot decoding paths")
+    parser.add_argument("--frames-dir", help="Directory of sample JPEG frames (default: synthetic frames at every camera resolution)")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.frames_dir:
+        frames = []
+        for entry in sorted(os.listdir(args.frames_dir)):
+            if entry.lower().endswith(('.jpg', '.jpeg')):
+                with open(os.path.join(args.frames_dir, entry), 'rb') as f:
+                    frames.append((entry, f.read()))
+    else:
+        frames = [(name, synthetic_frame(w, h)) for name, (w, h) in CAMERA_RESOLUTIONS.items()]
+
+    results = run(frames, args.iterations)
+    print(f"{'frame':<12}{'resolution':<12}{'old ms':>10}{'new ms':>10}{'speedup':>10}{'max diff':>10}")
+    for r in results:
+        print(f"{r['frame']:<12}{r['resolution']:<12}{r['old_ms']:>10}{r['new_ms']:>10}{r['speedup']:>10}{r['max_abs_diff']:>10}")
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,143 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from convert_tflite import VARIANTS, list_images, load_image, output_path
+from disease_labels import labels
+from soak_test import rss_mb
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def evaluate(backend: str, path: str, threads, image_paths, batch_sizes, iterations: int):
+    """
+    Load one backend and measure it. Runs in a fresh process so memory figures are not mixed up with other
+    backends (or with TensorFlow when only the TFLite runtime is needed).
+    """
+    from model_backends import load_model_backend
+
+    images = np.stack([load_image(p) for p in image_paths]) if image_paths else None
+    if images is None:
+        # No evaluation images: random frames still give latency and agreement between backends
+        images = np.random.default_rng(0).random((max(batch_sizes) * 4, 224, 224, 3), dtype=np.float32)
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    model = load_model_backend(backend, path, num_threads=threads)
+    load_seconds = time.perf_counter() - started
+    rss_loaded = rss_mb()
+
+    # Predictions over the whole set, in batches of the largest size
+    step = max(batch_sizes)
+    outputs = [model.predict_on_batch(images[i:i + step]) for i in range(0, len(images), step)]
+    predictions = np.concatenate(outputs)
+
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = images[:batch_size]
+        if len(batch) < batch_size:
+            batch = np.resize(images, (batch_size,) + images.shape[1:])
+        model.predict_on_batch(batch)  # warm up (and resize the interpreter)
+        times = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            model.predict_on_batch(batch)
+            times.append((time.perf_counter() - started) * 1000.0)
+        times = np.array(times)
+        latency[str(batch_size)] = {
+            "p50_ms": round(float(np.percentile(times, 50)), 2),
+            "p95_ms": round(float(np.percentile(times, 95)), 2),
+            "per_image_ms": round(float(np.percentile(times, 50)) / batch_size, 2),
+        }
+
+    return {
+        "load_seconds": round(load_seconds, 2),
+        "rss_model_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "latency": latency,
+        "top1": predictions.argmax(axis=1).tolist(),
+        "probabilities": predictions.astype(np.float32),
+    }
+
+
+def model_size_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return round(sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 1024 / 1024, 2)
+    return round(os.path.getsize(path) / 1024 / 1024, 2)
+
+
+def run(specs, image_paths, image_labels, batch_sizes, iterations):
+    """Evaluate every (name, backend, path, threads) spec and compare them with the first one (the Keras model)."""
+    results = []
+    reference = None
+    context = multiprocessing.get_context("spawn")
+    for name, backend, path, threads in specs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            measured = pool.submit(evaluate, backend, path, threads, image_paths, batch_sizes, iterations).result()
+
+        top1 = np.array(measured.pop("top1"))
+        probabilities = measured.pop("probabilities")
+        if reference is None:
+            reference = (top1, probabilities)
+
+        result = {"name": name, "backend": backend, "path": path, "threads": threads, "size_mb": model_size_mb(path)}
+        result.update(measured)
+        result["agreement"] = round(float((top1 == reference[0]).mean()), 4)
+        result["max_abs_diff"] = round(float(np.abs(probabilities - reference[1]).max()), 5)
+
+        labeled = image_labels >= 0
+        if labeled.any():
+            correct = top1[labeled] == image_labels[labeled]
+            result["accuracy"] = round(float(correct.mean()), 4)
+            result["per_class_accuracy"] = {
+                labels[index]: round(float(correct[image_labels[labeled] == index].mean()), 4)
+                for index in sorted(set(image_labels[labeled].tolist()))
+            }
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare accuracy, latency and memory of the Keras and TFLite disease classifiers")
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "disease_classification_model.h5"))
+    parser.add_argument("--tflite-dir", default=".", help="Directory holding the convert_tflite.py outputs")
+    parser.add_argument("--images-dir", help="Evaluation images in class folders named after the labels (default: random frames, latency and agreement only)")
+    parser.add_argument("--samples", type=int, default=0, help="Evaluate a random sample of this many images (0 uses all)")
+    parser.add_argument("--threads", default="1,4", help="Comma-separated TFLite thread counts to compare")
+    parser.add_argument("--batch-sizes", default="1,8,16")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    images = list_images(args.images_dir, args.samples) if args.images_dir else []
+    image_paths = [path for path, _ in images]
+    image_labels = np.array([-1 if label is None else label for _, label in images], dtype=int)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    specs = [("keras", "keras", args.model, None)]
+    for variant in VARIANTS:
+        path = output_path(args.model, args.tflite_dir, variant)
+        if os.path.exists(path):
+            specs.extend((f"tflite-{variant}-{threads}t", "tflite", path, int(threads)) for threads in args.threads.split(","))
+
+    results = run(specs, image_paths, image_labels, batch_sizes, args.iterations)
+
+    smallest, largest = str(min(batch_sizes)), str(max(batch_sizes))
+    print(f"{'backend':<22}{'size MB':>9}{'RSS MB':>9}{'accuracy':>10}{'agree':>8}{'b' + smallest + ' ms':>10}{'b' + largest + ' ms':>10}")
+    for r in results:
+        accuracy = r.get("accuracy", "-")
+        print(f"{r['name']:<22}{r['size_mb']:>9}{r['rss_model_mb']:>9}{accuracy:>10}{r['agreement']:>8}"
+              f"{r['latency'][smallest]['p50_ms']:>10}{r['latency'][largest]['p50_ms']:>10}")
+    report = {"images": len(image_paths), "labeled_images": int((image_labels >= 0).sum()), "backends": results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from embedding_cache import CachedEmbeddings
+from vector_index import NumpyVectorIndex
+
+# Typical retrieval queries issued by the disease and search endpoints
+DEFAULT_QUERIES = [
+    "early blight treatment in potatoes",
+    "late blight symptoms on tomato leaves",
+    "apple scab fungicide schedule",
+    "cedar apple rust control",
+    "black rot of grapes management",
+    "citrus greening huanglongbing vector control",
+    "bacterial spot on peach and pepper",
+    "powdery mildew on squash and cherry",
+    "northern leaf blight of corn resistant varieties",
+    "common rust in maize",
+    "strawberry leaf scorch",
+    "tomato yellow leaf curl virus whitefly",
+    "spider mites on tomato",
+    "fertilizer recommendation for potato",
+    "irrigation schedule for apple orchards",
+    "soil requirements for grape cultivation",
+    "integrated pest management in horticulture crops",
+    "post harvest handling of oranges",
+    "nursery management for peach",
+    "organic treatment for fungal leaf spots",
+]
+
+def doc_key(doc):
+    """Identify a chunk independently of the store it came from."""
+    return (doc.page_content, doc.metadata.get("source"), doc.metadata.get("page"))
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+def time_search(search, vectors, k, iterations):
+    latencies, results = [], []
+    for vector in vectors:
+        search(vector, k)  # warm up
+        started = time.perf_counter()
+        for _ in range(iterations):
+            docs = search(vector, k)
+        latencies.append((time.perf_counter() - started) / iterations * 1000.0)
+        results.append(docs)
+    return latencies, results
+
+def run(chroma, index, queries, embeddings, k: int, iterations: int, crop=None):
+    vectors = [embeddings.embed_query(query) for query in queries]
+    search_filter = {"crop": crop} if crop else None
+
+    chroma_ms, chroma_results = time_search(
+        lambda v, n: chroma.similarity_search_by_vector(v, k=n, filter=search_filter), vectors, k, iterations
+    )
+    index_ms, index_results = time_search(
+        lambda v, n: index.similarity_search_by_vector(v, k=n, filter=search_filter), vectors, k, iterations
+    )
+
+    recalls = []
+    for expected, actual in zip(chroma_results, index_results):
+        expected_keys = {doc_key(doc) for doc in expected}
+        if expected_keys:
+            recalls.append(len(expected_keys & {doc_key(doc) for doc in actual}) / len(expected_keys))
+
+    return {
+        "queries": len(queries),
+        "k": k,
+        "crop": crop,
+        "vectors": len(index.ids),
+        "dtype": str(index.matrix.dtype),
+        "chroma_ms": {"p50": percentile(chroma_ms, 50), "p95": percentile(chroma_ms, 95), "mean": round(float(np.mean(chroma_ms)), 3)},
+        "numpy_ms": {"p50": percentile(index_ms, 50), "p95": percentile(index_ms, 95), "mean": round(float(np.mean(index_ms)), 3)},
+        "speedup_p50": round(percentile(chroma_ms, 50) / percentile(index_ms, 50), 2) if percentile(index_ms, 50) else None,
+        "recall_at_k": round(float(np.mean(recalls)), 4) if recalls else None,
+        "min_recall_at_k": round(float(np.min(recalls)), 4) if recalls else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare NumpyVectorIndex search latency and recall against Chroma")
+    parser.add_argument("--persist-dir", default=os.getenv("VECTOR_DB_DIR", "vector_db"))
+    parser.add_argument("--index-dir", default=os.getenv("VECTOR_INDEX_DIR", "vector_index"))
+    parser.add_argument("--queries-file", help="Text file with one query per line (default: built-in agricultural queries)")
+    parser.add_argument("--crop", help="Also restrict both searches to one crop folder, e.g. Potato")
+    parser.add_argument("--dtype", choices=["float32", "stored"], default="float32", help="Search dtype (\"stored\" searches the memory-mapped file as exported)")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = DEFAULT_QUERIES
+
+    embedding_model = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+    embeddings = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=embedding_model),
+        os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite"),
+        model_name=embedding_model
+    )
+    chroma = Chroma(persist_directory=args.persist_dir, embedding_function=embeddings)
+    index = NumpyVectorIndex.load(args.index_dir, embeddings, dtype=None if args.dtype == "stored" else args.dtype)
+
+    result = run(chroma, index, queries, embeddings, args.k, args.iterations, args.crop)
+    print(f"{'backend':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for backend in ("chroma", "numpy"):
+        timings = result[f"{backend}_ms"]
+        print(f"{backend:<10}{timings['p50']:>10.3f}{timings['p95']:>10.3f}{timings['mean']:>10.3f}")
+    print(f"speedup (p50): {result['speedup_p50']}x, recall@{args.k}: {result['recall_at_k']}")
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache with per-entry TTL expiry, LRU eviction and hit/miss counters.
+
+    When `persist_path` is given, entries are also written to a small SQLite file so they
+    survive restarts. Values must be JSON-serializable in that case.
+
+    Args:
+        max_entries: Maximum number of entries kept (least recently used entries are evicted first)
+        ttl_seconds: Age after which an entry is considered expired
+        persist_path: Optional SQLite file used as an on-disk backend
+        name: Label used in logs and stats
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0, persist_path: Optional[str] = None, name: str = "cache"):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path or None
+        self.name = name
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.persist_path:
+            self._open_db()
+
+    def _open_db(self):
+        try:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.persist_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, created REAL, value TEXT)")
+            self._db.commit()
+        except Exception as e:
+            logging.error(f"Could not open {self.name} cache at {self.persist_path}, using memory only: {e}")
+            self._db = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if it is missing or expired."""
+        entry = self.peek(key)
+        if entry is None or not entry[1]:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Look up `key` without counting a hit or miss and without dropping expired entries.
+
+        Returns:
+            (value, is_fresh) if the key is present in memory or on disk, otherwise None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._entries[key] = entry
+                    self._evict()
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            created, value = entry
+            fresh = (time.time() - created) <= self.ttl_seconds
+            if not fresh:
+                self.expirations += 1
+            return value, fresh
+
+    def set(self, key: str, value: Any):
+        """Store `value` under `key`, evicting the least recently used entries if over capacity."""
+        entry = (time.time(), value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO entries (key, created, value) VALUES (?, ?, ?)",
+                        (key, entry[0], json.dumps(value))
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logging.error(f"Could not persist {self.name} cache entry: {e}")
+
+    def delete(self, key: str):
+        """Remove `key` from memory and disk."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        """Remove every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            row = self._db.execute("SELECT created, value FROM entries WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            logging.error(f"Could not read {self.name} cache entry: {e}")
+            return None
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        if self._db is not None:
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
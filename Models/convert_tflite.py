@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from disease_labels import labels
+from image_processing import decode_for_model
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VARIANTS = ("float32", "float16", "int8")
+
+
+def _normalize(name: str) -> str:
+    return "".join(char for char in name.lower() if char.isalnum())
+
+
+# Class folders may be named after the label text ("Apple Scab", "apple_scab") or the output index ("0")
+_LABEL_BY_NAME = {_normalize(name): index for index, name in labels.items()}
+
+
+def label_for_folder(folder: str):
+    """Return the label index a class folder is named after, or None."""
+    if folder.isdigit() and int(folder) in labels:
+        return int(folder)
+    return _LABEL_BY_NAME.get(_normalize(folder))
+
+
+def list_images(directory: str, limit: int = 0, seed: int = 0):
+    """
+    List the images under `directory` as (path, label index or None).
+
+    Images in a subfolder named after a label get that label; images directly in `directory` or in other
+    folders are unlabeled. With a `limit`, a random sample spread over all folders is returned.
+    """
+    images = []
+    for root, _, files in os.walk(directory):
+        folder = os.path.relpath(root, directory)
+        label = label_for_folder(os.path.basename(root)) if folder != "." else None
+        for entry in sorted(files):
+            if entry.lower().endswith(IMAGE_EXTENSIONS):
+                images.append((os.path.join(root, entry), label))
+    images.sort()
+    if limit and len(images) > limit:
+        images = random.Random(seed).sample(images, limit)
+    return images
+
+
+def load_image(path: str) -> np.ndarray:
+    """Decode an image exactly as the server does for a snapshot."""
+    with open(path, 'rb') as f:
+        arr, _ = decode_for_model(f.read())
+    return arr
+
+
+def representative_dataset(paths):
+    """Calibration generator for int8 conversion: one preprocessed image per step."""
+    def generate():
+        for path in paths:
+            yield [load_image(path)[np.newaxis]]
+    return generate
+
+
+def convert(model_path: str, variant: str, calibration_paths=(), int8_io: bool = False) -> bytes:
+    """
+    Convert a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model_path: Saved Keras model (.h5 or SavedModel directory)
+        variant: "float32" (plain conversion), "float16" (weights stored as float16) or "int8" (full
+            integer post-training quantization calibrated on `calibration_paths`)
+        calibration_paths: Image files used to calibrate int8 activation ranges
+        int8_io: Make the int8 model's input and output int8 too (by default they stay float32, so the
+            model is a drop-in replacement)
+
+    Returns:
+        The serialized .tflite model
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if not calibration_paths:
+            raise ValueError("int8 conversion needs calibration images")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calibration_paths)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        if int8_io:
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+    elif variant != "float32":
+        raise ValueError(f"Unknown variant {variant!r}, expected one of {', '.join(VARIANTS)}")
+    return converter.convert()
+
+
+def output_path(model_path: str, output_dir: str, variant: str) -> str:
+    """Where a variant is written: <model name>_<variant>.tflite in `output_dir`."""
+    stem = os.path.splitext(os.path.basename(model_path.rstrip("/")))[0]
+    return os.path.join(output_dir, f"{stem}_{variant}.tflite")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the disease classifier to TFLite (float32, float16 and int8 quantized)")
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "disease_classification_model.h5"))
+    parser.add_argument("--output-dir", default=".", help="Directory the .tflite files are written to")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="Comma-separated variants to produce")
+    parser.add_argument("--calibration-dir", help="Directory of leaf images used to calibrate int8 quantization (class subfolders are fine)")
+    parser.add_argument("--calibration-samples", type=int, default=200, help="Number of calibration images sampled")
+    parser.add_argument("--int8-io", action="store_true", help="Use int8 input and output tensors for the int8 model")
+    args = parser.parse_args()
+
+    variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+    calibration = []
+    if "int8" in variants:
+        if not args.calibration_dir:
+            parser.error("--calibration-dir is required for the int8 variant")
+        calibration = [path for path, _ in list_images(args.calibration_dir, args.calibration_samples)]
+        if not calibration:
+            parser.error(f"No images found in {args.calibration_dir}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = []
+    for variant in variants:
+        started = time.perf_counter()
+        flatbuffer = convert(args.model, variant, calibration, int8_io=args.int8_io)
+        path = output_path(args.model, args.output_dir, variant)
+        with open(path, 'wb') as f:
+            f.write(flatbuffer)
+        results.append({
+            "variant": variant,
+            "path": path,
+            "size_mb": round(len(flatbuffer) / 1024 / 1024, 2),
+            "convert_seconds": round(time.perf_counter() - started, 1),
+            "calibration_images": len(calibration) if variant == "int8" else 0,
+        })
+        print(f"{variant:<10}{results[-1]['size_mb']:>8} MB  {path}")
+    print(json.dumps(results, indent=2))
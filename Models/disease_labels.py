@@ -0,0 +1,41 @@
+# Disease class labels for the classification model, indexed by output unit
+labels = {
+    0: 'Apple Scab',
+    1: 'Apple Black Rot',
+    2: 'Cedar Apple Rust',
+    3: 'Healthy Apple',
+    4: 'Healthy Blueberry',
+    5: 'Cherry Powdery Mildew',
+    6: 'Healthy Cherry',
+    7: 'Corn Cercospora Leaf Spot',
+    8: 'Maize Common Rust',
+    9: 'Corn Northern Leaf Blight',
+    10: 'Healthy Corn',
+    11: 'Grape Black Rot',
+    12: 'Grape Black Measles',
+    13: 'Grape Leaf Blight',
+    14: 'Healthy Grape',
+    15: 'Orange Citrus Greening',
+    16: 'Peach Bacterial Spot',
+    17: 'Healthy Peach',
+    18: 'Pepper Bell Bacterial Spot',
+    19: 'Healthy Pepper Bell',
+    20: 'Potato Early Blight',
+    21: 'Potato Late Blight',
+    22: 'Healthy Potato',
+    23: 'Healthy Raspberry',
+    24: 'Healthy Soybean',
+    25: 'Squash Powdery Mildew',
+    26: 'Strawberry Leaf Scorch',
+    27: 'Healthy Strawberry',
+    28: 'Tomato Bacterial Spot',
+    29: 'Tomato Early Blight',
+    30: 'Tomato Late Blight',
+    31: 'Tomato Leaf Mold',
+    32: 'Tomato Septoria Leaf Spot',
+    33: 'Tomato Spider Mites',
+    34: 'Tomato Target Spot',
+    35: 'Tomato Yellow Leaf Curl Virus',
+    36: 'Tomato Mosaic Virus',
+    37: 'Healthy Tomato'
+}
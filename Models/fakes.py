@@ -0,0 +1,275 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class InjectedFailure(Exception):
+    """Raised by a fake service when failure injection triggers."""
+
+
+class FaultInjector:
+    """
+    Latency and failure injection shared by the fake services.
+
+    Args:
+        latency: Mean added latency in seconds
+        jitter: Latency is drawn uniformly from latency +/- jitter
+        failure_rate: Probability (0-1) that a call raises InjectedFailure
+        seed: Random seed, so a load test is repeatable
+    """
+
+    def __init__(self, name: str, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def draw(self):
+        """Count a call and return (latency to inject, whether it fails)."""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+    def call(self):
+        """Block for the injected latency, then maybe fail."""
+        delay, fail = self.draw()
+        time.sleep(delay)
+        if fail:
+            raise InjectedFailure(f"{self.name}: injected failure")
+
+    async def acall(self):
+        """Async variant of `call` that does not block the event loop."""
+        delay, fail = self.draw()
+        await asyncio.sleep(delay)
+        if fail:
+            raise InjectedFailure(f"{self.name}: injected failure")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "failures": self.failures, "latency": self.latency, "failure_rate": self.failure_rate}
+
+
+# Final answer covering the fields parsed by both the disease and the market analysis endpoints
+FAKE_ANSWER = {
+    "about": "A fungal disease that causes dark lesions on leaves.",
+    "causes": "Spread by spores in warm, humid weather.",
+    "treatment": "Remove infected leaves and apply a copper fungicide every 7 to 10 days.",
+    "recommended_crops": "Rotate with legumes or cereals.",
+    "weed_control": "Mulch and hand weed around the plants.",
+    "intercultural_operations": "Prune for airflow and stake the plants.",
+    "irrigation": "Use drip irrigation and avoid wetting the foliage.",
+    "storage_techniques": "Store produce in a cool, dry and ventilated place.",
+    "planting_methods": "Use certified disease-free seed and wide spacing.",
+    "soil_management": "Keep the soil well drained and add compost.",
+    "current_price": "2450.00",
+    "average_price": "2300.00",
+    "selling_advice": "Sell in smaller lots while prices are above average.",
+    "market_insights": "Arrivals are lower than last month.",
+    "market_demand": "Demand is steady in urban markets.",
+    "market_supply": "Supply is tight after the rains.",
+    "government_policy": "No new export restrictions this season.",
+    "risk_alert": "Prices may fall when the next harvest arrives.",
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Stand-in for ChatGoogleGenerativeAI that works with the tool-calling agent.
+
+    On the first turn of an agent run it requests the tools listed in `tool_calls` (if they are bound) whose
+    results are not already in the prompt, recognized by the tool's marker in `context_markers`. Once tool
+    results are present, or none are needed, it returns FAKE_ANSWER as plain JSON. When streamed, the answer
+    arrives in `stream_chunk_size` character tokens with the injected latency spread evenly over them.
+    """
+
+    injector: Any = None
+    tool_calls: List[str] = ["GetSoilTypeInMyArea", "GetWeatherForMyArea"]
+    context_markers: Dict[str, str] = {
+        "GetSoilTypeInMyArea": "Soil type in my area:",
+        "GetWeatherForMyArea": "Current weather in my area:",
+    }
+    bound_tools: List[str] = []
+    stream_chunk_size: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(tool, "name", None) or tool.get("name") for tool in tools]
+        return self.model_copy(update={"bound_tools": names})
+
+    def _respond(self, messages) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        requested = [
+            name for name in self.tool_calls
+            if name in self.bound_tools and self.context_markers.get(name, "\0") not in prompt
+        ]
+        # The agent scratchpad may arrive as messages or interpolated into the prompt text
+        has_results = any(isinstance(message, ToolMessage) or "tool_call_id" in str(message.content) for message in messages)
+        if requested and not has_results:
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": {"__arg1": "my area"}, "id": f"call_{i}"} for i, name in enumerate(requested)
+            ])
+        else:
+            message = AIMessage(content=json.dumps(FAKE_ANSWER))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.injector:
+            self.injector.call()
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.injector:
+            await self.injector.acall()
+        return self._respond(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, fail = self.injector.draw() if self.injector else (0.0, False)
+        message = self._respond(messages).generations[0].message
+        if message.tool_calls:
+            await asyncio.sleep(delay)
+            if fail:
+                raise InjectedFailure(f"{self.injector.name}: injected failure")
+            chunks = [AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ])]
+        else:
+            text = message.content
+            chunks = [AIMessageChunk(content=text[i:i + self.stream_chunk_size]) for i in range(0, len(text), self.stream_chunk_size)]
+        for i, chunk in enumerate(chunks):
+            if not message.tool_calls:
+                await asyncio.sleep(delay / len(chunks))
+                if fail and i == len(chunks) // 2:
+                    raise InjectedFailure(f"{self.injector.name}: injected failure mid-stream")
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeSearch:
+    """Stand-in for DuckDuckGoSearchAPIWrapper."""
+
+    def __init__(self, injector: FaultInjector):
+        self.injector = injector
+
+    def run(self, query: str) -> str:
+        self.injector.call()
+        return f"Loam and clay loam soils are common. Results for: {query}"
+
+
+class FakeYouTube:
+    """Stand-in for the YouTube search tool."""
+
+    def __init__(self, injector: FaultInjector):
+        self.injector = injector
+
+    def _run(self, query: str, **kwargs) -> str:
+        self.injector.call()
+        return str([f"https://www.youtube.com/watch?v=fake{i}" for i in range(2)])
+
+
+class _Variable:
+    def __init__(self, value):
+        self._value = value
+
+    def Value(self):
+        return self._value
+
+
+class _Current:
+    def __init__(self, values):
+        self._values = values
+
+    def Variables(self, index):
+        return _Variable(self._values[index])
+
+
+class _WeatherResponse:
+    def __init__(self, values):
+        self._values = values
+
+    def Current(self):
+        return _Current(self._values)
+
+
+class FakeWeatherClient:
+    """Stand-in for openmeteo_requests.Client returning temperature, humidity, precipitation and wind speed."""
+
+    def __init__(self, injector: FaultInjector, values=(25.0, 60.0, 0.0, 5.0)):
+        self.injector = injector
+        self.values = list(values)
+
+    def weather_api(self, url, params=None):
+        self.injector.call()
+        # One response per requested location
+        latitudes = params.get("latitude") if params else None
+        count = len(latitudes) if isinstance(latitudes, (list, tuple)) else 1
+        return [_WeatherResponse(self.values) for _ in range(count)]
+
+
+class _Location:
+    def __init__(self, city):
+        self.raw = {"address": {"city": city, "state": "Test State"}}
+
+
+class FakeGeolocator:
+    """Stand-in for the Nominatim reverse geocoder."""
+
+    def __init__(self, injector: FaultInjector, city: str = "Springfield"):
+        self.injector = injector
+        self.city = city
+
+    def reverse(self, coords, language='en', **kwargs):
+        self.injector.call()
+        return _Location(self.city)
+
+
+class _IpResult:
+    def __init__(self, latlng):
+        self.ok = True
+        self.latlng = list(latlng)
+
+
+class FakeGeocoder:
+    """Stand-in for the `geocoder` module's IP lookup."""
+
+    def __init__(self, injector: FaultInjector, latlng=(40.7128, -74.0060)):
+        self.injector = injector
+        self.latlng = latlng
+
+    def ip(self, address):
+        self.injector.call()
+        return _IpResult(self.latlng)
+
+
+class FakeDiseaseModel:
+    """
+    Stand-in for the Keras classifier with a fixed per-batch and per-image cost.
+    """
+
+    def __init__(self, batch_latency: float = 0.02, item_latency: float = 0.005, classes: int = 38, seed: int = 0):
+        self.batch_latency = batch_latency
+        self.item_latency = item_latency
+        self.classes = classes
+        self._rng = np.random.default_rng(seed)
+
+    def predict_on_batch(self, batch):
+        time.sleep(self.batch_latency + self.item_latency * len(batch))
+        logits = self._rng.random((len(batch), self.classes))
+        return logits / logits.sum(axis=1, keepdims=True)
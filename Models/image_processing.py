@@ -0,0 +1,116 @@
+import io
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Input resolution of the disease classification model
+MODEL_INPUT_SIZE = (224, 224)
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+def decode_for_model(buf: bytes, size: Tuple[int, int] = MODEL_INPUT_SIZE) -> Tuple[np.ndarray, str]:
+    """
+    Decode an uploaded image straight to the model input.
+
+    For JPEGs, `draft` asks libjpeg to decode at a reduced scale (1/2, 1/4 or 1/8) that is still at least
+    `size`, so a 1600x1200 ESP32 frame is decoded at 400x300 instead of full resolution. The small image is
+    then resized by PIL, and one `np.multiply` converts the uint8 pixels straight to normalized float32
+    (no float64 intermediate as in `decode_for_model_reference`).
+
+    Args:
+        buf: Encoded image bytes as uploaded by the camera
+        size: (width, height) expected by the model
+
+    Returns:
+        (array of shape (height, width, 3) in [0, 1], MIME type of the uploaded image)
+    """
+    img = Image.open(io.BytesIO(buf))
+    content_type = Image.MIME.get(img.format, "application/octet-stream")
+    img.draft('RGB', size)
+    img = img.convert('RGB')
+    if img.size != size:
+        img = img.resize(size)
+    arr = np.multiply(np.asarray(img), _SCALE, dtype=np.float32)
+    return arr, content_type
+
+
+def decode_for_model_reference(buf: bytes, size: Tuple[int, int] = MODEL_INPUT_SIZE) -> Tuple[np.ndarray, bytes]:
+    """
+    The original snapshot path, kept for benchmarking: full-resolution decode, resize, float64
+    normalization and a full-resolution JPEG re-encode for storage.
+    """
+    img = Image.open(io.BytesIO(buf)).convert('RGB')
+    img_resized = img.resize(size)
+    arr = np.array(img_resized) / 255.0
+    bio = io.BytesIO()
+    img.save(bio, format='JPEG')
+    return arr, bio.getvalue()
+
+
+def difference_hash(arr: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Perceptual difference hash (dHash) of a decoded frame.
+
+    The frame is converted to grayscale, downscaled to (hash_size + 1) x hash_size and each bit records
+    whether a pixel is brighter than its right-hand neighbour. Visually identical frames produce hashes
+    a few bits apart regardless of JPEG noise.
+
+    Args:
+        arr: Image array of shape (H, W, 3), e.g. the normalized model input
+        hash_size: Number of rows/bits per row; the hash has hash_size * hash_size bits
+
+    Returns:
+        The hash packed into an int
+    """
+    gray = np.asarray(arr, dtype=np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    small = Image.fromarray(gray).resize((hash_size + 1, hash_size), Image.BOX)
+    pixels = np.asarray(small)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class FrameChangeDetector:
+    """
+    Decides whether a camera frame differs enough from the device's previous frame to be re-analysed.
+
+    Args:
+        threshold: Maximum Hamming distance between hashes for frames to count as unchanged (negative disables skipping)
+        max_age_seconds: Re-analyse even an unchanged frame once the previous analysis is older than this
+    """
+
+    def __init__(self, threshold: int = 5, max_age_seconds: float = 3600.0):
+        self.threshold = threshold
+        self.max_age_seconds = max_age_seconds
+        self.processed = 0
+        self.skipped = 0
+
+    def is_unchanged(self, previous_hash: Optional[int], previous_age: float, frame_hash: int) -> bool:
+        """Return True (and count a skip) if the frame can reuse the previous analysis."""
+        unchanged = (
+            self.threshold >= 0
+            and previous_hash is not None
+            and previous_age <= self.max_age_seconds
+            and hamming_distance(previous_hash, frame_hash) <= self.threshold
+        )
+        if unchanged:
+            self.skipped += 1
+        else:
+            self.processed += 1
+        return unchanged
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.processed + self.skipped
+        return {
+            "threshold": self.threshold,
+            "max_age_seconds": self.max_age_seconds,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / total, 4) if total else 0.0,
+        }
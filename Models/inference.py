@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class BatchInferenceEngine:
+    """
+    Dynamic micro-batching front end for the disease classification model.
+
+    Concurrent callers submit single preprocessed images with `predict`. A background worker
+    collects queued images until either `max_batch_size` is reached or the oldest image has
+    waited `max_wait_ms`, runs them through the model in one forward pass and hands every
+    caller back its own row of the output.
+
+    Args:
+        model: Object exposing `predict_on_batch` or `predict` over an (N, H, W, C) array
+        max_batch_size: Largest number of images sent to the model in a single call
+        max_wait_ms: Longest time the first queued image waits for more images to arrive
+        executor: Optional executor the blocking model call runs in (default loop executor if None)
+    """
+
+    def __init__(self, model, max_batch_size: int = 16, max_wait_ms: float = 10.0, executor=None):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Counters used to tune batch size and wait time against camera fan-in
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._batch_sizes = Counter()
+        self._queue_waits = deque(maxlen=1000)
+        self._model_times = deque(maxlen=1000)
+
+    async def start(self):
+        """Start the batching worker on the running event loop (no-op if already running)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching worker and fail any requests still waiting in the queue."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference engine stopped"))
+
+    async def predict(self, arr: np.ndarray) -> np.ndarray:
+        """
+        Queue a single image for batched inference and wait for its prediction.
+
+        Args:
+            arr: Preprocessed image of shape (H, W, C) or (1, H, W, C)
+
+        Returns:
+            The model output row for this image
+        """
+        if arr.ndim == 4:
+            if arr.shape[0] != 1:
+                raise ValueError(f"Expected a single image, got batch of {arr.shape[0]}")
+            arr = arr[0]
+
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((arr, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block until there is at least one image, then gather more until the batch is full
+            # or the first image has waited long enough
+            first = await self._queue.get()
+            items = [first]
+            deadline = first[2] + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    # Still take whatever is already queued without waiting
+                    if self._queue.empty():
+                        break
+                    items.append(self._queue.get_nowait())
+                    continue
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            started = time.perf_counter()
+            for _, _, enqueued in items:
+                self._queue_waits.append(started - enqueued)
+
+            try:
+                # Inside the try: mismatched shapes or dtypes fail this batch's callers, not the worker
+                batch = np.stack([item[0] for item in items])
+                preds = await loop.run_in_executor(self.executor, self._predict_batch, batch)
+                self._model_times.append(time.perf_counter() - started)
+                for i, (_, future, _) in enumerate(items):
+                    if not future.done():
+                        future.set_result(preds[i])
+            except Exception as e:
+                logging.error(f"Batched inference error: {e}", exc_info=True)
+                self._errors += 1
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self._requests += len(items)
+            self._batches += 1
+            self._batch_sizes[len(items)] += 1
+
+    def _predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        # predict_on_batch skips the per-call tf.data setup that predict() pays on every call
+        predict = getattr(self.model, "predict_on_batch", None) or self.model.predict
+        return np.asarray(predict(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch-size and queue-wait statistics for tuning."""
+        waits = np.array(self._queue_waits) * 1000.0
+        model_times = np.array(self._model_times) * 1000.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": self._requests,
+            "batches": self._batches,
+            "errors": self._errors,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": (self._requests / self._batches) if self._batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            "queue_wait_ms": _summarize(waits),
+            "model_time_ms": _summarize(model_times),
+        }
+
+
+def _summarize(values: np.ndarray) -> Dict[str, float]:
+    if values.size == 0:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "avg": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "max": round(float(values.max()), 3),
+    }
@@ -0,0 +1,236 @@
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised by `JobQueue.submit` when the backlog of queued jobs is at its limit."""
+
+
+class Job:
+    """
+    A unit of background work with its status, progress and final result.
+    """
+
+    def __init__(self, kind: str, metadata: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.metadata = metadata or {}
+        self.status = "queued"  # "queued", "running", "done", "failed" or "superseded"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def update(self, stage: str, progress: float):
+        """Record the current stage and fractional progress (0.0 - 1.0) of a running job."""
+        self.stage = stage
+        self.progress = max(0.0, min(1.0, progress))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 2),
+            "metadata": self.metadata,
+            "created_at": _isoformat(self.created_at),
+            "started_at": _isoformat(self.started_at),
+            "finished_at": _isoformat(self.finished_at),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Background worker queue with bounded concurrency for slow enrichment work (LLM agent runs).
+
+    The backlog is bounded: at most `max_queued` jobs wait at a time and `submit` raises JobQueueFull
+    beyond that. Jobs submitted with a `coalesce_key` (e.g. a device id) replace the queued job with the same
+    key, which is marked "superseded" and never runs, so a busy camera only ever has one job waiting.
+
+    Args:
+        concurrency: Number of jobs allowed to run at the same time
+        max_jobs: Maximum number of jobs remembered for status lookups (oldest finished jobs are dropped first)
+        retention_seconds: How long finished jobs stay available through `get`
+        max_queued: Maximum number of jobs waiting to run
+    """
+
+    def __init__(self, concurrency: int = 2, max_jobs: int = 1000, retention_seconds: float = 3600.0, max_queued: int = 100):
+        self.concurrency = max(1, int(concurrency))
+        self.max_jobs = max(1, int(max_jobs))
+        self.retention_seconds = retention_seconds
+        self.max_queued = max(1, int(max_queued))
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        # Queued (job, func) per coalesce key; the queue itself only holds the key once
+        self._pending: Dict[Hashable, tuple] = {}
+        self._workers = []
+
+        self._completed = 0
+        self._failed = 0
+        self._superseded = 0
+        self._rejected = 0
+
+    async def start(self):
+        """Start the worker tasks on the running event loop (no-op if already running)."""
+        if self._workers and not all(w.done() for w in self._workers):
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Cancel the worker tasks. Jobs still queued are marked as failed."""
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._take(self._queue.get_nowait())
+            if item is not None:
+                self._finish(item[0], error="Job queue stopped")
+
+    async def submit(self, kind: str, func: Callable[[Job], Awaitable[Any]], coalesce_key: Optional[Hashable] = None, **metadata) -> Job:
+        """
+        Queue a job for background execution.
+
+        Args:
+            kind: Short job type name reported in the status
+            func: Coroutine function called with the Job (for progress updates); its return value is the job result
+            coalesce_key: Jobs with the same key replace each other while queued (running jobs are not affected)
+            **metadata: Extra fields reported with the job status
+
+        Returns:
+            The queued Job
+
+        Raises:
+            JobQueueFull: If `max_queued` jobs are already waiting (replacing a queued job never raises)
+        """
+        await self.start()
+        previous = self._pending.get(coalesce_key) if coalesce_key is not None else None
+        if previous is None and self._queue.qsize() >= self.max_queued:
+            self._rejected += 1
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+
+        job = Job(kind, metadata)
+        self._jobs[job.id] = job
+        self._prune()
+        if coalesce_key is None:
+            self._queue.put_nowait((job, func))
+        elif previous is None:
+            self._pending[coalesce_key] = (job, func)
+            self._queue.put_nowait(_Coalesced(coalesce_key))
+        else:
+            # Take over the queue slot of the job being replaced
+            self._pending[coalesce_key] = (job, func)
+            self._supersede(previous[0], job)
+        return job
+
+    def _take(self, item) -> Optional[tuple]:
+        """Resolve a queue item to its (job, func)."""
+        if isinstance(item, _Coalesced):
+            return self._pending.pop(item.key, None)
+        return item
+
+    def _supersede(self, job: Job, replacement: Job):
+        job.status = "superseded"
+        job.stage = "superseded"
+        job.error = f"Superseded by job {replacement.id}"
+        job.finished_at = time.time()
+        self._superseded += 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given id, or None if it is unknown or has expired."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _run(self):
+        while True:
+            item = self._take(await self._queue.get())
+            if item is None:
+                continue
+            job, func = item
+            job.status = "running"
+            job.started_at = time.time()
+            job.update("running", 0.0)
+            try:
+                result = await func(job)
+                self._finish(job, result=result)
+            except asyncio.CancelledError:
+                self._finish(job, error="Job cancelled")
+                # Only stop when this worker is being cancelled; a CancelledError raised by the job itself
+                # (e.g. awaiting a future someone else cancelled) must not shrink the pool
+                if asyncio.current_task().cancelling():
+                    raise
+            except Exception as e:
+                logging.error(f"Background job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+                self._finish(job, error=str(e))
+
+    def _finish(self, job: Job, result: Any = None, error: Optional[str] = None):
+        job.finished_at = time.time()
+        if error is None:
+            job.status = "done"
+            job.result = result
+            job.update("done", 1.0)
+            self._completed += 1
+        else:
+            job.status = "failed"
+            job.error = error
+            job.stage = "failed"
+            self._failed += 1
+
+    def _prune(self):
+        # Drop expired finished jobs, then the oldest finished jobs while over capacity
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished_at is not None and now - j.finished_at > self.retention_seconds]:
+            del self._jobs[job_id]
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None]:
+                del self._jobs[job_id]
+                if len(self._jobs) <= self.max_jobs:
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counters."""
+        running = sum(1 for j in self._jobs.values() if j.status == "running")
+        return {
+            "concurrency": self.concurrency,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "running": running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "superseded": self._superseded,
+            "rejected": self._rejected,
+            "tracked_jobs": len(self._jobs),
+        }
+
+
+class _Coalesced:
+    """Queue slot of the pending job for a coalesce key."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: Hashable):
+        self.key = key
+
+
+def _isoformat(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.datetime.utcfromtimestamp(ts).isoformat() + 'Z'
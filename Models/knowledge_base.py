@@ -0,0 +1,184 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the layout of the artifact or of the stored analyses changes
+KNOWLEDGE_BASE_FORMAT = 2
+
+# Query types precomputed for every disease label
+QUERY_TYPES = ["all", "about", "causes", "treatment"]
+
+
+class KnowledgeBase:
+    """
+    Versioned, precomputed disease analyses for every classifier label, stored as a local JSON artifact.
+
+    Entries are keyed on (disease name, query type, conditions). General entries have no conditions and are
+    generated without any local soil or weather; entries for a weather bucket carry that bucket's key (see
+    `disease_info_cache_key` in prediction_server.py). An entry is stale when it is older than
+    `max_age_seconds` or was produced by a different artifact version (format or model names).
+
+    Args:
+        path: Location of the JSON artifact
+        version: Version tag for newly generated entries, e.g. "1:gemini-2.0-flash:models/text-embedding-004"
+        max_age_seconds: Age after which an entry is due for refresh
+    """
+
+    def __init__(self, path: str, version: str, max_age_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.version = version
+        self.max_age_seconds = max_age_seconds
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_misses = 0
+
+    @staticmethod
+    def key(disease_name: str, query_type: str, conditions: str = "") -> str:
+        key = f"{disease_name.strip().lower()}|{query_type}"
+        return f"{key}|{conditions}" if conditions else key
+
+    def load(self) -> "KnowledgeBase":
+        """Load the artifact from disk if it exists. Entries from older versions are kept but marked stale."""
+        if not os.path.exists(self.path):
+            logging.info(f"No precomputed knowledge base at {self.path}")
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            logging.info(f"Loaded {len(self.entries)} precomputed analyses from {self.path} (version {data.get('version')})")
+        except Exception as e:
+            logging.error(f"Error loading knowledge base {self.path}: {e}")
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Atomically write the artifact to disk."""
+        data = {
+            "format": KNOWLEDGE_BASE_FORMAT,
+            "version": self.version,
+            "saved_at": datetime.datetime.utcnow().isoformat() + 'Z',
+            "entries": self.entries,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def get(self, disease_name: str, query_type: str, conditions: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Return the precomputed analysis for a disease, query type and conditions bucket ("" for the general
+        entry), or None on a miss. Stale entries (too old, or built by a different version) are misses until
+        they are regenerated.
+        """
+        entry = self.entries.get(self.key(disease_name, query_type, conditions))
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.is_stale(disease_name, query_type, conditions):
+            self.misses += 1
+            self.stale_misses += 1
+            return None
+        self.hits += 1
+        return dict(entry["info"])
+
+    def put(self, disease_name: str, query_type: str, info: Dict[str, Any], conditions: str = ""):
+        self.entries[self.key(disease_name, query_type, conditions)] = {
+            "disease": disease_name,
+            "query_type": query_type,
+            "conditions": conditions,
+            "version": self.version,
+            "generated_at": time.time(),
+            "info": info,
+        }
+
+    def is_stale(self, disease_name: str, query_type: str, conditions: str = "") -> bool:
+        entry = self.entries.get(self.key(disease_name, query_type, conditions))
+        if entry is None or entry.get("version") != self.version:
+            return True
+        return time.time() - entry.get("generated_at", 0) > self.max_age_seconds
+
+    def drop_conditions(self, keep: str = "") -> int:
+        """Remove the entries of every conditions bucket except `keep` (general entries are kept). Returns the count."""
+        dropped = [key for key, e in self.entries.items() if e.get("conditions", "") not in ("", keep)]
+        for key in dropped:
+            del self.entries[key]
+        return len(dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "entries": len(self.entries),
+            "stale_entries": sum(
+                1 for e in self.entries.values() if self.is_stale(e["disease"], e["query_type"], e.get("conditions", ""))
+            ),
+            "condition_buckets": len({e.get("conditions", "") for e in self.entries.values()} - {""}),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_misses": self.stale_misses,
+        }
+
+
+async def precompute(
+    kb: KnowledgeBase,
+    generate: Callable[[str, str], Awaitable[Dict[str, Any]]],
+    disease_names: Iterable[str],
+    query_types: Iterable[str] = QUERY_TYPES,
+    concurrency: int = 4,
+    only_stale: bool = True,
+    save_every: int = 10,
+    conditions: str = "",
+) -> Dict[str, Any]:
+    """
+    Generate analyses for every (disease, query type) pair with bounded concurrency and store them in `kb`.
+
+    Args:
+        kb: Knowledge base to fill
+        generate: Coroutine function (disease_name, query_type) -> analysis dict. Analyses carrying
+            "_complete": False (agent fallback text) are not stored.
+        disease_names: Disease labels to precompute
+        query_types: Query types to precompute for each label
+        concurrency: Maximum number of analyses generated at once
+        only_stale: Skip entries that are present and fresh
+        save_every: Write the artifact after this many new entries so an interrupted run keeps its progress
+        conditions: Conditions bucket the analyses are stored under ("" for general entries); `generate`
+            must produce analyses for those conditions
+
+    Returns:
+        Summary with counts of generated, skipped and failed entries
+    """
+    pairs: List[Tuple[str, str]] = [(d, q) for d in disease_names for q in query_types]
+    todo = [(d, q) for d, q in pairs if not only_stale or kb.is_stale(d, q, conditions)]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    summary = {"total": len(pairs), "skipped": len(pairs) - len(todo), "generated": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run(disease_name: str, query_type: str):
+        async with semaphore:
+            try:
+                info = await generate(disease_name, query_type)
+            except Exception as e:
+                logging.error(f"Precompute failed for {disease_name} ({query_type}): {e}")
+                summary["failed"] += 1
+                return
+        if not info.pop("_complete", True):
+            logging.warning(f"Agent fallback for {disease_name} ({query_type}), not stored")
+            summary["failed"] += 1
+            return
+        kb.put(disease_name, query_type, info, conditions)
+        summary["generated"] += 1
+        logging.info(f"Precomputed {disease_name} ({query_type}) [{summary['generated']}/{len(todo)}]")
+        if summary["generated"] % save_every == 0:
+            kb.save()
+
+    await asyncio.gather(*(run(d, q) for d, q in todo))
+    if summary["generated"]:
+        kb.save()
+    summary["seconds"] = round(time.perf_counter() - started, 1)
+    return summary
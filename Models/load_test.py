@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from PIL import Image
+
+from fakes import (
+    FaultInjector, FakeChatModel, FakeSearch, FakeYouTube, FakeWeatherClient, FakeGeolocator, FakeGeocoder,
+    FakeDiseaseModel
+)
+from knowledge_base import QUERY_TYPES
+
+ENDPOINTS = ["snapshot", "query_disease", "searchdata", "latest_snapshot"]
+# Server-sent-event variants, reported with their time to the first field event
+STREAM_ENDPOINTS = ["query_disease_stream", "searchdata_stream"]
+MARKET_QUERIES = ["Tomato", "Potato", "Apple", "Grape", "Corn", "Orange"]
+
+def make_frames(count: int, size=(640, 480), seed: int = 0):
+    """
+    Distinct JPEG camera frames, so most uploads are not skipped as unchanged.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        base = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+        img = Image.fromarray(base).resize(size, Image.BICUBIC)
+        bio = io.BytesIO()
+        img.save(bio, format='JPEG', quality=85)
+        frames.append(bio.getvalue())
+    return frames
+
+def install_fakes(server, args):
+    """
+    Replace every external dependency of the server with a local fake and provide its heavy resources.
+
+    Returns:
+        The fault injectors by service name, for reporting
+    """
+    def injector(name, latency):
+        return FaultInjector(name, latency, latency * args.jitter, args.failure_rate, seed=args.seed)
+
+    injectors = {
+        "llm": injector("llm", args.llm_latency),
+        "search": injector("search", args.search_latency),
+        "youtube": injector("youtube", args.youtube_latency),
+        "weather": injector("weather", args.weather_latency),
+        "geolocator": injector("geolocator", args.geocoder_latency),
+        "geocoder": injector("geocoder", args.geocoder_latency),
+    }
+    server.llm = FakeChatModel(injector=injectors["llm"])
+    server.search = FakeSearch(injectors["search"])
+    server.youtube = FakeYouTube(injectors["youtube"])
+    server.weather_service.client = FakeWeatherClient(injectors["weather"])
+    server.geolocator = FakeGeolocator(injectors["geolocator"])
+    server.geocoder = FakeGeocoder(injectors["geocoder"], server.DEFAULT_LOCATION)
+
+    # Retrieval over the local corpus with deterministic offline embeddings
+    from local_embeddings import HashingEmbeddings
+    from main import build_index, load_chunks
+    texts, metadatas = load_chunks(args.corpus)
+    vectorstore = build_index(texts, metadatas, HashingEmbeddings())
+
+    model = FakeDiseaseModel(args.model_batch_latency, args.model_item_latency, seed=args.seed)
+    server.inference_engine.model = model
+    server.resources.set("location", list(server.DEFAULT_LOCATION))
+    server.resources.set("vectorstore", vectorstore)
+    server.resources.set("retriever_tool", server.load_retriever_tool(vectorstore))
+    server.resources.set("disease_model", model)
+    return injectors
+
+async def stream_request(client, url: str, body, first_field):
+    """POST to a streaming endpoint and read it to the end, appending the seconds until the first field event."""
+    started = time.perf_counter()
+    async with client.stream("POST", url, json=body) as response:
+        async for line in response.aiter_lines():
+            if line == "event: field" and not first_field:
+                first_field.append(time.perf_counter() - started)
+    return response
+
+async def worker(client, endpoint: str, index: int, deadline: float, frames, labels, results, rng, first_fields):
+    device = f"loadtest-{index}"
+    while time.monotonic() < deadline:
+        first_field = []
+        if endpoint == "snapshot":
+            request = client.post("/snapshot", content=rng.choice(frames), headers={"X-Device-Id": device, "Content-Type": "image/jpeg"})
+        elif endpoint == "query_disease":
+            request = client.post("/query_disease", json={"disease_name": rng.choice(labels), "query_type": rng.choice(QUERY_TYPES)})
+        elif endpoint == "searchdata":
+            request = client.post("/searchdata", json={"query": rng.choice(MARKET_QUERIES)})
+        elif endpoint == "query_disease_stream":
+            request = stream_request(client, "/query_disease/stream", {"disease_name": rng.choice(labels), "query_type": rng.choice(QUERY_TYPES)}, first_field)
+        elif endpoint == "searchdata_stream":
+            request = stream_request(client, "/searchdata/stream", {"query": rng.choice(MARKET_QUERIES)}, first_field)
+        else:
+            request = client.get("/latest_snapshot")
+
+        started = time.perf_counter()
+        try:
+            response = await request
+            status = response.status_code
+        except Exception as e:
+            logging.error(f"{endpoint} request failed: {e}")
+            status = "exception"
+        results[endpoint].append((time.perf_counter() - started, status))
+        first_fields[endpoint].extend(first_field)
+        # In-process requests that never wait on I/O complete without suspending; yield so fast endpoints
+        # do not starve the rest of the event loop
+        await asyncio.sleep(0)
+
+def summarize(samples, duration: float, first_fields=()):
+    latencies = np.array([latency for latency, _ in samples]) * 1000.0
+    statuses = Counter(str(status) for _, status in samples)
+    errors = sum(count for status, count in statuses.items() if status == "exception" or status.startswith("5"))
+    def pct(q, values=latencies):
+        return round(float(np.percentile(values, q)), 2) if len(values) else None
+    first_fields = np.array(first_fields) * 1000.0
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "status_codes": dict(statuses),
+        "throughput_rps": round(len(samples) / duration, 2),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2) if len(latencies) else None,
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(float(latencies.max()), 2) if len(latencies) else None,
+        },
+    }
+    if len(first_fields):
+        summary["first_field_ms"] = {"p50": pct(50, first_fields), "p95": pct(95, first_fields)}
+    return summary
+
+async def run(args):
+    import httpx
+    import prediction_server as server
+    from disease_labels import labels
+
+    logging.getLogger().setLevel(logging.WARNING)
+    injectors = install_fakes(server, args)
+    frames = make_frames(args.frames, seed=args.seed)
+    rng = random.Random(args.seed)
+    results = defaultdict(list)
+    first_fields = defaultdict(list)
+
+    # ASGITransport does not send lifespan events, so run the server's startup/shutdown here
+    async with server.lifespan(server.app):
+        if args.serve:
+            # ASGITransport buffers whole responses, so streaming is only observable over a real socket
+            import uvicorn
+            uvicorn_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=args.port, lifespan="off", log_level="warning"))
+            serving = asyncio.create_task(uvicorn_server.serve())
+            while not uvicorn_server.started:
+                await asyncio.sleep(0.05)
+            client_args = {"base_url": f"http://127.0.0.1:{args.port}"}
+        else:
+            client_args = {"transport": httpx.ASGITransport(app=server.app), "base_url": "http://loadtest"}
+        async with httpx.AsyncClient(timeout=args.timeout, **client_args) as client:
+            started = time.monotonic()
+            deadline = started + args.duration
+            tasks = [
+                asyncio.create_task(worker(client, endpoint, i, deadline, frames, list(labels.values()), results, random.Random(rng.random()), first_fields))
+                for endpoint in args.endpoints
+                for i in range(args.concurrency)
+            ]
+            await asyncio.gather(*tasks)
+            duration = time.monotonic() - started
+            server_stats = (await client.get("/stats")).json()
+        if args.serve:
+            uvicorn_server.should_exit = True
+            await serving
+
+    return {
+        "duration_seconds": round(duration, 2),
+        "concurrency_per_endpoint": args.concurrency,
+        "endpoints": {endpoint: summarize(results[endpoint], duration, first_fields[endpoint]) for endpoint in args.endpoints},
+        "fakes": {name: injector.stats() for name, injector in injectors.items()},
+        "server": {key: server_stats.get(key) for key in ("inference", "enrichment_jobs", "disease_info_cache", "knowledge_base", "frame_changes", "agent_pipelines", "area_cache", "weather")},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test of prediction_server with fake external services")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to drive load")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {', '.join(ENDPOINTS + STREAM_ENDPOINTS)}")
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Seconds per fake Gemini call")
+    parser.add_argument("--search-latency", type=float, default=0.4)
+    parser.add_argument("--youtube-latency", type=float, default=0.4)
+    parser.add_argument("--weather-latency", type=float, default=0.2)
+    parser.add_argument("--geocoder-latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.25, help="Latency jitter as a fraction of the mean")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability that any fake external call fails")
+    parser.add_argument("--model-batch-latency", type=float, default=0.02, help="Seconds per fake model batch")
+    parser.add_argument("--model-item-latency", type=float, default=0.005, help="Extra seconds per image in a batch")
+    parser.add_argument("--frames", type=int, default=16, help="Number of distinct camera frames uploaded")
+    parser.add_argument("--cold", action="store_true", help="Disable the disease info cache so every query runs the agent")
+    parser.add_argument("--warm", action="store_true", help="Warm the knowledge base for the current weather, so snapshots are answered from it")
+    parser.add_argument("--no-prefetch", action="store_true", help="Let the agent fetch soil type and weather through its tools")
+    parser.add_argument("--corpus", default=os.path.join("VectorDB", "processed_documents.pkl"), help="Pickled chunks used as the vector store")
+    parser.add_argument("--serve", action="store_true", help="Serve over a local socket instead of in-process (implied by streaming endpoints)")
+    parser.add_argument("--port", type=int, default=8765, help="Port used with --serve")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS + STREAM_ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    args.serve = args.serve or any(endpoint in STREAM_ENDPOINTS for endpoint in args.endpoints)
+
+    # Configure the server for an isolated, offline run before importing it
+    scratch = tempfile.mkdtemp(prefix="agriguardian-loadtest-")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-load-test")
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    os.environ["DISEASE_CACHE_PATH"] = ""
+    os.environ["AREA_CACHE_PATH"] = ""
+    os.environ["KNOWLEDGE_BASE_PATH"] = os.path.join(scratch, "knowledge_base.json")
+    os.environ["KNOWLEDGE_BASE_REFRESH_HOURS"] = "0"
+    os.environ["KNOWLEDGE_BASE_WARM_MINUTES"] = "30" if args.warm else "0"
+    if args.cold:
+        os.environ["DISEASE_CACHE_TTL_SECONDS"] = "0"
+    if args.no_prefetch:
+        os.environ["PREFETCH_LOCAL_CONDITIONS"] = "0"
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
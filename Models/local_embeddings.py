@@ -0,0 +1,52 @@
+import hashlib
+import math
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, offline stand-in for the Gemini embeddings.
+
+    Texts are tokenized into lowercase words, and unigrams and bigrams are hashed (BLAKE2b, so the result is
+    the same in every process) into a signed `dim`-dimensional bag of features with sublinear term frequency,
+    then L2-normalized. Retrieval quality is lexical rather than semantic, but it is stable across runs, which
+    is what benchmarks and load tests need.
+
+    Args:
+        dim: Vector dimension (768 matches text-embedding-004)
+    """
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+        self.model = f"local-hashing-{dim}"
+
+    def _features(self, text: str):
+        words = re.findall(r"[0-9a-z]+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed(self, text: str) -> List[float]:
+        counts = {}
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            index = value % self.dim
+            sign = 1.0 if (value >> 63) & 1 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for index, count in counts.items():
+            vector[index] = math.copysign(1.0 + math.log(abs(count)), count) if count else 0.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -1,5 +1,19 @@
-from langchain_community.vectorstores import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from local_embeddings import HashingEmbeddings
+from retrieval import CropScopedSearch
+from vector_index import NumpyVectorIndex
+
+# Labeled retrieval queries: one per classifier label with the crop folder (and, where the corpus has them,
+# the files) whose chunks answer it. Labels no file covers are "crop only" and reported separately
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_queries.json")
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "VectorDB", "processed_documents.pkl")
 
 def test_vector_db(persist_dir: str, embedding_model: str, query: str, k: int = 5):
     """
@@ -11,28 +25,157 @@ def test_vector_db(persist_dir: str, embedding_model: str, query: str, k: int =
         query (str): Text query to search for.
         k (int): Number of top results to return.
     """
-    # 1. Initialize your embedding function
-    embeddings = GoogleGenerativeAIEmbeddings(model=embedding_model)
+    # 1. Initialize your embedding function (shares the server's local embedding cache)
+    vectorstore = open_store(persist_dir, gemini_embeddings(embedding_model))
 
-    # 2. Load the persisted Chroma vector store
-    vectorstore = Chroma(
-        persist_directory=persist_dir,
-        embedding_function=embeddings
-    )
-
-    # 3. Run a similarity search
+    # 2. Run a similarity search
     docs = vectorstore.similarity_search(query, k=k)
 
-    # 4. Print out the results
+    # 3. Print out the results
     print(f"Top {k} results for query: '{query}'\n{'-'*60}")
     for i, doc in enumerate(docs, start=1):
         print(f"[{i}] Text:\n{doc.page_content}\n")
         print(f"    Metadata: {doc.metadata}\n")
 
+def gemini_embeddings(embedding_model: str):
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from embedding_cache import CachedEmbeddings
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=embedding_model), "embedding_cache.sqlite", model_name=embedding_model)
+
+def open_store(persist_dir: str, embeddings):
+    from langchain_community.vectorstores import Chroma
+    return Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+
+def load_chunks(corpus: str = None, persist_dir: str = None):
+    """
+    Load (texts, metadatas) either from a pickled list of chunks written by the old ingestion script or from
+    the documents stored in a Chroma directory.
+    """
+    if corpus:
+        with open(corpus, 'rb') as f:
+            documents = pickle.load(f)
+        return [doc.page_content for doc in documents], [doc.metadata for doc in documents]
+    records = open_store(persist_dir, None).get(include=["documents", "metadatas"])
+    return records["documents"], [m or {} for m in records["metadatas"]]
+
+def build_index(texts, metadatas, embeddings) -> NumpyVectorIndex:
+    """Embed chunks into an in-memory NumpyVectorIndex."""
+    matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32).reshape(len(texts), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    ids = [f"chunk-{i}" for i in range(len(texts))]
+    return NumpyVectorIndex(matrix, ids, list(texts), [dict(m) for m in metadatas], embedding=embeddings)
+
+def is_relevant(doc, case) -> bool:
+    """A chunk answers a query if it belongs to the expected crop and, when files are listed, to one of them."""
+    if doc.metadata.get("crop") != case["crop"]:
+        return False
+    return not case["files"] or doc.metadata.get("file") in case["files"]
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 3) if values else None
+
+def run_benchmark(vectorstore, cases, k: int = 10, scoped: bool = False, repeats: int = 1):
+    """
+    Run every labeled query and compute retrieval quality and latency.
+
+    Args:
+        vectorstore: Store to search (anything with `similarity_search`)
+        cases: Labeled queries ({"label", "query", "crop", "files"})
+        k: Number of results per query
+        scoped: Restrict each search to the expected crop like the server does (see retrieval.CropScopedSearch)
+        repeats: Times each query is timed; the best is kept for latency percentiles
+
+    Returns:
+        Summary metrics plus per-query details. Queries with expected files and crop-only queries (where any
+        chunk of the crop counts, which a crop-scoped search satisfies by construction) are also summarized
+        separately under "by_relevance"
+    """
+    searcher = CropScopedSearch()
+    latencies, hits, reciprocal_ranks, crop_precisions, details = [], [], [], [], []
+    groups = {"files": [], "crop_only": []}
+    for case in cases:
+        if case["crop"] is None:
+            # Nothing in the corpus covers this crop
+            details.append({"label": case["label"], "skipped": True})
+            continue
+
+        best = None
+        for _ in range(max(1, repeats)):
+            started = time.perf_counter()
+            docs = searcher.search(vectorstore, case["query"], k=k, crop=case["crop"] if scoped else None)
+            elapsed = (time.perf_counter() - started) * 1000.0
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+
+        first = next((rank for rank, doc in enumerate(docs, start=1) if is_relevant(doc, case)), None)
+        relevance = "files" if case["files"] else "crop_only"
+        groups[relevance].append(first)
+        hits.append(first is not None)
+        reciprocal_ranks.append(1.0 / first if first else 0.0)
+        crop_precisions.append(sum(doc.metadata.get("crop") == case["crop"] for doc in docs) / k)
+        details.append({
+            "label": case["label"],
+            "relevance": relevance,
+            "first_relevant_rank": first,
+            "crop_precision": round(crop_precisions[-1], 3),
+            "latency_ms": round(best, 3),
+        })
+
+    return {
+        "k": k,
+        "scoped": scoped,
+        "queries": len(latencies),
+        "skipped": len(cases) - len(latencies),
+        f"recall_at_{k}": round(float(np.mean(hits)), 4) if hits else None,
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4) if reciprocal_ranks else None,
+        f"crop_precision_at_{k}": round(float(np.mean(crop_precisions)), 4) if crop_precisions else None,
+        "by_relevance": {
+            relevance: {
+                "queries": len(ranks),
+                f"recall_at_{k}": round(float(np.mean([rank is not None for rank in ranks])), 4) if ranks else None,
+                "mrr": round(float(np.mean([1.0 / rank if rank else 0.0 for rank in ranks])), 4) if ranks else None,
+            }
+            for relevance, ranks in groups.items()
+        },
+        "latency_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95), "p99": percentile(latencies, 99)},
+        "details": details,
+    }
+
 if __name__ == "__main__":
-    # Adjust these paths/values to match your environment
-    PERSIST_DIR = "agriculture_vector_db"   # same as VECTOR_DB_DIR
-    EMBEDDING_MODEL = "models/text-embedding-004"
-    TEST_QUERY = "early blight treatment in potatoes"
+    parser = argparse.ArgumentParser(description="Retrieval benchmark: recall@k, MRR and latency over labeled queries")
+    parser.add_argument("--persist-dir", default=os.getenv("VECTOR_DB_DIR", "agriculture_vector_db"), help="Chroma persistence directory")
+    parser.add_argument("--corpus", help=f"Pickled chunks to index instead of the Chroma store's documents (e.g. {DEFAULT_CORPUS})")
+    parser.add_argument("--embeddings", choices=["local", "gemini"], default="local",
+                        help="local: deterministic offline embeddings, chunks re-embedded in memory; gemini: search the persisted store as is")
+    parser.add_argument("--embedding-model", default=os.getenv("EMBEDDING_MODEL", "models/text-embedding-004"))
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Labeled query set (JSON)")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--scoped", action="store_true", help="Restrict searches to the expected crop")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--query", help="Just print the top results for one query (the previous behaviour of this script)")
+    args = parser.parse_args()
+
+    if args.query:
+        test_vector_db(args.persist_dir, args.embedding_model, args.query, k=args.k)
+        raise SystemExit(0)
+
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+
+    started = time.perf_counter()
+    if args.embeddings == "local":
+        texts, metadatas = load_chunks(args.corpus, args.persist_dir)
+        vectorstore = build_index(texts, metadatas, HashingEmbeddings())
+    else:
+        vectorstore = open_store(args.persist_dir, gemini_embeddings(args.embedding_model))
+    setup_seconds = round(time.perf_counter() - started, 2)
 
-    test_vector_db(PERSIST_DIR, EMBEDDING_MODEL, TEST_QUERY, k=5)
+    results = run_benchmark(vectorstore, cases, k=args.k, scoped=args.scoped, repeats=args.repeats)
+    results.update({"embeddings": args.embeddings, "corpus": args.corpus or args.persist_dir, "setup_seconds": setup_seconds})
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
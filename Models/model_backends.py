@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+MODEL_BACKENDS = ("keras", "tflite")
+
+
+def _tflite_interpreter_class():
+    """
+    Return the TFLite Interpreter class, preferring the standalone runtimes (ai-edge-litert, or the older
+    tflite-runtime; a few MB and no TensorFlow import) and falling back to the copy bundled with TensorFlow.
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class KerasBackend:
+    """
+    The disease classifier as a Keras model (.h5 or SavedModel), run through TensorFlow.
+
+    Args:
+        path: Path of the saved Keras model
+    """
+
+    name = "keras"
+
+    def __init__(self, path: str):
+        import tensorflow as tf
+        self.path = path
+        started = time.perf_counter()
+        self.model = tf.keras.models.load_model(path, compile=False)
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "load_seconds": self.load_seconds,
+        }
+
+
+class TFLiteBackend:
+    """
+    The disease classifier as a TFLite flatbuffer (float32, float16 or int8 quantized), run through the
+    TFLite interpreter on CPU.
+
+    The interpreter keeps its tensors between calls, so the input is only resized (and the tensors
+    reallocated) when the batch size changes; the batching engine mostly sends a handful of sizes. Models
+    converted with integer inputs or outputs are quantized and dequantized here with the tensor's scale and
+    zero point, so callers always pass and get back float32 like with the Keras model.
+
+    An interpreter is not thread-safe, so calls are serialized with a lock; the batching engine only runs
+    one batch at a time anyway, and `num_threads` is what parallelizes a single batch.
+
+    Args:
+        path: Path of the .tflite model
+        num_threads: Interpreter threads (None or -1 lets TFLite decide)
+    """
+
+    name = "tflite"
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        if num_threads is not None and num_threads < 1:
+            num_threads = None
+        self.path = path
+        self.num_threads = num_threads
+        started = time.perf_counter()
+        Interpreter = _tflite_interpreter_class()
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+        self.resizes = 0
+
+    @property
+    def input_dtype(self) -> str:
+        return np.dtype(self._input["dtype"]).name
+
+    def _resize(self, batch_size: int):
+        shape = list(self._input["shape"])
+        shape[0] = batch_size
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        # Resizing may change the details (shape, and the index on some versions)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+        self.resizes += 1
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._resize(batch.shape[0])
+
+            dtype = self._input["dtype"]
+            if np.issubdtype(dtype, np.integer):
+                scale, zero_point = self._input["quantization"]
+                info = np.iinfo(dtype)
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+            self.interpreter.set_tensor(self._input["index"], batch.astype(dtype))
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output["index"])
+
+            if np.issubdtype(output.dtype, np.integer):
+                scale, zero_point = self._output["quantization"]
+                output = (output.astype(np.float32) - zero_point) * scale
+            return output.copy()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "num_threads": self.num_threads,
+            "input_dtype": self.input_dtype,
+            "load_seconds": self.load_seconds,
+            "resizes": self.resizes,
+        }
+
+
+def load_model_backend(backend: str, path: str, num_threads: Optional[int] = None):
+    """
+    Load the disease classifier with the given backend.
+
+    Args:
+        backend: "keras" or "tflite"
+        path: Model file for that backend (.h5 for Keras, .tflite for TFLite)
+        num_threads: Interpreter threads for the TFLite backend
+
+    Returns:
+        A backend exposing `predict_on_batch` and `stats`
+
+    Raises:
+        ValueError: If the backend is unknown
+        FileNotFoundError: If the model file does not exist
+    """
+    backend = backend.lower()
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r}, expected one of {', '.join(MODEL_BACKENDS)}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file not found: {path}")
+    if backend == "tflite":
+        return TFLiteBackend(path, num_threads=num_threads)
+    return KerasBackend(path)
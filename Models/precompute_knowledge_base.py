@@ -0,0 +1,35 @@
+import argparse
+import asyncio
+import json
+import logging
+
+from knowledge_base import QUERY_TYPES, precompute
+from prediction_server import knowledge_base, labels, precompute_disease_info
+
+def main():
+    """
+    Precompute disease analyses for every classifier label and query type and store them in the
+    knowledge base artifact loaded by prediction_server at startup. These general entries are generated
+    without the soil type or weather of the machine running the script. By default only missing or stale
+    entries are regenerated, so the same command works as a scheduled refresh (e.g. from cron).
+    """
+    parser = argparse.ArgumentParser(description="Precompute the AgriGuardian disease knowledge base")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of analyses generated at once")
+    parser.add_argument("--force", action="store_true", help="Regenerate every entry, not only stale ones")
+    parser.add_argument("--query-types", nargs="+", default=QUERY_TYPES, help="Query types to precompute")
+    args = parser.parse_args()
+
+    summary = asyncio.run(precompute(
+        knowledge_base,
+        precompute_disease_info,
+        labels.values(),
+        query_types=args.query_types,
+        concurrency=args.concurrency,
+        only_stale=not args.force
+    ))
+    print(json.dumps(summary, indent=2))
+    print(f"Knowledge base stored in {knowledge_base.path}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
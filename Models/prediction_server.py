@@ -1,23 +1,26 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
 import uvicorn
 import numpy as np
-from PIL import Image
-import io
-import base64
 import datetime
 import json
-import tensorflow as tf
+import time
+from contextlib import asynccontextmanager
 import os
 import logging
+import asyncio
+import functools
+import math
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import geocoder
 import openmeteo_requests
 import pandas as pd
-import requests_cache
 from retry_requests import retry
 # Fix imports for LangChain components
 from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
@@ -29,9 +32,25 @@ load_dotenv()
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_chroma import Chroma  # Updated import for Chroma
 from langchain.tools.retriever import create_retriever_tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor, Tool
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains.conversation.memory import ConversationBufferMemory
+from langchain.agents import Tool
+
+from inference import BatchInferenceEngine
+from jobs import JobQueue, JobQueueFull
+from cache import TTLCache
+from knowledge_base import KnowledgeBase, KNOWLEDGE_BASE_FORMAT, precompute
+from startup import ResourceRegistry, ResourceNotReady
+from snapshot_store import SnapshotStore
+from image_processing import decode_for_model, difference_hash, FrameChangeDetector
+from embedding_cache import CachedEmbeddings
+from vector_index import NumpyVectorIndex, INDEX_MANIFEST_FILE
+from retrieval import CropScopedSearch, crop_for_label
+from disease_labels import labels
+from agent_pipeline import AgentPipeline, PipelineRegistry
+from area_cache import AreaLookupCache, geohash
+from weather import WeatherService
+from streaming import format_sse
+from session_memory import SessionMemoryStore, render_history, process_memory
+from model_backends import load_model_backend
 
 # Set up logging for debugging
 logging.basicConfig(level=logging.INFO)
@@ -39,104 +58,196 @@ logging.basicConfig(level=logging.INFO)
 # Load configuration from environment variables with defaults
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
 VECTOR_DB_DIR = os.getenv("VECTOR_DB_DIR", "vector_db")  
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()  # "numpy" serves retrieval from the exported in-process index
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")  # in-memory search dtype; empty searches the stored matrix as is
 LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.0-flash")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.3"))
+PREFETCH_LOCAL_CONDITIONS = os.getenv("PREFETCH_LOCAL_CONDITIONS", "1").lower() in ("1", "true", "yes")  # fetch soil/weather before the agent runs
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "0").lower() in ("1", "true", "yes")  # print agent traces (debugging only)
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+ENRICHMENT_CONCURRENCY = int(os.getenv("ENRICHMENT_CONCURRENCY", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+ENRICHMENT_MAX_QUEUED = int(os.getenv("ENRICHMENT_MAX_QUEUED", "100"))  # snapshots beyond this are not enriched
+DISEASE_CACHE_MAX_ENTRIES = int(os.getenv("DISEASE_CACHE_MAX_ENTRIES", "512"))
+DISEASE_CACHE_TTL_SECONDS = float(os.getenv("DISEASE_CACHE_TTL_SECONDS", "21600"))
+DISEASE_CACHE_PATH = os.getenv("DISEASE_CACHE_PATH", "")  # empty keeps the cache in memory only
+DISEASE_CACHE_TEMPERATURE_BUCKET = float(os.getenv("DISEASE_CACHE_TEMPERATURE_BUCKET", "2"))
+DISEASE_CACHE_HUMIDITY_BUCKET = float(os.getenv("DISEASE_CACHE_HUMIDITY_BUCKET", "10"))
+KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH", "knowledge_base.json")
+KNOWLEDGE_BASE_MAX_AGE_HOURS = float(os.getenv("KNOWLEDGE_BASE_MAX_AGE_HOURS", "168"))
+KNOWLEDGE_BASE_REFRESH_HOURS = float(os.getenv("KNOWLEDGE_BASE_REFRESH_HOURS", "0"))  # 0 disables the in-process refresh
+KNOWLEDGE_BASE_CONCURRENCY = int(os.getenv("KNOWLEDGE_BASE_CONCURRENCY", "2"))
+KNOWLEDGE_BASE_WARM_MINUTES = float(os.getenv("KNOWLEDGE_BASE_WARM_MINUTES", "30"))  # how often snapshot analyses for the current weather are warmed, 0 disables
+MODEL_PATH = os.getenv("MODEL_PATH", "disease_classification_model.h5")
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "keras").lower()  # "keras" or "tflite"
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + "_int8.tflite")
+TFLITE_THREADS = int(os.getenv("TFLITE_THREADS", "-1"))  # -1 lets TFLite decide
+LOCATION_TIMEOUT = float(os.getenv("LOCATION_TIMEOUT", "10"))
+LOCATION_RETRY_SECONDS = float(os.getenv("LOCATION_RETRY_SECONDS", "600"))  # how long the default location is used after a failed IP lookup
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "15"))
+WEATHER_REFRESH_MINUTES = float(os.getenv("WEATHER_REFRESH_MINUTES", "15"))  # 0 disables the background refresh
+WEATHER_MAX_AGE_MINUTES = float(os.getenv("WEATHER_MAX_AGE_MINUTES", "60"))  # older readings are reported as stale
+WEATHER_BATCH_SIZE = int(os.getenv("WEATHER_BATCH_SIZE", "50"))  # locations per Open-Meteo request
+SNAPSHOT_HISTORY_PER_DEVICE = int(os.getenv("SNAPSHOT_HISTORY_PER_DEVICE", "10"))
+SNAPSHOT_STORE_MAX_MB = float(os.getenv("SNAPSHOT_STORE_MAX_MB", "64"))
+DEFAULT_DEVICE_ID = os.getenv("DEFAULT_DEVICE_ID", "default")
+LONG_POLL_TIMEOUT = float(os.getenv("LONG_POLL_TIMEOUT", "25"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+FRAME_CHANGE_THRESHOLD = int(os.getenv("FRAME_CHANGE_THRESHOLD", "4"))  # max differing hash bits for an unchanged frame, negative disables
+FRAME_CHANGE_MAX_AGE_SECONDS = float(os.getenv("FRAME_CHANGE_MAX_AGE_SECONDS", "3600"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+VECTOR_SEARCH_K = int(os.getenv("VECTOR_SEARCH_K", "10"))  # chunks put into the prompt context
+RETRIEVER_TOOL_K = int(os.getenv("RETRIEVER_TOOL_K", "4"))  # chunks returned per agent retriever call
+CROP_SCOPE_MIN_RESULTS = int(os.getenv("CROP_SCOPE_MIN_RESULTS", "4"))  # fewer crop chunks than this falls back to global search
+SESSION_MEMORY_WINDOW = int(os.getenv("SESSION_MEMORY_WINDOW", "10"))  # exchanges remembered per session
+SESSION_MEMORY_IDLE_MINUTES = float(os.getenv("SESSION_MEMORY_IDLE_MINUTES", "30"))
+SESSION_MEMORY_MAX_SESSIONS = int(os.getenv("SESSION_MEMORY_MAX_SESSIONS", "1000"))
+SESSION_MEMORY_MAX_MB = float(os.getenv("SESSION_MEMORY_MAX_MB", "16"))
+SESSION_MEMORY_PROMPT_CHARS = int(os.getenv("SESSION_MEMORY_PROMPT_CHARS", "6000"))  # earlier exchanges put into a follow-up prompt (about 1500 tokens)
+AREA_CACHE_PATH = os.getenv("AREA_CACHE_PATH", "area_cache.sqlite")  # empty keeps reverse geocoding and soil lookups in memory only
+AREA_CACHE_TTL_HOURS = float(os.getenv("AREA_CACHE_TTL_HOURS", "720"))  # older entries are served while being refreshed
+AREA_CACHE_RETRY_SECONDS = float(os.getenv("AREA_CACHE_RETRY_SECONDS", "600"))  # how long an empty lookup is reused before retrying
+AREA_GEOHASH_PRECISION = int(os.getenv("AREA_GEOHASH_PRECISION", "5"))  # geohash cell (about 5 km) sharing one reverse geocode
+
+# Fallbacks used when location or weather cannot be fetched (e.g. no network)
+DEFAULT_LOCATION = [40.7128, -74.0060]  # New York
+DEFAULT_WEATHER = {'temperature': 25.0, 'humidity': 60.0, 'precipitation': 0.0, 'wind_speed': 5.0}
+
+# Bounded pools that keep blocking work off the event loop:
+# CPU-bound image decoding and model inference (TensorFlow releases the GIL while it runs)
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+# I/O-bound vector search, web search and geolocation calls
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+async def run_in_pool(executor, func, *args, **kwargs):
+    """
+    Run a blocking function in the given executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+def async_tool(func):
+    """
+    Wrap a blocking tool function so the agent's async path runs it in the I/O pool.
+    """
+    async def wrapper(*args, **kwargs):
+        return await run_in_pool(io_executor, func, *args, **kwargs)
+    return wrapper
+
+# The server's IP location, looked up once per process
+server_location = None
+server_location_failed_at = None  # time of the last failed lookup
+server_location_lock = threading.Lock()
 
 def get_current_location():
-    try:
-        g = geocoder.ip('me')
-        if not g.ok or not g.latlng:
-            raise Exception("Could not determine current location")
-        return g.latlng
-    except Exception as e:
-        logging.error(f"Location error: {e}")
-        # Return a default location
-        return [40.7128, -74.0060]  # New York
+    """
+    Return the server's location from its IP address. The lookup is done once per process; if it fails the
+    default location is returned, and only after LOCATION_RETRY_SECONDS is the lookup tried again, so an
+    offline server does not wait for the IP lookup's timeout on every soil and weather prefetch.
+    """
+    global server_location, server_location_failed_at
+    if server_location is not None:
+        return list(server_location)
+    with server_location_lock:
+        if server_location is None:
+            if server_location_failed_at is not None and time.time() - server_location_failed_at < LOCATION_RETRY_SECONDS:
+                return list(DEFAULT_LOCATION)
+            try:
+                g = geocoder.ip('me')
+                if not g.ok or not g.latlng:
+                    raise Exception("Could not determine current location")
+                server_location = list(g.latlng)
+            except Exception as e:
+                logging.error(f"Location error: {e}, using the default location for {LOCATION_RETRY_SECONDS:.0f}s")
+                server_location_failed_at = time.time()
+                # Return a default location
+                return list(DEFAULT_LOCATION)
+    return list(server_location)
 
-# Get current location
-location = get_current_location()
-if location:
+def load_location():
+    """
+    Resolve the server's location once at startup.
+    """
+    location = get_current_location()
     print(f"Latitude: {location[0]}, Longitude: {location[1]}")
-else:
-    print("Unable to determine the location.")
-    # Fallback coordinates (example: New York City)
-    location = [40.7128, -74.0060]
-
-# Set up caching and retry mechanisms for weather data requests
-cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-openmeteo = openmeteo_requests.Client(session=retry_session)
-
-# Define weather API parameters
-url = "https://api.open-meteo.com/v1/forecast"
-params = {
-    "latitude": location[0],
-    "longitude": location[1],
-    "current_weather": True,
-    "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "wind_speed_10m"]
-}
+    return location
 
-# Fetch weather data
-try:
-    responses = openmeteo.weather_api(url, params=params)
-    response = responses[0]
-
-    # Extract current weather variables
-    current = response.Current()
-    current_temperature_2m = current.Variables(0).Value()
-    current_relative_humidity_2m = current.Variables(1).Value()
-    current_precipitation = current.Variables(2).Value()
-    current_wind_speed_10m = current.Variables(3).Value()
-except Exception as e:
-    print(f"Error fetching weather data: {e}")
-    # Fallback weather values
-    current_temperature_2m = 25.0
-    current_relative_humidity_2m = 60.0
-    current_precipitation = 0.0
-    current_wind_speed_10m = 5.0
-    
-cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+# Retry transient Open-Meteo errors; readings are cached by the weather service, not the HTTP session
+retry_session = retry(retries=5, backoff_factor=0.2)
 weather_client = openmeteo_requests.Client(session=retry_session)
 
+# Current weather per location, refreshed in the background so requests read it from memory
+weather_service = WeatherService(
+    weather_client,
+    DEFAULT_WEATHER,
+    refresh_seconds=WEATHER_REFRESH_MINUTES * 60,
+    max_age_seconds=WEATHER_MAX_AGE_MINUTES * 60,
+    batch_size=WEATHER_BATCH_SIZE
+)
+
+def load_weather(location):
+    """
+    Start tracking the server's location and fetch its first reading, used as the environmental conditions of analyses.
+    """
+    weather_service.track(*location)
+    weather_service.refresh()
+    return weather_service
+
+async def current_conditions() -> Dict[str, float]:
+    """
+    Current weather at the server's location, read from the weather service.
+    """
+    service = await resources.get("weather")
+    location = await resources.get("location")
+    return service.conditions(*location)
+
 def get_weather_for_my_area(_: str) -> str:
     coords = get_current_location()
-    lat, lon = coords
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "current_weather": True,
-        "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "wind_speed_10m"]
-    }
-    try:
-        response = weather_client.weather_api(url, params=params)[0]
-        curr = response.Current()
-        data = {
-            "temperature": curr.Variables(0).Value(),
-            "humidity": curr.Variables(1).Value(),
-            "precipitation": curr.Variables(2).Value(),
-            "wind_speed": curr.Variables(3).Value()
-        }
-    except Exception as e:
-        logging.error(f"Weather fetch error: {e}")
+    reading = weather_service.reading(*coords)
+    if reading["source"] == "default":
         data = {"temperature": None, "humidity": None, "precipitation": None, "wind_speed": None}
+    else:
+        data = dict(reading["values"])
+        data["observed_minutes_ago"] = round(reading["age_seconds"] / 60)
     return json.dumps(data)
 
-app = FastAPI()
+# Initialize embeddings, caching query vectors locally so repeated query templates skip the remote call
+embeddings = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+    EMBEDDING_CACHE_PATH,
+    model_name=EMBEDDING_MODEL,
+    max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+)
 
-# Make sure the vector db directory exists
-os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+def load_vectorstore():
+    """
+    Open the vector store used for retrieval.
 
-# Initialize embeddings
-embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    With VECTOR_BACKEND=numpy the exported NumpyVectorIndex in VECTOR_INDEX_DIR is used; otherwise (or if the
+    index is missing) the persisted Chroma store is opened, recreating it (or falling back to memory) if it
+    cannot be loaded.
+    """
+    if VECTOR_BACKEND == "numpy":
+        if os.path.exists(os.path.join(VECTOR_INDEX_DIR, INDEX_MANIFEST_FILE)):
+            try:
+                return NumpyVectorIndex.load(VECTOR_INDEX_DIR, embeddings, dtype=VECTOR_INDEX_DTYPE or None)
+            except Exception as e:
+                logging.error(f"Error loading vector index from {VECTOR_INDEX_DIR}: {e}")
+        else:
+            logging.error(f"No vector index in {VECTOR_INDEX_DIR} (run vector_index.py to export it), using Chroma")
 
-try:
-    # Try to initialize the vector store
-    vectorstore = Chroma(persist_directory=VECTOR_DB_DIR, embedding_function=embeddings)
-    retriever = vectorstore.as_retriever(k=10)
-except Exception as e:
-    logging.error(f"Error initializing vector store: {e}")
+    # Make sure the vector db directory exists
+    os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+    try:
+        # Try to initialize the vector store
+        return Chroma(persist_directory=VECTOR_DB_DIR, embedding_function=embeddings)
+    except Exception as e:
+        logging.error(f"Error initializing vector store: {e}")
     # Create a new empty vector store if loading fails
     try:
         # Delete the directory and recreate it
@@ -144,20 +255,25 @@ except Exception as e:
         if os.path.exists(VECTOR_DB_DIR):
             shutil.rmtree(VECTOR_DB_DIR)
         os.makedirs(VECTOR_DB_DIR, exist_ok=True)
-        vectorstore = Chroma(persist_directory=VECTOR_DB_DIR, embedding_function=embeddings)
-        retriever = vectorstore.as_retriever(k=10)
+        return Chroma(persist_directory=VECTOR_DB_DIR, embedding_function=embeddings)
     except Exception as inner_e:
         logging.error(f"Failed to create new vector store: {inner_e}")
         # Fallback with in-memory vector store
-        vectorstore = Chroma(embedding_function=embeddings)
-        retriever = vectorstore.as_retriever(k=10)
-
-# Create a retriever tool for agricultural content from the vector database
-retriever_tool = create_retriever_tool(
-    retriever,
-    "agriculture_search",
-    "Search for agricultural content, crop diseases, treatments, and fertilizers from the Chroma database."
-)
+        return Chroma(embedding_function=embeddings)
+
+def load_retriever_tool(vectorstore, crop: Optional[str] = None):
+    """
+    Create a retriever tool for agricultural content from the vector database, optionally restricted to one crop's chunks.
+    """
+    search_kwargs = {"k": RETRIEVER_TOOL_K}
+    if crop:
+        search_kwargs["filter"] = {"crop": crop}
+    retriever = vectorstore.as_retriever(search_kwargs=search_kwargs)
+    return create_retriever_tool(
+        retriever,
+        "agriculture_search",
+        "Search for agricultural content, crop diseases, treatments, and fertilizers from the Chroma database."
+    )
 
 # Initialize DuckDuckGo search tool for web searches
 search = DuckDuckGoSearchAPIWrapper(max_results=10)
@@ -174,85 +290,184 @@ youtube = CustomYouTubeSearchTool()
 # Initialize the language model for the agent
 llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=TEMPERATURE)
 
-# Initialize in-memory conversation memory for context in follow-up queries
-memory = ConversationBufferMemory(return_messages=True)
-
-# Load disease recognition model
-try:
-    disease_model = tf.keras.models.load_model('disease_classification_model.h5')
-except Exception as e:
-    logging.error(f"Error loading disease classification model: {e}")
-    # Create a placeholder model that returns random predictions
-    class PlaceholderModel:
-        def predict(self, x):
-            # Return random predictions for demonstration
-            batch_size = x.shape[0]
-            return [np.random.random(38) for _ in range(batch_size)]
-    disease_model = PlaceholderModel()
-
-# Disease class labels for the classification model
-labels = {
-    0: 'Apple Scab',
-    1: 'Apple Black Rot',
-    2: 'Cedar Apple Rust',
-    3: 'Healthy Apple',
-    4: 'Healthy Blueberry',
-    5: 'Cherry Powdery Mildew',
-    6: 'Healthy Cherry',
-    7: 'Corn Cercospora Leaf Spot',
-    8: 'Maize Common Rust',
-    9: 'Corn Northern Leaf Blight',
-    10: 'Healthy Corn',
-    11: 'Grape Black Rot',
-    12: 'Grape Black Measles',
-    13: 'Grape Leaf Blight',
-    14: 'Healthy Grape',
-    15: 'Orange Citrus Greening',
-    16: 'Peach Bacterial Spot',
-    17: 'Healthy Peach',
-    18: 'Pepper Bell Bacterial Spot',
-    19: 'Healthy Pepper Bell',
-    20: 'Potato Early Blight',
-    21: 'Potato Late Blight',
-    22: 'Healthy Potato',
-    23: 'Healthy Raspberry',
-    24: 'Healthy Soybean',
-    25: 'Squash Powdery Mildew',
-    26: 'Strawberry Leaf Scorch',
-    27: 'Healthy Strawberry',
-    28: 'Tomato Bacterial Spot',
-    29: 'Tomato Early Blight',
-    30: 'Tomato Late Blight',
-    31: 'Tomato Leaf Mold',
-    32: 'Tomato Septoria Leaf Spot',
-    33: 'Tomato Spider Mites',
-    34: 'Tomato Target Spot',
-    35: 'Tomato Yellow Leaf Curl Virus',
-    36: 'Tomato Mosaic Virus',
-    37: 'Healthy Tomato'
+# Conversation memory for follow-up questions, per client or device and bounded in size
+session_memory = SessionMemoryStore(
+    window=SESSION_MEMORY_WINDOW,
+    idle_seconds=SESSION_MEMORY_IDLE_MINUTES * 60,
+    max_sessions=SESSION_MEMORY_MAX_SESSIONS,
+    max_bytes=int(SESSION_MEMORY_MAX_MB * 1024 * 1024)
+)
+
+# Placeholder model that returns random predictions when the real model cannot be loaded
+class PlaceholderModel:
+    def predict(self, x):
+        # Return random predictions for demonstration
+        batch_size = x.shape[0]
+        return [np.random.random(38) for _ in range(batch_size)]
+
+# Gather concurrent snapshots into batches so the model is called once per batch, not once per camera
+inference_engine = BatchInferenceEngine(
+    None,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    executor=inference_executor
+)
+
+def load_disease_model():
+    """
+    Load the disease recognition model with the configured backend (Keras, or a TFLite conversion made by
+    convert_tflite.py) and hand it to the inference engine.
+    TensorFlow is imported here so importing this module does not pay for it.
+    """
+    path = TFLITE_MODEL_PATH if MODEL_BACKEND == "tflite" else MODEL_PATH
+    try:
+        disease_model = load_model_backend(MODEL_BACKEND, path, num_threads=TFLITE_THREADS)
+        logging.info(f"Loaded disease classification model {path} with the {MODEL_BACKEND} backend")
+    except Exception as e:
+        logging.error(f"Error loading disease classification model: {e}")
+        disease_model = PlaceholderModel()
+    inference_engine.model = disease_model
+    return disease_model
+
+# Heavy resources are loaded concurrently in the background once the app starts (see lifespan),
+# or lazily by the first request that needs them
+resources = ResourceRegistry()
+resources.register("location", load_location, fallback=DEFAULT_LOCATION, timeout=LOCATION_TIMEOUT, executor=io_executor)
+# The weather service falls back to DEFAULT_WEATHER for a location until its first successful fetch
+resources.register("weather", load_weather, depends_on=["location"], fallback=weather_service, timeout=WEATHER_TIMEOUT, executor=io_executor)
+resources.register("vectorstore", load_vectorstore, executor=io_executor)
+resources.register("retriever_tool", load_retriever_tool, depends_on=["vectorstore"], executor=io_executor)
+resources.register("disease_model", load_disease_model, executor=inference_executor)
+
+# Long-running background tasks (references kept so they are not garbage collected)
+background_tasks = []
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start heavy resources concurrently in the background so the server accepts requests immediately,
+    and stop background workers on shutdown. Readiness is reported by /ready.
+    """
+    started = time.perf_counter()
+    resources.start()
+    await inference_engine.start()
+    await enrichment_jobs.start()
+    if KNOWLEDGE_BASE_REFRESH_HOURS > 0:
+        background_tasks.append(asyncio.create_task(refresh_knowledge_base()))
+    if KNOWLEDGE_BASE_WARM_MINUTES > 0:
+        background_tasks.append(asyncio.create_task(warm_knowledge_base()))
+    if WEATHER_REFRESH_MINUTES > 0:
+        background_tasks.append(asyncio.create_task(weather_service.run(io_executor)))
+    logging.info(f"Accepting requests {time.perf_counter() - started:.3f}s after startup began; resources loading in background")
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await enrichment_jobs.stop()
+    await inference_engine.stop()
+    await resources.stop()
+    io_executor.shutdown(wait=False)
+    inference_executor.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan)
+
+# In-memory store for the latest market insights
+tmp_store = {'market_insights': None}
+
+# Per-device history of analysed snapshots (raw image bytes + prediction) under a global memory budget
+snapshot_store = SnapshotStore(
+    history_per_device=SNAPSHOT_HISTORY_PER_DEVICE,
+    max_bytes=int(SNAPSHOT_STORE_MAX_MB * 1024 * 1024)
+)
+
+# Skips re-analysis of camera frames that look the same as the device's previous frame
+frame_detector = FrameChangeDetector(threshold=FRAME_CHANGE_THRESHOLD, max_age_seconds=FRAME_CHANGE_MAX_AGE_SECONDS)
+
+def get_device_id(request: Request) -> str:
+    """
+    Identify the camera a request belongs to, from the X-Device-Id header or the `device` query parameter.
+    """
+    return request.headers.get("X-Device-Id") or request.query_params.get("device") or DEFAULT_DEVICE_ID
+
+def get_session_id(request: Request, device_id: Optional[str] = None) -> str:
+    """
+    Identify the conversation a request belongs to, from the X-Session-Id header, else the device, else the client address.
+    """
+    if request.headers.get("X-Session-Id"):
+        return request.headers["X-Session-Id"]
+    if device_id or request.headers.get("X-Device-Id"):
+        return device_id or request.headers["X-Device-Id"]
+    return request.client.host if request.client else DEFAULT_DEVICE_ID
+
+# Background queue for LLM enrichment so /snapshot returns as soon as the classification is known
+enrichment_jobs = JobQueue(concurrency=ENRICHMENT_CONCURRENCY, retention_seconds=JOB_RETENTION_SECONDS, max_queued=ENRICHMENT_MAX_QUEUED)
+
+# Cache of generated disease information keyed on disease, query type and bucketed weather
+disease_info_cache = TTLCache(
+    max_entries=DISEASE_CACHE_MAX_ENTRIES,
+    ttl_seconds=DISEASE_CACHE_TTL_SECONDS,
+    persist_path=DISEASE_CACHE_PATH,
+    name="disease_info"
+)
+# Analyses currently being generated, so concurrent misses for the same key share one agent run
+disease_info_in_flight = {}
+
+# Granularity used to bucket environmental conditions in cache keys
+condition_buckets = {
+    'temperature': DISEASE_CACHE_TEMPERATURE_BUCKET,
+    'humidity': DISEASE_CACHE_HUMIDITY_BUCKET,
+    'precipitation': 1.0,
+    'wind_speed': 5.0
 }
 
-# In-memory store for latest results (image, prediction)
-tmp_store = {'image_data': None, 'prediction': None, 'market_insights': None}
+# Query type of the analysis generated for every snapshot
+SNAPSHOT_QUERY_TYPE = "all"
+
+# Precomputed analyses for every label, generated by precompute_knowledge_base.py
+knowledge_base = KnowledgeBase(
+    KNOWLEDGE_BASE_PATH,
+    version=f"{KNOWLEDGE_BASE_FORMAT}:{LLM_MODEL}:{EMBEDDING_MODEL}",
+    max_age_seconds=KNOWLEDGE_BASE_MAX_AGE_HOURS * 3600
+).load()
 
 # Define API request model for disease queries
 class DiseaseQueryRequest(BaseModel):
     disease_name: str
     query_type: str = "all"  # "about", "causes", "treatment", or "all"
     environmental_conditions: Optional[Dict[str, float]] = None
+    device_id: Optional[str] = None  # device whose latest snapshot should be updated (most recent of any device if omitted)
+    follow_up: Optional[str] = None  # question answered in the context of the session's earlier exchanges
 
 # Reverse-geocode to find city
 geolocator = Nominatim(user_agent="langchain_location_tool")
 
+# Cities by geohash cell and soil search results by city. Neither changes between requests, so after the
+# first lookup for an area they are local reads (expired entries are refreshed in the background). Empty
+# results are only reused for AREA_CACHE_RETRY_SECONDS, so a transient miss is not served for a month
+area_cache = AreaLookupCache(
+    ttl_seconds=AREA_CACHE_TTL_HOURS * 3600,
+    persist_path=AREA_CACHE_PATH,
+    executor=io_executor,
+    negative_ttl_seconds=AREA_CACHE_RETRY_SECONDS
+)
+
+UNKNOWN_CITY = "Unknown"
+NO_SEARCH_RESULT = "No good DuckDuckGo Search Result was found"  # what DuckDuckGoSearchAPIWrapper.run returns for no results
+
+def reverse_geocode_city(coords):
+    location = geolocator.reverse(coords, language='en')
+    if not location or 'address' not in location.raw:
+        raise Exception(f"Could not reverse geocode coords: {coords}")
+    address = location.raw['address']
+    # Try to pick city or town or village
+    city = address.get('city') or address.get('town') or address.get('village')
+    return city or address.get('state') or UNKNOWN_CITY
+
 def get_city_from_coords(coords):
     try:
-        location = geolocator.reverse(coords, language='en')
-        if not location or 'address' not in location.raw:
-            raise Exception(f"Could not reverse geocode coords: {coords}")
-        address = location.raw['address']
-        # Try to pick city or town or village
-        city = address.get('city') or address.get('town') or address.get('village')
-        return city or address.get('state') or 'Unknown'
+        cell = geohash(coords[0], coords[1], AREA_GEOHASH_PRECISION)
+        return area_cache.get_or_fetch(
+            f"city:{cell}", lambda: reverse_geocode_city(coords), is_valid=lambda city: city != UNKNOWN_CITY
+        )
     except Exception as e:
         logging.error(f"Geocoding error: {e}")
         return "Unknown City"
@@ -264,12 +479,243 @@ def get_soil_type_for_my_area(_: str) -> str:
         coords = get_current_location()
         city = get_city_from_coords(coords)
         query = f"soil type in {city}"
-        results = search.run(query)
+        if city in ("Unknown City", UNKNOWN_CITY):
+            results = search.run(query)
+        else:
+            results = area_cache.get_or_fetch(
+                f"soil:{city.lower()}", lambda: search.run(query),
+                is_valid=lambda found: bool(found) and not found.startswith(NO_SEARCH_RESULT)
+            )
         return f"City: {city}\nSearch Query: {query}\nResults:\n{results}"
     except Exception as e:
         logging.error(f"Soil type search error: {e}")
         return "Unable to determine soil type information at this time."
 
+# Retrieval scoped to the crop of the predicted label, falling back to the whole collection for thin partitions
+crop_search = CropScopedSearch(min_results=CROP_SCOPE_MIN_RESULTS)
+crop_retriever_tools = {}
+
+async def get_retriever_tool(crop: Optional[str] = None):
+    """
+    Return the agent's retriever tool, restricted to `crop` when that crop's partition is used on its own.
+    """
+    if not crop_search.is_scoped(crop):
+        return await resources.get("retriever_tool")
+    if crop not in crop_retriever_tools:
+        crop_retriever_tools[crop] = load_retriever_tool(await resources.get("vectorstore"), crop)
+    return crop_retriever_tools[crop]
+
+# System prompts of the two agent pipelines; {agent_scratchpad} receives the retrieved vector context and
+# {local_conditions} the prefetched soil type and weather (see prefetch_local_conditions)
+DISEASE_SYSTEM_PROMPT = (
+    "You are a helpful AI agriculture assistant named AgriGuardian. You help farmers and agricultural "
+    "professionals understand crop diseases, their causes, and treatment plans as well as providing "
+    "agricultural recommendations based on environmental conditions and disease information. "
+    "\n\n"
+    "When asked about a crop disease, search your knowledge base for the most relevant content and resources. "
+    "Use the retrieved content to generate a concise, clear answer explaining: "
+    "1. About the disease - what it is, how it affects plants, visual symptoms, and severity indicators. "
+    "2. Causes of the disease - pathogens, environmental factors, transmission, and conditions that promote it. "
+    "3. Treatment plan - organic and chemical solutions, amount of chemicals to be applied, prevention methods, application rates, and lifecycle management. "
+    "4. Recommended crops - suggest alternative or companion crops considering the soil type and environmental  conditions of user's location. " 
+    "5. Weed control - strategies to manage weeds relevant to the affected crop, disease situation and weeds found around user's location. "
+    "6. Intercultural operations - he various activities performed on a crop field after sowing and before harvesting, focusing on maintaining optimal growing conditions and maximizing crop yield such as Crop Rotation, Intercropping, Staking, Earthing up ,Mulching, Training, Pruning, Thinning of Fruits, Short Pinching and Termination of Bad Dormacy and other such practices that are relevant to the affected crop, soil type, weather conditions and user's location."
+    "7. Irrigation - optimal irrigation practices considering the disease, environmental conditions and user's location. "
+    "8. Storage techniques - strategies to protect crops from pests and diseases during storage and transport. "
+    "9. Planting methods - optimal planting methods considering the soil type, weather conditions and user's location. "
+    "10. Soil management - soil preparation, amendments, and maintenance practices for crop health. "
+    "\n\n"
+    "The soil type and current weather of the user's location are given under 'Local conditions' below. Include the soil type in every soil-management and crop-recommendation section—do not ask the user for it. "
+    "Only invoke the GetSoilTypeInMyArea or GetWeatherForMyArea tool if that information is marked as not available. "
+    "Incorporate both soil type and weather when generating all agricultural recommendations."
+    "\n\n"
+    "Local conditions:\n{local_conditions}"
+
+    "\n\n"
+    "Return your response as a structured JSON object with fields: 'about', 'causes', 'treatment', 'recommended_crops', "
+    "'weed_control', 'intercultural_operations', 'irrigation', 'storage_techniques', 'planting_methods' , and 'soil_management'. "
+    "Each field should contain a concise single paragraph summary of the respective information. "
+    "Do not wrap the JSON in code blocks or other formatting - just return a plain JSON object."
+    "\n\n"
+    "Relevant agricultural context: {agent_scratchpad}"
+)
+
+MARKET_SYSTEM_PROMPT = (
+    "You are a helpful AI agriculture assistant named AgriGuardian. Given the following market trends for a crop {query}."
+    "Suggest Current Price, Average Price, Selling Advice, Market Insights, Market Demand, Market Supply, Government Policy, Risk Alert, on the basis of user's location, soil type and weather conditions and in the context of Indian market and rupees."
+    "\n\n"
+    "When asked about {query}, search your knowledge base for the most relevant content and resources. "
+    "Use the retrieved content to generate a concise, clear answer explaining: "
+    "1. Current Price - Current Price of {query} in India in rupees per kilogram. Should be strictly a number only. Decimal is allowed upto two decimal places. "
+    "2. Average Price - Average Price of {query} in India in rupees per kilogram. Should be strictly a number only. Decimal is allowed upto two decimal places. "
+    "3. Selling advice - Selling advice for {query} in India according to profitability and current market conditions. "
+    "4. Market insights - Current market insights for {query} in India. " 
+    "5. Market demand - Current demand insights for {query} in India. " 
+    "6. Market supply - Current supply insights for {query} in India. " 
+    "7. Government policy - Governnment Policy regarding {query} in India. "
+    "8. Risk alert - Risk alert for {query} in India according to current market conditions. "
+    "\n\n"
+    "The soil type and current weather of the user's location are given under 'Local conditions' below. Include the soil type in every soil-management and crop-recommendation section—do not ask the user for it. "
+    "Only invoke the GetSoilTypeInMyArea or GetWeatherForMyArea tool if that information is marked as not available. "
+    "Incorporate both soil type and weather when generating all agricultural recommendations."
+    "\n\n"
+    "Local conditions:\n{local_conditions}"
+
+    "\n\n"
+    "Return your response as a structured JSON object with fields: 'current_price', 'average_price', 'selling_advice', 'market_insights', 'market_demand', 'market_supply', 'government_policy' and 'risk_alert' . "
+    "Each field should contain a concise single paragraph summary of the respective information. "
+    "Do not wrap the JSON in code blocks or other formatting - just return a plain JSON object."
+    "\n\n"
+    "Relevant agricultural context: {agent_scratchpad}"
+)
+
+DISEASE_FIELDS = [
+    "about", "causes", "treatment", "recommended_crops", "weed_control", "intercultural_operations",
+    "irrigation", "storage_techniques", "planting_methods", "soil_management"
+]
+MARKET_FIELDS = [
+    "current_price", "average_price", "selling_advice", "market_insights", "market_demand", "market_supply",
+    "government_policy", "risk_alert"
+]
+
+def agent_tools():
+    """
+    Tools shared by every agent run (the retriever tool is added per request, see AgentPipeline).
+    """
+    return [
+        Tool(
+            name="SearchInternet",
+            func=search.run,
+            coroutine=async_tool(search.run),
+            description="Search the internet for agriculture-related information"
+        ),
+        Tool(
+            name="YouTubeSearch",
+            func=youtube._run,
+            coroutine=async_tool(youtube._run),
+            description="Search YouTube for relevant videos about agricultural diseases and treatments"
+        ),
+        Tool(
+            name="GetSoilTypeInMyArea",
+            func=get_soil_type_for_my_area,
+            coroutine=async_tool(get_soil_type_for_my_area),
+            description="Auto-detect location & fetch local soil type via web search."
+        ),
+        Tool(
+            name="GetWeatherForMyArea",
+            func=get_weather_for_my_area,
+            coroutine=async_tool(get_weather_for_my_area),
+            description="Get current weather conditions for my location."
+        )
+    ]
+
+def load_agent_pipelines(retriever_tool):
+    """
+    Build the disease and market analysis agents once, so requests only invoke them.
+    """
+    tools = agent_tools()
+    pipelines = PipelineRegistry([
+        AgentPipeline(
+            "disease",
+            DISEASE_SYSTEM_PROMPT,
+            DISEASE_FIELDS,
+            llm,
+            tools,
+            query_fields=["about", "causes", "treatment"],
+            fallback={
+                "about": "Information about {subject} is currently unavailable.",
+                "causes": "Causes of {subject} are currently unavailable.",
+                "treatment": "Treatment recommendations for {subject} are currently unavailable.",
+                "recommended_crops": "Crop recommendations are currently unavailable.",
+                "weed_control": "Weed control recommendations are currently unavailable.",
+                "intercultural_operations": "Intercultural operations recommendations are currently unavailable.",
+                "irrigation": "Irrigation recommendations are currently unavailable.",
+                "storage_techniques": "Storage techniques recommendations are currently unavailable.",
+                "planting_methods": "Planting methods recommendations are currently unavailable.",
+                "soil_management": "Soil management recommendations are currently unavailable."
+            },
+            verbose=AGENT_VERBOSE
+        ),
+        AgentPipeline(
+            "market",
+            MARKET_SYSTEM_PROMPT,
+            MARKET_FIELDS,
+            llm,
+            tools,
+            query_fields=["current_price", "average_price", "selling_advice"],
+            fallback={
+                "current_price": "N/A",
+                "average_price": "N/A",
+                "selling_advice": "Selling Advice not available.",
+                "market_insights": "Market Insights not available.",
+                "market_demand": "Market Demand not available.",
+                "market_supply": "Market Supply not available.",
+                "government_policy": "Government Policy not available.",
+                "risk_alert": "Risk Alert not available."
+            },
+            verbose=AGENT_VERBOSE
+        )
+    ])
+    # Pre-build the executors for the unscoped retriever tool
+    for name in pipelines.names():
+        pipelines[name].executor(retriever_tool)
+    return pipelines
+
+resources.register("agent_pipelines", load_agent_pipelines, depends_on=["retriever_tool"], executor=io_executor)
+
+# Prefixes of the prefetched local conditions in the prompt
+SOIL_CONTEXT_PREFIX = "Soil type in my area:"
+WEATHER_CONTEXT_PREFIX = "Current weather in my area:"
+# Local conditions of knowledge base analyses, which are served regardless of the location
+NO_LOCAL_CONDITIONS = ("Not used for this analysis - give advice that does not depend on the local soil type or weather, "
+                       "and do not call the GetSoilTypeInMyArea or GetWeatherForMyArea tools.")
+
+async def prefetch_local_conditions() -> str:
+    """
+    Fetch the soil type and weather for the server's location concurrently and format them for the prompt,
+    so the agent does not spend two LLM round trips calling GetSoilTypeInMyArea and GetWeatherForMyArea.
+    Anything that cannot be fetched is marked as not available, which leaves the agent to call the tool itself.
+    """
+    if not PREFETCH_LOCAL_CONDITIONS:
+        return "Not available - use the GetSoilTypeInMyArea and GetWeatherForMyArea tools."
+
+    soil, weather = await asyncio.gather(
+        run_in_pool(io_executor, get_soil_type_for_my_area, ""),
+        run_in_pool(io_executor, get_weather_for_my_area, ""),
+        return_exceptions=True
+    )
+    lines = []
+    if isinstance(soil, str) and soil.startswith("City:"):
+        lines.append(f"{SOIL_CONTEXT_PREFIX}\n{soil}")
+    else:
+        lines.append("Soil type: not available.")
+    if isinstance(weather, str) and json.loads(weather).get("temperature") is not None:
+        lines.append(f"{WEATHER_CONTEXT_PREFIX} {weather}")
+    else:
+        lines.append("Weather: not available.")
+    return "\n".join(lines)
+
+def search_vector_context(vectorstore, query_message: str, k: int = 10, crop: Optional[str] = None):
+    """
+    Run a vector similarity search (restricted to `crop`'s chunks when given) and clean the retrieved chunks.
+    This is blocking (remote query embedding + Chroma lookup) and is meant to run in the I/O pool.
+    """
+    try:
+        results = crop_search.search(vectorstore, query_message, k=k, crop=crop)
+        processed_results = []
+        for result in results:
+            # Clean HTML content from the result
+            clean_text = BeautifulSoup(result.page_content, "html.parser").get_text(separator="\n").strip()
+            metadata_str = json.dumps(result.metadata, indent=2)
+            processed_results.append({
+                "content": clean_text,
+                "metadata": metadata_str
+            })
+    except Exception as e:
+        logging.error(f"Error in vector similarity search: {e}")
+        processed_results = []
+    return processed_results
+
 @app.post("/snapshot")
 async def receive_snapshot(request: Request):
     """
@@ -279,42 +725,54 @@ async def receive_snapshot(request: Request):
     This endpoint:
     1. Receives and processes the image
     2. Classifies the disease using the ML model
-    3. Generates disease information and crop recommendations
-    4. Stores comprehensive results for further reference
+    3. Queues a background job that generates disease information and crop recommendations
+    4. Returns the classification and job id immediately (poll /jobs/{job_id} for the enrichment)
+
+    A queued enrichment is superseded by the next frame from the same camera. When the enrichment backlog
+    is full the snapshot is stored without enrichment and the response has "enrichment": "skipped".
+
+    The sending camera is identified by the X-Device-Id header (or `device` query parameter).
+    Frames that are perceptually unchanged from the device's previous frame reuse its analysis
+    and return immediately with "unchanged": true.
     """
     try:
+        device_id = get_device_id(request)
+
         # Read and process the uploaded image
         buf = await request.body()
-        img = Image.open(io.BytesIO(buf)).convert('RGB')
+        # Reduced-resolution decode straight to the (224, 224, 3) model input, in the inference pool
+        arr, content_type = await run_in_pool(inference_executor, decode_for_model, buf)
+        frame_hash = difference_hash(arr)
+
+        # Reuse the previous analysis if the camera is still looking at the same scene, as long as its
+        # enrichment is still queued, running or done (otherwise re-enrich this frame)
+        previous = snapshot_store.latest(device_id)
+        previous_job = enrichment_jobs.get(previous.job_id) if previous and previous.job_id else None
+        reusable = previous_job is not None and previous_job.status in ("queued", "running", "done")
+        previous_hash = previous.frame_hash if reusable else None
+        previous_age = time.time() - previous.created_at if previous else 0.0
+        if frame_detector.is_unchanged(previous_hash, previous_age, frame_hash):
+            return JSONResponse(status_code=200, content={
+                "status": "ok",
+                "disease": previous.prediction['Disease Prediction'],
+                "job_id": previous.job_id,
+                "snapshot_id": previous.id,
+                "unchanged": True
+            })
 
         # Disease classification using the loaded ML model
-        img_resized = img.resize((224, 224))
-        arr = np.expand_dims(np.array(img_resized)/255.0, axis=0)
-        preds = disease_model.predict(arr)
-        disease = labels[np.argmax(preds[0])]
+        await resources.get("disease_model")
+        preds = await inference_engine.predict(arr)
+        disease = labels[int(np.argmax(preds))]
         
         # Get timestamp for the prediction
         now = datetime.datetime.utcnow()
         
         # Extract environmental conditions
-        env_conditions = {
-            'temperature': current_temperature_2m,
-            'humidity': current_relative_humidity_2m,
-            'precipitation': current_precipitation,
-            'wind_speed': current_wind_speed_10m
-        }
-
-        # Encode image as base64 data URL for storage and frontend display
-        bio = io.BytesIO()
-        img.save(bio, format='JPEG')
-        data64 = base64.b64encode(bio.getvalue()).decode('utf-8')
-        img_data_url = f"data:image/jpeg;base64,{data64}"
+        env_conditions = await current_conditions()
 
-        # Store image data temporarily
-        tmp_store['image_data'] = img_data_url
-        
         # Create the initial prediction structure with empty content for the information fields
-        tmp_store['prediction'] = {
+        prediction = {
             'Disease Prediction': disease,
             'About': "",
             'Causes': "",
@@ -328,66 +786,65 @@ async def receive_snapshot(request: Request):
             'Soil Management': "",
             'timestamp': now.isoformat() + 'Z'
         }
+        # Keep the uploaded bytes as-is for storage (no re-encode; base64 is only produced when a client asks for it)
+        entry = snapshot_store.add(device_id, buf, prediction, content_type, frame_hash)
 
-        # Generate detailed disease info using LangChain agent
-        disease_info = await generate_disease_info(disease, "all", env_conditions)
-        
-        # Update the prediction with the disease information
-        tmp_store['prediction']['About'] = disease_info['about']
-        tmp_store['prediction']['Causes'] = disease_info['causes']
-        tmp_store['prediction']['Treatment Plan'] = disease_info['treatment']
-        
-        # Add agricultural recommendations to the prediction
-        tmp_store['prediction']['Recommended Crops'] = disease_info['recommended_crops']
-        tmp_store['prediction']['Weed Control'] = disease_info['weed_control'] 
-        tmp_store['prediction']['Intercultural Operations'] = disease_info['intercultural_operations']
-        tmp_store['prediction']['Irrigation'] = disease_info['irrigation']
-        tmp_store['prediction']['Storage Techniques'] = disease_info['storage_techniques']
-        tmp_store['prediction']['Planting Methods'] = disease_info['planting_methods']
-        tmp_store['prediction']['Soil Management'] = disease_info['soil_management']
-
-        return JSONResponse(status_code=200, content={"status": "ok", "disease": disease})
+        async def enrich(job):
+            # Generate detailed disease info using LangChain agent
+            disease_info = await generate_disease_info(disease, SNAPSHOT_QUERY_TYPE, env_conditions, on_progress=job.update)
+            remember_exchange(device_id, f"{SNAPSHOT_QUERY_TYPE} information about {disease}", disease_info)
+            
+            # Update the prediction with the disease information and agricultural recommendations
+            snapshot_store.update(entry, {
+                'About': disease_info['about'],
+                'Causes': disease_info['causes'],
+                'Treatment Plan': disease_info['treatment'],
+                'Recommended Crops': disease_info['recommended_crops'],
+                'Weed Control': disease_info['weed_control'],
+                'Intercultural Operations': disease_info['intercultural_operations'],
+                'Irrigation': disease_info['irrigation'],
+                'Storage Techniques': disease_info['storage_techniques'],
+                'Planting Methods': disease_info['planting_methods'],
+                'Soil Management': disease_info['soil_management']
+            })
+            return disease_info
+
+        # A newer frame from the same camera replaces its snapshot's enrichment while that is still queued
+        try:
+            job = await enrichment_jobs.submit("disease_info", enrich, coalesce_key=device_id,
+                                               disease=disease, device=device_id, snapshot_id=entry.id)
+        except JobQueueFull as e:
+            logging.warning(f"Skipping enrichment of snapshot {entry.id} from {device_id}: {e}")
+            return JSONResponse(status_code=200, content={
+                "status": "ok", "disease": disease, "job_id": None, "snapshot_id": entry.id, "unchanged": False,
+                "enrichment": "skipped"
+            })
+        entry.job_id = job.id
+
+        return JSONResponse(status_code=200, content={
+            "status": "ok", "disease": disease, "job_id": job.id, "snapshot_id": entry.id, "unchanged": False,
+            "enrichment": "queued"
+        })
     
     except Exception as e:
         logging.error(f"Error processing snapshot: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/query_disease")
-async def query_disease(query: DiseaseQueryRequest):
+async def query_disease(query: DiseaseQueryRequest, request: Request):
     """
     API endpoint to query information about a specific disease.
     Users can request specific types of information: "about", "causes", "treatment", or "all".
     Now also includes agricultural recommendations related to the disease.
+    With `follow_up`, the question is answered in the context of the session's earlier exchanges
+    (see `answer_disease_query`).
     """
     try:
         # Generate detailed disease information using the LangChain agent
-        disease_info = await generate_disease_info(
-            query.disease_name, 
-            query.query_type, 
-            query.environmental_conditions
-        )
+        disease_info = await answer_disease_query(query, get_session_id(request, query.device_id))
         
-        # If the query is for the latest detected disease, update the stored prediction
-        if (tmp_store['prediction'] and 
-            tmp_store['prediction']['Disease Prediction'].lower() == query.disease_name.lower()):
-            
-            if query.query_type == "about" or query.query_type == "all":
-                tmp_store['prediction']['About'] = disease_info['about']
-            
-            if query.query_type == "causes" or query.query_type == "all":
-                tmp_store['prediction']['Causes'] = disease_info['causes']
-                
-            if query.query_type == "treatment" or query.query_type == "all":
-                tmp_store['prediction']['Treatment Plan'] = disease_info['treatment']
-            
-            # Update agricultural recommendations
-            tmp_store['prediction']['Recommended Crops'] = disease_info['recommended_crops']
-            tmp_store['prediction']['Weed Control'] = disease_info['weed_control']
-            tmp_store['prediction']['Intercultural Operations'] = disease_info['intercultural_operations']
-            tmp_store['prediction']['Irrigation'] = disease_info['irrigation']
-            tmp_store['prediction']['Storage Techniques'] = disease_info['storage_techniques']
-            tmp_store['prediction']['Planting Methods'] = disease_info['planting_methods']
-            tmp_store['prediction']['Soil Management'] = disease_info['soil_management']
+        if not query.follow_up:
+            update_latest_snapshot(query, disease_info)
         
         return {
             "disease": query.disease_name,
@@ -399,7 +856,206 @@ async def query_disease(query: DiseaseQueryRequest):
         logging.error(f"Error querying disease info: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def generate_disease_info(disease_name: str, query_type: str = "all", environmental_conditions: Optional[Dict[str, float]] = None):
+async def answer_disease_query(query: DiseaseQueryRequest, session_id: str, on_field: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Answer a disease query and remember the exchange in the conversation memory of `session_id`.
+    Plain queries go through `generate_disease_info` (knowledge base and shared cache). Follow-up questions
+    depend on the session's history, so they are always generated live and never cached for other sessions.
+    """
+    if query.follow_up:
+        history = render_history(session_memory.history(session_id), SESSION_MEMORY_PROMPT_CHARS)
+        disease_info = await generate_disease_info_uncached(
+            query.disease_name,
+            query.query_type,
+            query.environmental_conditions,
+            on_field=on_field,
+            follow_up=query.follow_up,
+            history=history
+        )
+        disease_info.pop("_complete", None)
+        question = query.follow_up
+    else:
+        disease_info = await generate_disease_info(
+            query.disease_name,
+            query.query_type,
+            query.environmental_conditions,
+            on_field=on_field
+        )
+        question = f"{query.query_type} information about {query.disease_name}"
+    remember_exchange(session_id, question, disease_info)
+    return disease_info
+
+def remember_exchange(session_id: str, question: str, disease_info: Dict[str, Any]):
+    """
+    Save a question and the answer fields of its analysis in the conversation memory of `session_id`.
+    """
+    answer = {field: disease_info[field] for field in DISEASE_FIELDS if field in disease_info}
+    session_memory.save(session_id, question, json.dumps(answer))
+
+def update_latest_snapshot(query: DiseaseQueryRequest, disease_info: Dict[str, Any]):
+    """
+    If the query is for the latest disease detected by the device, update the stored prediction.
+    """
+    latest_entry = snapshot_store.latest(query.device_id)
+    if (latest_entry and 
+        latest_entry.prediction['Disease Prediction'].lower() == query.disease_name.lower()):
+        
+        fields = {}
+        if query.query_type == "about" or query.query_type == "all":
+            fields['About'] = disease_info['about']
+        
+        if query.query_type == "causes" or query.query_type == "all":
+            fields['Causes'] = disease_info['causes']
+            
+        if query.query_type == "treatment" or query.query_type == "all":
+            fields['Treatment Plan'] = disease_info['treatment']
+        
+        # Update agricultural recommendations
+        fields['Recommended Crops'] = disease_info['recommended_crops']
+        fields['Weed Control'] = disease_info['weed_control']
+        fields['Intercultural Operations'] = disease_info['intercultural_operations']
+        fields['Irrigation'] = disease_info['irrigation']
+        fields['Storage Techniques'] = disease_info['storage_techniques']
+        fields['Planting Methods'] = disease_info['planting_methods']
+        fields['Soil Management'] = disease_info['soil_management']
+        snapshot_store.update(latest_entry, fields)
+
+# Streaming analyses still running (references kept so they are not garbage collected)
+streaming_tasks = set()
+
+def stream_analysis(produce: Callable[[Callable[[str, Any], None]], Any], fields: List[str]) -> StreamingResponse:
+    """
+    Run an analysis in the background and stream it as server-sent events: a `field` event ({"field", "value"})
+    as soon as each field of the answer is generated, then `done` with the same body as the non-streaming
+    endpoint, or `error`.
+
+    Args:
+        produce: Coroutine function called with an `on_field(field, value)` callback, returning
+            (response body, field values)
+        fields: Fields of the answer that clients expect; those the model did not stream (e.g. cached
+            answers) are sent from the returned field values right before `done`
+    """
+    queue = asyncio.Queue()
+    emitted = set()
+
+    def on_field(field, value):
+        emitted.add(field)
+        queue.put_nowait(("field", {"field": field, "value": value}))
+
+    async def run():
+        try:
+            body, values = await produce(on_field)
+            for field in fields:
+                if field not in emitted and field in values:
+                    on_field(field, values[field])
+            queue.put_nowait(("done", body))
+        except Exception as e:
+            logging.error(f"Error streaming analysis: {e}", exc_info=True)
+            queue.put_nowait(("error", {"detail": str(e)}))
+
+    # The analysis is not cancelled if the client disconnects, so its result still reaches the caches
+    task = asyncio.create_task(run())
+    streaming_tasks.add(task)
+    task.add_done_callback(streaming_tasks.discard)
+
+    async def event_stream():
+        while True:
+            event, data = await queue.get()
+            yield format_sse(event, data)
+            if event != "field":
+                break
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
+@app.post("/query_disease/stream")
+async def query_disease_stream(query: DiseaseQueryRequest, request: Request):
+    """
+    Streaming variant of /query_disease: each field of the analysis ("about", "causes", ...) is sent as a
+    server-sent `field` event as soon as the model has generated it, followed by a `done` event carrying the
+    /query_disease response body.
+    """
+    session_id = get_session_id(request, query.device_id)
+
+    async def produce(on_field):
+        disease_info = await answer_disease_query(query, session_id, on_field)
+        if not query.follow_up:
+            update_latest_snapshot(query, disease_info)
+        body = {
+            "disease": query.disease_name,
+            "query_type": query.query_type,
+            "disease_info": disease_info
+        }
+        return body, disease_info
+
+    pipelines = await resources.get("agent_pipelines")
+    return stream_analysis(produce, [f for f in DISEASE_FIELDS if pipelines["disease"].wants(f, query.query_type)])
+
+def conditions_bucket(environmental_conditions: Optional[Dict[str, float]] = None) -> str:
+    """
+    Key of the weather bucket of some environmental conditions ("" without conditions). Values are rounded
+    down to coarse buckets (e.g. 2 °C / 10 % humidity) so small weather changes reuse the same analysis.
+    """
+    parts = []
+    for name, value in sorted((environmental_conditions or {}).items()):
+        step = condition_buckets.get(name)
+        if step and isinstance(value, (int, float)):
+            value = math.floor(value / step) * step
+        parts.append(f"{name}={value}")
+    return "|".join(parts)
+
+def disease_info_cache_key(disease_name: str, query_type: str, environmental_conditions: Optional[Dict[str, float]] = None) -> str:
+    """
+    Build the cache key for a disease analysis from the disease, query type and weather bucket.
+    """
+    return "|".join([disease_name.strip().lower(), query_type] + ([conditions_bucket(environmental_conditions)] if environmental_conditions else []))
+
+async def generate_disease_info(disease_name: str, query_type: str = "all", environmental_conditions: Optional[Dict[str, float]] = None, on_progress: Optional[Callable[[str, float], None]] = None,
+                              on_field: Optional[Callable[[str, Any], None]] = None):
+    """
+    Return disease information and agricultural recommendations. Answers are served from the precomputed
+    `knowledge_base` first, then from `disease_info_cache` when a fresh analysis for the same disease,
+    query type and weather bucket exists, and only generated live on a miss.
+    Knowledge base entries are looked up by the same weather bucket: requests without
+    `environmental_conditions` get the general entries, snapshots the ones `warm_knowledge_base` keeps for
+    the current weather. Takes the same arguments as `generate_disease_info_uncached`.
+    """
+    precomputed = knowledge_base.get(disease_name, query_type, conditions_bucket(environmental_conditions))
+    if precomputed is not None:
+        return precomputed
+
+    key = disease_info_cache_key(disease_name, query_type, environmental_conditions)
+    cached = disease_info_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    # Another request is already generating this analysis - wait for its result
+    if key in disease_info_in_flight:
+        return await asyncio.shield(disease_info_in_flight[key])
+
+    future = asyncio.get_running_loop().create_future()
+    disease_info_in_flight[key] = future
+    try:
+        disease_info = await generate_disease_info_uncached(disease_name, query_type, environmental_conditions, on_progress, on_field)
+        # Only cache analyses the agent actually produced, not the fallback text
+        if disease_info.pop("_complete", False):
+            disease_info_cache.set(key, disease_info)
+        future.set_result(disease_info)
+        return disease_info
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        del disease_info_in_flight[key]
+        if not future.done():
+            # This request was cancelled - release anyone waiting on it
+            future.cancel()
+        elif not future.cancelled():
+            # Mark any exception as retrieved when nobody else was waiting on it
+            future.exception()
+
+async def generate_disease_info_uncached(disease_name: str, query_type: str = "all", environmental_conditions: Optional[Dict[str, float]] = None, on_progress: Optional[Callable[[str, float], None]] = None,
+                                         on_field: Optional[Callable[[str, Any], None]] = None, local_conditions: bool = True,
+                                         follow_up: Optional[str] = None, history: str = ""):
     """
     Enhanced core function that uses LangChain agents to generate detailed information about crop diseases
     and agricultural recommendations.
@@ -408,59 +1064,19 @@ async def generate_disease_info(disease_name: str, query_type: str = "all", envi
         disease_name: The name of the disease to analyze
         query_type: The type of information requested ("about", "causes", "treatment", or "all")
         environmental_conditions: Optional environmental parameters that may affect the disease
+        on_progress: Optional callback receiving (stage, fraction complete) as the analysis advances
+        on_field: Optional callback receiving (field, value) as each field is generated (see AgentPipeline.run)
+        local_conditions: Prefetch the soil type and weather at the server's location into the prompt; off
+            for knowledge base entries, which must not depend on the location or time they were generated at
+        follow_up: Optional follow-up question the answer should address
+        history: Earlier exchanges of the conversation (see `render_history`), given to the agent but not
+            used for the vector search
         
     Returns:
         Dictionary containing the disease information and agricultural recommendations
     """
-    # Variables to store the disease information and agricultural recommendations
-    about_info = "Information not available"
-    causes_info = "Information not available"
-    treatment_info = "Information not available"
-    recommended_crops = "Information not available"
-    weed_control = "Information not available"
-    intercultural_operations = "Information not available"
-    irrigation = "Information not available"
-    storage_techniques = "Information not available"
-    planting_methods = "Information not available"
-    soil_management = "Information not available"
-    
-    # Build the chat prompt with instructions for the agriculture assistant
-    chat_prompt = ChatPromptTemplate([
-        (
-            "system",
-            (
-                "You are a helpful AI agriculture assistant named AgriGuardian. You help farmers and agricultural "
-                "professionals understand crop diseases, their causes, and treatment plans as well as providing "
-                "agricultural recommendations based on environmental conditions and disease information. "
-                "\n\n"
-                "When asked about a crop disease, search your knowledge base for the most relevant content and resources. "
-                "Use the retrieved content to generate a concise, clear answer explaining: "
-                "1. About the disease - what it is, how it affects plants, visual symptoms, and severity indicators. "
-                "2. Causes of the disease - pathogens, environmental factors, transmission, and conditions that promote it. "
-                "3. Treatment plan - organic and chemical solutions, amount of chemicals to be applied, prevention methods, application rates, and lifecycle management. "
-                "4. Recommended crops - suggest alternative or companion crops considering the soil type and environmental  conditions of user's location. " 
-                "5. Weed control - strategies to manage weeds relevant to the affected crop, disease situation and weeds found around user's location. "
-                "6. Intercultural operations - he various activities performed on a crop field after sowing and before harvesting, focusing on maintaining optimal growing conditions and maximizing crop yield such as Crop Rotation, Intercropping, Staking, Earthing up ,Mulching, Training, Pruning, Thinning of Fruits, Short Pinching and Termination of Bad Dormacy and other such practices that are relevant to the affected crop, soil type, weather conditions and user's location."
-                "7. Irrigation - optimal irrigation practices considering the disease, environmental conditions and user's location. "
-                "8. Storage techniques - strategies to protect crops from pests and diseases during storage and transport. "
-                "9. Planting methods - optimal planting methods considering the soil type, weather conditions and user's location. "
-                "10. Soil management - soil preparation, amendments, and maintenance practices for crop health. "
-                "\n\n"
-                "First, invoke the GetSoilTypeInMyArea tool to fetch your local soil type and include it in every soil-management and crop-recommendation section—do not ask the user for it. "
-                "Then, invoke the GetWeatherForMyArea tool to fetch current weather conditions. "
-                "Incorporate both soil type and weather when generating all agricultural recommendations."
-
-                "\n\n"
-                "Return your response as a structured JSON object with fields: 'about', 'causes', 'treatment', 'recommended_crops', "
-                "'weed_control', 'intercultural_operations', 'irrigation', 'storage_techniques', 'planting_methods' , and 'soil_management'. "
-                "Each field should contain a concise single paragraph summary of the respective information. "
-                "Do not wrap the JSON in code blocks or other formatting - just return a plain JSON object."
-                "\n\n"
-                "Relevant agricultural context: {agent_scratchpad}"
-            )
-        ),
-        ("human", "{user_input}")
-    ])
+    if on_progress is None:
+        on_progress = lambda stage, progress: None
 
     # Format query based on query type
     if query_type == "about":
@@ -477,201 +1093,165 @@ async def generate_disease_info(disease_name: str, query_type: str = "all", envi
         conditions_str = ", ".join([f"{k}: {v}" for k, v in environmental_conditions.items()])
         query_message += f" Consider these environmental conditions: {conditions_str}."
 
-    # Perform a vector similarity search on the query message to find relevant information
-    try:
-        results = vectorstore.similarity_search(query_message, k=10)
-        processed_results = []
-        for result in results:
-            # Clean HTML content from the result
-            clean_text = BeautifulSoup(result.page_content, "html.parser").get_text(separator="\n").strip()
-            metadata_str = json.dumps(result.metadata, indent=2)
-            processed_results.append({
-                "content": clean_text,
-                "metadata": metadata_str
-            })
-    except Exception as e:
-        logging.error(f"Error in vector similarity search: {e}")
-        processed_results = []
+    if follow_up:
+        query_message += f" In particular, answer this follow-up question: {follow_up}"
+
+    # Perform a vector similarity search over the chunks of the disease's crop to find relevant information
+    on_progress("retrieving", 0.1)
+    crop = crop_for_label(disease_name)
+    vectorstore = await resources.get("vectorstore")
+    # The soil type and weather only depend on the location, so they are fetched alongside the search
+    search = run_in_pool(io_executor, search_vector_context, vectorstore, query_message, VECTOR_SEARCH_K, crop)
+    if local_conditions:
+        processed_results, local_context = await asyncio.gather(search, prefetch_local_conditions())
+    else:
+        processed_results, local_context = await search, NO_LOCAL_CONDITIONS
 
     # Build a vector context string from the processed vector search results
     vector_context = "\n\n".join(
         [f"Content: {r['content']}\nSources: {r['metadata']}" for r in processed_results]
     ) if processed_results else "No relevant information found in the vector database."
 
-    # Prepare the tools to be used by the agent
-    tools = [
-        retriever_tool,
-        Tool(
-            name="SearchInternet",
-            func=search.run,
-            description="Search the internet for agriculture-related information"
-        ),
-        Tool(
-            name="YouTubeSearch",
-            func=youtube._run,
-            description="Search YouTube for relevant videos about agricultural diseases and treatments"
-        ),
-        Tool(
-            name="GetSoilTypeInMyArea",
-            func=get_soil_type_for_my_area,
-            description="Auto-detect location & fetch local soil type via web search."
-        ),
-        Tool(
-            name="GetWeatherForMyArea",
-            func=get_weather_for_my_area,
-            description="Get current weather conditions for my location."
-        )
-    ]
-    
-    # Create the tool-calling agent
-    try:
-        agent = create_tool_calling_agent(llm, tools, chat_prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    pipelines = await resources.get("agent_pipelines")
+    retriever_tool = await get_retriever_tool(crop)
 
-        # Prepare the input parameters for the agent
-        agent_input = {
-            "user_input": query_message,
-            "agent_scratchpad": vector_context  # pass vector context to the prompt
-        }
+    # Invoke the shared disease analysis agent and parse its answer
+    on_progress("generating", 0.3)
+    agent_input = {
+        "user_input": f"Earlier in this conversation:\n{history}\n\n{query_message}" if history else query_message,
+        "agent_scratchpad": vector_context,  # pass vector context to the prompt
+        "local_conditions": local_context
+    }
+    disease_data, _, complete = await pipelines["disease"].run(agent_input, retriever_tool, query_type, subject=disease_name, on_field=on_field)
+    on_progress("parsing", 0.9)
 
-        # Invoke the agent to generate a response
-        agent_response = agent_executor.invoke(agent_input)
-
-        # Extract response text
-        if isinstance(agent_response, dict):
-            # Handle different possible response formats
-            if "text" in agent_response:
-                response_text = agent_response["text"]
-            elif "output" in agent_response:
-                response_text = agent_response["output"]
-            else:
-                # Fallback to string representation if specific keys not found
-                response_text = str(agent_response)
-        else:
-            response_text = str(agent_response)
-    except Exception as e:
-        logging.error(f"Error in agent execution: {e}")
-        response_text = json.dumps({
-            "about": f"Information about {disease_name} is currently unavailable.",
-            "causes": f"Causes of {disease_name} are currently unavailable.",
-            "treatment": f"Treatment recommendations for {disease_name} are currently unavailable.",
-            "recommended_crops": "Crop recommendations are currently unavailable.",
-            "weed_control": "Weed control recommendations are currently unavailable.",
-            "intercultural_operations": "Intercultural operations recommendations are currently unavailable.",
-            "irrigation": "Irrigation recommendations are currently unavailable.",
-            "storage_techniques": "Storage techniques recommendations are currently unavailable.",
-            "planting_methods": "Planting methods recommendations are currently unavailable.",
-            "soil_management": "Soil management recommendations are currently unavailable."
-        })
-    
-    # Try to parse JSON from the response
-    try:
-        # Search for JSON in the text, accounting for possible code block formatting
-        import re
-        
-        # Handle the case where response_text is already a dictionary
-        if isinstance(response_text, dict):
-            if "output" in response_text:
-                # Extract from the 'output' field
-                output_text = response_text["output"]
-                
-                # Look for JSON in code blocks first
-                code_block_match = re.search(r'(?:json)?\s*(\{.+?\})\s', output_text, re.DOTALL)
-                if code_block_match:
-                    json_str = code_block_match.group(1)
-                else:
-                    # Otherwise look for JSON directly
-                    json_match = re.search(r'\{.+?\}', output_text, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                    else:
-                        json_str = output_text  # Try the whole output as JSON
-            else:
-                # If it's a dict but doesn't have 'output', try to use it directly
-                json_str = json.dumps(response_text)
-        else:
-            # Handle string response
-            # First check if JSON is wrapped in code blocks (json ... )
-            code_block_match = re.search(r'(?:json)?\s*(\{.+?\})\s', response_text, re.DOTALL)
-            if code_block_match:
-                json_str = code_block_match.group(1)
-            else:
-                # Otherwise look for JSON object directly
-                json_match = re.search(r'\{.+?\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    raise ValueError("No JSON object found in response")
-        
-        # Clean and parse the JSON
-        if isinstance(json_str, str):
-            json_str = json_str.strip()
-            # Handle escaped quotes in JSON string
-            json_str = json_str.replace(r'\"', '"')
-            disease_data = json.loads(json_str)
-        else:
-            # If json_str is already a dict, use it directly
-            disease_data = json_str
-        
-        # Extract the disease information
-        if "about" in disease_data and query_type in ["about", "all"]:
-            about_info = disease_data["about"]
-        if "causes" in disease_data and query_type in ["causes", "all"]:
-            causes_info = disease_data["causes"]
-        if "treatment" in disease_data and query_type in ["treatment", "all"]:
-            treatment_info = disease_data["treatment"]
-            
-        # Extract agricultural recommendations
-        if "recommended_crops" in disease_data:
-            recommended_crops = disease_data["recommended_crops"]
-        if "weed_control" in disease_data:
-            weed_control = disease_data["weed_control"]
-        if "intercultural_operations" in disease_data:
-            intercultural_operations = disease_data["intercultural_operations"]
-        if "irrigation" in disease_data:
-            irrigation = disease_data["irrigation"]
-        if "storage_techniques" in disease_data:
-            storage_techniques = disease_data["storage_techniques"]
-        if "planting_methods" in disease_data:
-            planting_methods = disease_data["planting_methods"]
-        if "soil_management" in disease_data:
-            soil_management = disease_data["soil_management"]
-    except Exception as e:
-        logging.error(f"Error parsing JSON from response: {e}", exc_info=True)
-        logging.info(f"Response text that failed to parse: {response_text}")
-        # Fallback to default values if JSON parsing fails
-    
-    # Save to memory for potential follow-up questions
-    memory.save_context({"user_input": query_message}, {"agent_response": response_text})
-    
     return {
         "disease": disease_name,
         "query_type": query_type,
-        "about": about_info,
-        "causes": causes_info,
-        "treatment": treatment_info,
-        "recommended_crops": recommended_crops,
-        "weed_control": weed_control,
-        "intercultural_operations": intercultural_operations,
-        "irrigation": irrigation,
-        "storage_techniques": storage_techniques,
-        "planting_methods": planting_methods,
-        "soil_management": soil_management,
-        "vector_results": processed_results[:2] if processed_results else []  # Just return the first two results to keep response size reasonable
+        **disease_data,
+        "vector_results": processed_results[:2] if processed_results else [],  # Just return the first two results to keep response size reasonable
+        "_complete": complete
+    }
+
+def snapshot_payload(entry) -> Dict[str, Any]:
+    return {
+        'device': entry.device_id,
+        'snapshot_id': entry.id,
+        'image': entry.image_data_url(),
+        'prediction': entry.prediction
+    }
+
+def snapshot_headers(entry) -> Dict[str, str]:
+    return {
+        'ETag': entry.etag,
+        'Last-Modified': formatdate(entry.updated_at, usegmt=True),
+        'Cache-Control': 'no-cache'
     }
 
+def is_not_modified(request: Request, entry) -> bool:
+    """
+    Evaluate the conditional GET headers (If-None-Match takes precedence over If-Modified-Since).
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry.etag in tags or f"W/{entry.etag}" in tags
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(entry.updated_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
 @app.get("/latest_snapshot")
-async def latest():
+async def latest(request: Request, device: Optional[str] = None):
     """
     Return the latest snapshot analysis including the image and comprehensive prediction data.
+    Pass `device` to get the latest snapshot of one camera; otherwise the most recent snapshot of any camera is returned.
+
+    Responses carry ETag/Last-Modified headers; a request with a matching If-None-Match
+    (or If-Modified-Since) gets an empty 304 instead of the full payload.
     """
-    if not tmp_store['prediction']:
+    entry = snapshot_store.latest(device)
+    if entry is None:
         raise HTTPException(status_code=404, detail="No snapshot available")
+    if is_not_modified(request, entry):
+        return Response(status_code=304, headers=snapshot_headers(entry))
         
-    return JSONResponse(content={
-        'image': tmp_store['image_data'],
-        'prediction': tmp_store['prediction']
-    })
+    return JSONResponse(content=snapshot_payload(entry), headers=snapshot_headers(entry))
+
+@app.get("/latest_snapshot/wait")
+async def latest_wait(request: Request, device: Optional[str] = None, timeout: float = LONG_POLL_TIMEOUT):
+    """
+    Long-poll variant of /latest_snapshot: waits until the latest snapshot differs from the ETag sent in
+    If-None-Match, then returns it. Returns 304 if nothing changed within `timeout` seconds, or 404 (as
+    /latest_snapshot does) if there is still no snapshot at all.
+    """
+    etag = request.headers.get("If-None-Match")
+    entry = await snapshot_store.wait_for_change(device, etag, min(max(timeout, 0.0), LONG_POLL_TIMEOUT))
+    if entry is None:
+        current = snapshot_store.latest(device)
+        if current is None:
+            raise HTTPException(status_code=404, detail="No snapshot available")
+        return Response(status_code=304, headers=snapshot_headers(current))
+    return JSONResponse(content=snapshot_payload(entry), headers=snapshot_headers(entry))
+
+@app.get("/latest_snapshot/events")
+async def latest_events(request: Request, device: Optional[str] = None):
+    """
+    Server-sent events variant of /latest_snapshot: pushes a `snapshot` event whenever a new analysis lands
+    or an existing one is enriched. Event ids are ETags, so reconnecting clients resume via Last-Event-ID.
+    """
+    async def event_stream():
+        etag = request.headers.get("Last-Event-ID")
+        while not await request.is_disconnected():
+            entry = await snapshot_store.wait_for_change(device, etag, SSE_KEEPALIVE_SECONDS)
+            if entry is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            etag = entry.etag
+            yield f"event: snapshot\nid: {etag}\ndata: {json.dumps(snapshot_payload(entry))}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
+@app.get("/snapshot_history")
+async def snapshot_history(device: str):
+    """
+    Return the stored analyses of a device, newest first. Images are fetched separately from /snapshot_image/{snapshot_id}.
+    """
+    return {
+        'device': device,
+        'snapshots': [entry.summary() for entry in snapshot_store.history(device)]
+    }
+
+@app.get("/snapshot_image/{snapshot_id}")
+async def snapshot_image(snapshot_id: int):
+    """
+    Return the raw image bytes of a stored snapshot.
+    """
+    entry = snapshot_store.get(snapshot_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return Response(content=entry.image, media_type=entry.content_type)
+
+@app.get("/devices")
+async def devices():
+    """
+    List the devices that have stored snapshots.
+    """
+    return {'devices': snapshot_store.devices()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Return the status, progress and (once finished) the result of a background analysis job.
+    """
+    job = enrichment_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=job.to_dict())
 
 @app.post("/searchdata")
 async def searchdata(request: Request):
@@ -697,48 +1277,72 @@ async def searchdata(request: Request):
         
         # Log the search request
         logging.info(f"Search request: {query}, filters: {filters}")
-        now = datetime.datetime.utcnow()
-        
-        # Extract environmental conditions
-        env_conditions = {
-            'temperature': current_temperature_2m,
-            'humidity': current_relative_humidity_2m,
-            'precipitation': current_precipitation,
-            'wind_speed': current_wind_speed_10m
-        }
-        
-        # Create the initial prediction structure with empty content for the information fields
-        tmp_store['market_insights'] = {
-            'Current Price': "",
-            'Average Price': "",
-            'Selling Advice': "",
-            'Market Insights': "",
-            'Market Demand': "",
-            'Market Supply': "",
-            'Government Policy': "",
-            'Risk Alert': "",
-            'timestamp': now.isoformat() + 'Z'
-        }
 
-        # Generate detailed disease info using LangChain agent
-        market_info = await search_analytics(query, "all", env_conditions)
-        
-        tmp_store['market_insights']['Current Price'] = market_info['current_price']
-        tmp_store['market_insights']['Average Price'] = market_info['average_price']
-        tmp_store['market_insights']['Selling Advice'] = market_info['selling_advice']
-        tmp_store['market_insights']['Market Insights'] = market_info['market_insights']
-        tmp_store['market_insights']['Market Demand'] = market_info['market_demand'] 
-        tmp_store['market_insights']['Market Supply'] = market_info['market_supply']
-        tmp_store['market_insights']['Government Policy'] = market_info['government_policy']
-        tmp_store['market_insights']['Risk Alert'] = market_info['risk_alert']
-
-        return JSONResponse(status_code=200, content={"status": "ok", "market_insights": tmp_store['market_insights'], "timestamp": datetime.datetime.utcnow().isoformat() + 'Z'})
+        market_insights, _ = await run_market_search(query)
+        return JSONResponse(status_code=200, content={"status": "ok", "market_insights": market_insights, "timestamp": datetime.datetime.utcnow().isoformat() + 'Z'})
     
     except Exception as e:
         logging.error(f"Error processing snapshot: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def search_analytics(query: str, query_type: str = "all", environmental_conditions: Optional[Dict[str, float]] = None):
+async def run_market_search(query: str, on_field: Optional[Callable[[str, Any], None]] = None):
+    """
+    Generate the market insights for a crop and keep them as the latest market insights.
+
+    Returns:
+        (market insights as stored and returned by /searchdata, raw fields from search_analytics)
+    """
+    now = datetime.datetime.utcnow()
+    
+    # Extract environmental conditions
+    env_conditions = await current_conditions()
+    
+    # Create the initial prediction structure with empty content for the information fields
+    tmp_store['market_insights'] = {
+        'Current Price': "",
+        'Average Price': "",
+        'Selling Advice': "",
+        'Market Insights': "",
+        'Market Demand': "",
+        'Market Supply': "",
+        'Government Policy': "",
+        'Risk Alert': "",
+        'timestamp': now.isoformat() + 'Z'
+    }
+
+    # Generate detailed disease info using LangChain agent
+    market_info = await search_analytics(query, "all", env_conditions, on_field=on_field)
+    
+    tmp_store['market_insights']['Current Price'] = market_info['current_price']
+    tmp_store['market_insights']['Average Price'] = market_info['average_price']
+    tmp_store['market_insights']['Selling Advice'] = market_info['selling_advice']
+    tmp_store['market_insights']['Market Insights'] = market_info['market_insights']
+    tmp_store['market_insights']['Market Demand'] = market_info['market_demand'] 
+    tmp_store['market_insights']['Market Supply'] = market_info['market_supply']
+    tmp_store['market_insights']['Government Policy'] = market_info['government_policy']
+    tmp_store['market_insights']['Risk Alert'] = market_info['risk_alert']
+    return tmp_store['market_insights'], market_info
+
+@app.post("/searchdata/stream")
+async def searchdata_stream(request: Request):
+    """
+    Streaming variant of /searchdata: each market field ("current_price", "average_price", ...) is sent as a
+    server-sent `field` event as soon as the model has generated it, followed by a `done` event carrying the
+    /searchdata response body.
+    """
+    data = await request.json()
+    query = data.get("query", "")
+    logging.info(f"Streaming search request: {query}, filters: {data.get('filters', {})}")
+
+    async def produce(on_field):
+        market_insights, market_info = await run_market_search(query, on_field=on_field)
+        body = {"status": "ok", "market_insights": market_insights, "timestamp": datetime.datetime.utcnow().isoformat() + 'Z'}
+        return body, market_info
+
+    return stream_analysis(produce, MARKET_FIELDS)
+
+async def search_analytics(query: str, query_type: str = "all", environmental_conditions: Optional[Dict[str, float]] = None,
+                           on_field: Optional[Callable[[str, Any], None]] = None):
     """
     Enhanced core function that uses LangChain agents to generate detailed information about crop diseases
     and agricultural recommendations.
@@ -751,50 +1355,6 @@ async def search_analytics(query: str, query_type: str = "all", environmental_co
     Returns:
         Dictionary containing the disease information and agricultural recommendations
     """
-    # Variables to store the disease information and agricultural recommendations
-    current_price = "Information not available"
-    average_price = "Information not available"
-    selling_advice = "Information not available"
-    market_insights = "Information not available"
-    market_demand = "Information not available"
-    market_supply = "Information not available"
-    government_policy = "Information not available"
-    risk_alert = "Information not available"
-    
-    # Build the chat prompt with instructions for the agriculture assistant
-    chat_prompt = ChatPromptTemplate([
-        (
-            "system",
-            (
-                "You are a helpful AI agriculture assistant named AgriGuardian. Given the following market trends for a crop {query}."
-                "Suggest Current Price, Average Price, Selling Advice, Market Insights, Market Demand, Market Supply, Government Policy, Risk Alert, on the basis of user's location, soil type and weather conditions and in the context of Indian market and rupees."
-                "\n\n"
-                "When asked about {query}, search your knowledge base for the most relevant content and resources. "
-                "Use the retrieved content to generate a concise, clear answer explaining: "
-                "1. Current Price - Current Price of {query} in India in rupees per kilogram. Should be strictly a number only. Decimal is allowed upto two decimal places. "
-                "2. Average Price - Average Price of {query} in India in rupees per kilogram. Should be strictly a number only. Decimal is allowed upto two decimal places. "
-                "3. Selling advice - Selling advice for {query} in India according to profitability and current market conditions. "
-                "4. Market insights - Current market insights for {query} in India. " 
-                "5. Market demand - Current demand insights for {query} in India. " 
-                "6. Market supply - Current supply insights for {query} in India. " 
-                "7. Government policy - Governnment Policy regarding {query} in India. "
-                "8. Risk alert - Risk alert for {query} in India according to current market conditions. "
-                "\n\n"
-                "First, invoke the GetSoilTypeInMyArea tool to fetch your local soil type and include it in every soil-management and crop-recommendation section—do not ask the user for it. "
-                "Then, invoke the GetWeatherForMyArea tool to fetch current weather conditions. "
-                "Incorporate both soil type and weather when generating all agricultural recommendations."
-
-                "\n\n"
-                "Return your response as a structured JSON object with fields: 'current_price', 'average_price', 'selling_advice', 'market_insights', 'market_demand', 'market_supply', 'government_policy' and 'risk_alert' . "
-                "Each field should contain a concise single paragraph summary of the respective information. "
-                "Do not wrap the JSON in code blocks or other formatting - just return a plain JSON object."
-                "\n\n"
-                "Relevant agricultural context: {agent_scratchpad}"
-            )
-        ),
-        ("human", "{user_input}")
-    ])
-
     # Format query based on query type
     if query_type == "current_price":
         query_message = f"Current Price of {query} in Indian in rupees. Should be strictly a number only. Decimal is allowed upto two decimal places."
@@ -810,178 +1370,138 @@ async def search_analytics(query: str, query_type: str = "all", environmental_co
         conditions_str = ", ".join([f"{k}: {v}" for k, v in environmental_conditions.items()])
         query_message += f" Consider these environmental conditions: {conditions_str}."
 
-    # Perform a vector similarity search on the query message to find relevant information
-    try:
-        results = vectorstore.similarity_search(query_message, k=10)
-        processed_results = []
-        for result in results:
-            # Clean HTML content from the result
-            clean_text = BeautifulSoup(result.page_content, "html.parser").get_text(separator="\n").strip()
-            metadata_str = json.dumps(result.metadata, indent=2)
-            processed_results.append({
-                "content": clean_text,
-                "metadata": metadata_str
-            })
-    except Exception as e:
-        logging.error(f"Error in vector similarity search: {e}")
-        processed_results = []
+    # Perform a vector similarity search, restricted to the crop's chunks when the query names one
+    crop = crop_for_label(query)
+    vectorstore = await resources.get("vectorstore")
+    # The soil type and weather only depend on the location, so they are fetched alongside the search
+    processed_results, local_conditions = await asyncio.gather(
+        run_in_pool(io_executor, search_vector_context, vectorstore, query_message, VECTOR_SEARCH_K, crop),
+        prefetch_local_conditions()
+    )
 
     # Build a vector context string from the processed vector search results
     vector_context = "\n\n".join(
         [f"Content: {r['content']}\nSources: {r['metadata']}" for r in processed_results]
     ) if processed_results else "No relevant information found in the vector database."
 
-    # Prepare the tools to be used by the agent
-    tools = [
-        retriever_tool,
-        Tool(
-            name="SearchInternet",
-            func=search.run,
-            description="Search the internet for agriculture-related information"
-        ),
-        Tool(
-            name="YouTubeSearch",
-            func=youtube._run,
-            description="Search YouTube for relevant videos about agricultural diseases and treatments"
-        ),
-        Tool(
-            name="GetSoilTypeInMyArea",
-            func=get_soil_type_for_my_area,
-            description="Auto-detect location & fetch local soil type via web search."
-        ),
-        Tool(
-            name="GetWeatherForMyArea",
-            func=get_weather_for_my_area,
-            description="Get current weather conditions for my location."
-        )
-    ]
-    
-    # Create the tool-calling agent
-    try:
-        agent = create_tool_calling_agent(llm, tools, chat_prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
-
-        # Prepare the input parameters for the agent
-        agent_input = {
-            "query": query,
-            "user_input": query_message,
-            "agent_scratchpad": vector_context  # pass vector context to the prompt
-        }
+    pipelines = await resources.get("agent_pipelines")
+    retriever_tool = await get_retriever_tool(crop)
+
+    # Invoke the shared market analysis agent and parse its answer
+    agent_input = {
+        "query": query,
+        "user_input": query_message,
+        "agent_scratchpad": vector_context,  # pass vector context to the prompt
+        "local_conditions": local_conditions
+    }
+    market_info, _, _ = await pipelines["market"].run(agent_input, retriever_tool, query_type, subject=query, on_field=on_field)
 
-        # Invoke the agent to generate a response
-        agent_response = agent_executor.invoke(agent_input)
-
-        # Extract response text
-        if isinstance(agent_response, dict):
-            # Handle different possible response formats
-            if "text" in agent_response:
-                response_text = agent_response["text"]
-            elif "output" in agent_response:
-                response_text = agent_response["output"]
-            else:
-                # Fallback to string representation if specific keys not found
-                response_text = str(agent_response)
-        else:
-            response_text = str(agent_response)
-    except Exception as e:
-        logging.error(f"Error in agent execution: {e}")
-        response_text = json.dumps({
-            "current_price": f"N/A",
-            "average_price": f"N/A",
-            "selling_advice": f"Selling Advice not available.",
-            "market_insights": f"Market Insights not available.",
-            "market_demand": f"Market Demand not available.",
-            "market_supply": f"Market Supply not available.",
-            "government_policy": f"Government Policy not available.",
-            "risk_alert": f"Risk Alert not available."
-        })
-    
-    # Try to parse JSON from the response
-    try:
-        # Search for JSON in the text, accounting for possible code block formatting
-        import re
-        
-        # Handle the case where response_text is already a dictionary
-        if isinstance(response_text, dict):
-            if "output" in response_text:
-                # Extract from the 'output' field
-                output_text = response_text["output"]
-                
-                # Look for JSON in code blocks first
-                code_block_match = re.search(r'(?:json)?\s*(\{.+?\})\s', output_text, re.DOTALL)
-                if code_block_match:
-                    json_str = code_block_match.group(1)
-                else:
-                    # Otherwise look for JSON directly
-                    json_match = re.search(r'\{.+?\}', output_text, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                    else:
-                        json_str = output_text  # Try the whole output as JSON
-            else:
-                # If it's a dict but doesn't have 'output', try to use it directly
-                json_str = json.dumps(response_text)
-        else:
-            # Handle string response
-            # First check if JSON is wrapped in code blocks (json ... )
-            code_block_match = re.search(r'(?:json)?\s*(\{.+?\})\s', response_text, re.DOTALL)
-            if code_block_match:
-                json_str = code_block_match.group(1)
-            else:
-                # Otherwise look for JSON object directly
-                json_match = re.search(r'\{.+?\}', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    raise ValueError("No JSON object found in response")
-        
-        # Clean and parse the JSON
-        if isinstance(json_str, str):
-            json_str = json_str.strip()
-            # Handle escaped quotes in JSON string
-            json_str = json_str.replace(r'\"', '"')
-            market_info = json.loads(json_str)
-        else:
-            # If json_str is already a dict, use it directly
-            market_info = json_str
-        
-        # Extract the disease information
-        if "current_price" in market_info and query_type in ["current_price", "all"]:
-            current_price = market_info["current_price"]
-        if "average_price" in market_info and query_type in ["average_price", "all"]:
-            average_price = market_info["average_price"]
-        if "selling_advice" in market_info and query_type in ["selling_advice", "all"]:
-            selling_advice = market_info["selling_advice"]
-            
-        # Extract agricultural recommendations
-        if "market_insights" in market_info:
-            market_insights = market_info["market_insights"]
-        if "market_demand" in market_info:
-            market_demand = market_info["market_demand"]
-        if "market_supply" in market_info:
-            market_supply = market_info["market_supply"]
-        if "government_policy" in market_info:
-            government_policy = market_info["government_policy"]
-        if "risk_alert" in market_info:
-            risk_alert = market_info["risk_alert"]
-    except Exception as e:
-        logging.error(f"Error parsing JSON from response: {e}", exc_info=True)
-        logging.info(f"Response text that failed to parse: {market_info}")
-        # Fallback to default values if JSON parsing fails
-    
     return {
         "query_type": query_type,
-        "current_price": current_price,
-        "average_price": average_price,
-        "selling_advice": selling_advice,
-        "market_insights": market_insights,
-        "market_demand": market_demand,
-        "market_supply": market_supply,
-        "government_policy": government_policy,
-        "risk_alert": risk_alert,
+        **market_info,
         "vector_results": processed_results[:2] if processed_results else []  # Just return the first two results to keep response size reasonable
     }
 
+def precompute_disease_info(disease_name: str, query_type: str, environmental_conditions: Optional[Dict[str, float]] = None):
+    """
+    Generate an analysis for the knowledge base: only the given conditions are used, without the soil type
+    or weather prefetched for the server's location.
+    """
+    return generate_disease_info_uncached(disease_name, query_type, environmental_conditions, local_conditions=False)
+
+async def refresh_knowledge_base():
+    """
+    Periodically regenerate stale general knowledge base entries in the background.
+    """
+    while True:
+        await asyncio.sleep(KNOWLEDGE_BASE_REFRESH_HOURS * 3600)
+        try:
+            summary = await precompute(
+                knowledge_base,
+                precompute_disease_info,
+                labels.values(),
+                concurrency=KNOWLEDGE_BASE_CONCURRENCY,
+                only_stale=True
+            )
+            logging.info(f"Knowledge base refresh: {summary}")
+        except Exception as e:
+            logging.error(f"Knowledge base refresh failed: {e}", exc_info=True)
+
+async def warm_knowledge_base():
+    """
+    Keep the snapshot analysis of every label precomputed for the current weather bucket, so camera frames
+    are answered from the knowledge base. Entries of earlier buckets are dropped when the weather moves on.
+    """
+    while True:
+        try:
+            conditions = await current_conditions()
+            bucket = conditions_bucket(conditions)
+            if knowledge_base.drop_conditions(keep=bucket):
+                knowledge_base.save()
+            summary = await precompute(
+                knowledge_base,
+                lambda disease_name, query_type: precompute_disease_info(disease_name, query_type, conditions),
+                labels.values(),
+                query_types=[SNAPSHOT_QUERY_TYPE],
+                concurrency=KNOWLEDGE_BASE_CONCURRENCY,
+                only_stale=True,
+                conditions=bucket
+            )
+            if summary["generated"] or summary["failed"]:
+                logging.info(f"Knowledge base warmed for {bucket}: {summary}")
+        except Exception as e:
+            logging.error(f"Knowledge base warm-up failed: {e}", exc_info=True)
+        await asyncio.sleep(KNOWLEDGE_BASE_WARM_MINUTES * 60)
+
+@app.get("/health")
+async def health():
+    """
+    Liveness check: the process is up and serving requests (resources may still be loading).
+    """
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness check: 200 once every heavy resource has loaded, 503 before. Includes per-resource load timings.
+    """
+    is_ready = resources.is_ready()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "resources": resources.status()}
+    )
+
+@app.get("/stats")
+async def stats():
+    """
+    Return runtime statistics used to tune the server (inference batching, background jobs, caches).
+    """
+    try:
+        vectorstore = resources.get_nowait("vectorstore")
+    except ResourceNotReady:
+        vectorstore = None
+    try:
+        pipelines = resources.get_nowait("agent_pipelines")
+    except ResourceNotReady:
+        pipelines = None
+    return {
+        "inference": inference_engine.stats(),
+        "model": inference_engine.model.stats() if hasattr(inference_engine.model, "stats") else {"backend": "placeholder"},
+        "enrichment_jobs": enrichment_jobs.stats(),
+        "disease_info_cache": disease_info_cache.stats(),
+        "knowledge_base": knowledge_base.stats(),
+        "snapshot_store": snapshot_store.stats(),
+        "frame_changes": frame_detector.stats(),
+        "embedding_cache": embeddings.stats(),
+        "retrieval": crop_search.stats(),
+        "area_cache": area_cache.stats(),
+        "weather": weather_service.stats(),
+        "memory": {**process_memory(), "session_memory": session_memory.stats()},
+        "agent_pipelines": pipelines.stats() if pipelines else None,
+        "vector_index": vectorstore.stats() if isinstance(vectorstore, NumpyVectorIndex) else {"backend": "chroma"},
+        "startup": resources.status()
+    }
+
 @app.get("/")
 async def root():
     """
@@ -0,0 +1,97 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+# Crop folders under VectorDB/Information_About_Crops/National Horticulture Board, keyed by the words used
+# in the classifier labels. Blueberry, Raspberry and Soybean have no folder and use the global search.
+CROP_FOLDERS = {
+    "apple": "Apple",
+    "cherry": "Cherry",
+    "corn": "Corn",
+    "maize": "Corn",
+    "grape": "Grape",
+    "orange": "Orange",
+    "citrus": "Orange",
+    "peach": "Peach",
+    "pepper": "Pepper",
+    "potato": "Potato",
+    "squash": "Squash",
+    "strawberry": "Strawberry",
+    "tomato": "Tomato",
+}
+
+
+def crop_for_label(label: str) -> Optional[str]:
+    """
+    Map a disease label (e.g. "Potato Late Blight", "Maize Common Rust") or crop name to its crop folder.
+
+    Returns:
+        The value of the chunks' `crop` metadata for that crop, or None if the corpus has no folder for it
+    """
+    for word in re.findall(r"[a-z]+", label.lower()):
+        # Accept plurals such as "grapes" or "tomatoes"
+        candidates = (word, word[:-1], word[:-2]) if word.endswith("s") else (word,)
+        for candidate in candidates:
+            if candidate in CROP_FOLDERS:
+                return CROP_FOLDERS[candidate]
+    return None
+
+
+class CropScopedSearch:
+    """
+    Similarity search restricted to one crop's chunks, with a fallback to the whole collection.
+
+    The search is first run with a metadata filter on `crop`. If that partition yields fewer than
+    `min_results` chunks it is considered too thin: the global results are appended (without duplicates)
+    up to `k`, and the crop is remembered so later retriever tools for it are not scoped.
+
+    Args:
+        min_results: Minimum number of filtered chunks for the crop partition to be used on its own
+    """
+
+    def __init__(self, min_results: int = 4):
+        self.min_results = max(1, int(min_results))
+        self.thin_crops = set()
+        self.scoped = 0
+        self.fallbacks = 0
+        self.unscoped = 0
+        self._lock = threading.Lock()
+
+    def search(self, vectorstore, query: str, k: int = 10, crop: Optional[str] = None) -> List[Any]:
+        """Return up to `k` documents, preferring chunks of `crop`. Blocking; run it in the I/O pool."""
+        if crop is None or crop in self.thin_crops:
+            self._count("unscoped")
+            return vectorstore.similarity_search(query, k=k)
+
+        results = vectorstore.similarity_search(query, k=k, filter={"crop": crop})
+        if len(results) >= self.min_results:
+            self._count("scoped")
+            return results
+
+        self._count("fallbacks")
+        with self._lock:
+            self.thin_crops.add(crop)
+        seen = {(doc.page_content, doc.metadata.get("file")) for doc in results}
+        for doc in vectorstore.similarity_search(query, k=k):
+            if len(results) >= k:
+                break
+            if (doc.page_content, doc.metadata.get("file")) not in seen:
+                results.append(doc)
+        return results
+
+    def is_scoped(self, crop: Optional[str]) -> bool:
+        """True if searches for `crop` are restricted to its partition."""
+        return crop is not None and crop not in self.thin_crops
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "min_results": self.min_results,
+            "scoped": self.scoped,
+            "fallbacks": self.fallbacks,
+            "unscoped": self.unscoped,
+            "thin_crops": sorted(self.thin_crops),
+        }
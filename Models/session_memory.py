@@ -0,0 +1,166 @@
+import os
+import resource
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SessionMemoryStore:
+    """
+    Conversation memory kept per session (client or device) under a global memory budget.
+
+    Each session keeps its last `window` exchanges, each message truncated to `max_message_chars`.
+    Sessions idle for longer than `idle_seconds` are dropped whenever an exchange is saved (or by
+    `evict_idle`), and when the store exceeds `max_sessions` or `max_bytes` the least recently used sessions
+    are dropped first. Sizes are counted as UTF-8 bytes of the stored text, so `max_bytes` bounds the
+    payload, not Python's per-object overhead.
+
+    Args:
+        window: Exchanges (user input + response) kept per session
+        idle_seconds: Sessions not used for this long are evicted
+        max_sessions: Maximum number of sessions kept
+        max_bytes: Maximum total size of the stored text
+        max_message_chars: Longer messages are truncated to this many characters
+    """
+
+    def __init__(self, window: int = 10, idle_seconds: float = 1800.0, max_sessions: int = 1000,
+                 max_bytes: int = 16 * 1024 * 1024, max_message_chars: int = 8000):
+        self.window = max(1, int(window))
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_bytes = max_bytes
+        self.max_message_chars = max_message_chars
+
+        # session id -> {"exchanges": deque of (user, response, bytes), "bytes": int, "used": float}, in LRU order
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.saves = 0
+        self.trimmed_exchanges = 0
+        self.idle_evictions = 0
+        self.capacity_evictions = 0
+
+    def save(self, session_id: str, user_input: str, response: str):
+        """Append an exchange to a session, trimming and evicting to stay within the limits."""
+        user_input = user_input[:self.max_message_chars]
+        response = response[:self.max_message_chars]
+        size = len(user_input.encode('utf-8')) + len(response.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self.saves += 1
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = {"exchanges": deque(), "bytes": 0, "used": now}
+            session["exchanges"].append((user_input, response, size))
+            session["bytes"] += size
+            session["used"] = now
+            self._bytes += size
+            while len(session["exchanges"]) > self.window:
+                _, _, dropped = session["exchanges"].popleft()
+                session["bytes"] -= dropped
+                self._bytes -= dropped
+                self.trimmed_exchanges += 1
+            self._sessions[session_id] = session
+            self._evict(now, keep=session_id)
+
+    def history(self, session_id: str) -> List[Tuple[str, str]]:
+        """Return a session's exchanges as (user input, response), oldest first."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session["used"] = time.time()
+            self._sessions.move_to_end(session_id)
+            return [(user, response) for user, response, _ in session["exchanges"]]
+
+    def clear(self, session_id: str):
+        """Forget a session."""
+        with self._lock:
+            self._drop(session_id)
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than `idle_seconds`. Returns how many were dropped."""
+        with self._lock:
+            return self._evict_idle(time.time())
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session["bytes"]
+
+    def _evict_idle(self, now: float) -> int:
+        evicted = 0
+        # Sessions are in least recently used order, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session["used"] <= self.idle_seconds:
+                break
+            self._drop(session_id)
+            evicted += 1
+        self.idle_evictions += evicted
+        return evicted
+
+    def _evict(self, now: float, keep: Optional[str] = None):
+        self._evict_idle(now)
+        while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                # Only the session just written is left; trim it instead
+                session = self._sessions[session_id]
+                if len(session["exchanges"]) <= 1:
+                    break
+                _, _, dropped = session["exchanges"].popleft()
+                session["bytes"] -= dropped
+                self._bytes -= dropped
+                self.trimmed_exchanges += 1
+                continue
+            self._drop(session_id)
+            self.capacity_evictions += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            exchanges = sum(len(session["exchanges"]) for session in self._sessions.values())
+            return {
+                "sessions": len(self._sessions),
+                "exchanges": exchanges,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_sessions": self.max_sessions,
+                "window": self.window,
+                "saves": self.saves,
+                "trimmed_exchanges": self.trimmed_exchanges,
+                "idle_evictions": self.idle_evictions,
+                "capacity_evictions": self.capacity_evictions,
+            }
+
+
+def render_history(exchanges: List[Tuple[str, str]], max_chars: int) -> str:
+    """
+    Format a session's exchanges (oldest first, as returned by `SessionMemoryStore.history`) for a prompt,
+    keeping the most recent exchanges whose text fits in `max_chars`. Returns an empty string when there is
+    no history or the budget is 0.
+    """
+    lines: List[str] = []
+    used = 0
+    for user, response in reversed(exchanges):
+        text = f"User: {user}\nAssistant: {response}"
+        if used + len(text) > max_chars:
+            break
+        lines.append(text)
+        used += len(text)
+    return "\n\n".join(reversed(lines))
+
+def process_memory() -> Dict[str, float]:
+    """Resident set size of this process and its peak, in MB (the current RSS falls back to the peak without /proc)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        rss = peak
+    return {"rss_mb": round(rss, 1), "peak_rss_mb": round(peak, 1)}
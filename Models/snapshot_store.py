@@ -0,0 +1,176 @@
+import asyncio
+import base64
+import datetime
+import itertools
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+
+class SnapshotEntry:
+    """
+    One analysed snapshot: the raw image bytes plus the prediction fields shown to the app.
+    """
+
+    def __init__(self, snapshot_id: int, device_id: str, image: bytes, prediction: Dict[str, Any], content_type: str = "image/jpeg",
+                 frame_hash: Optional[int] = None, instance: str = ""):
+        self.id = snapshot_id
+        self.instance = instance
+        self.device_id = device_id
+        self.image = image
+        self.content_type = content_type
+        self.prediction = prediction
+        self.frame_hash = frame_hash
+        self.job_id = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 1
+        self.size = 0
+
+    @property
+    def etag(self) -> str:
+        """
+        Entity tag that changes whenever the snapshot or its prediction changes. Ids restart at 1 with the
+        process, so the tag includes the store's instance nonce to stay unique across restarts.
+        """
+        return f'"{self.instance}-{self.id}-{self.version}"'
+
+    def image_data_url(self) -> str:
+        """Encode the image as a base64 data URL (done per response, never stored)."""
+        data64 = base64.b64encode(self.image).decode('utf-8')
+        return f"data:{self.content_type};base64,{data64}"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "snapshot_id": self.id,
+            "device": self.device_id,
+            "created_at": datetime.datetime.utcfromtimestamp(self.created_at).isoformat() + 'Z',
+            "image_bytes": len(self.image),
+            "prediction": self.prediction,
+        }
+
+
+class SnapshotStore:
+    """
+    Per-device ring buffers of recent analyses under a global memory budget.
+
+    Each device keeps its last `history_per_device` snapshots. When the total size of all stored
+    snapshots exceeds `max_bytes`, the oldest snapshots across all devices are evicted first.
+    The newest snapshot of the device being written is never evicted.
+
+    Args:
+        history_per_device: Number of analyses kept per device
+        max_bytes: Global memory budget for images and prediction text
+    """
+
+    def __init__(self, history_per_device: int = 10, max_bytes: int = 64 * 1024 * 1024):
+        self.history_per_device = max(1, int(history_per_device))
+        self.max_bytes = max(1, int(max_bytes))
+
+        self._devices: Dict[str, deque] = {}
+        self._entries: "OrderedDict[int, SnapshotEntry]" = OrderedDict()
+        self._ids = itertools.count(1)
+        # Random per process, so ETags issued before a restart never match snapshots created after it
+        self.instance = secrets.token_hex(4)
+        self._bytes = 0
+        self.evictions = 0
+        # Replaced on every change so waiters can block until the next one
+        self._changed = asyncio.Event()
+
+    def add(self, device_id: str, image: bytes, prediction: Dict[str, Any], content_type: str = "image/jpeg", frame_hash: Optional[int] = None) -> SnapshotEntry:
+        """Store a new analysis for a device and return its entry."""
+        entry = SnapshotEntry(next(self._ids), device_id, image, prediction, content_type, frame_hash, self.instance)
+        history = self._devices.setdefault(device_id, deque())
+        history.append(entry.id)
+        self._entries[entry.id] = entry
+        self._account(entry)
+
+        # Ring buffer per device
+        while len(history) > self.history_per_device:
+            self._remove(history[0])
+
+        # Global budget: drop the oldest snapshots across all devices
+        for old_id in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if old_id != entry.id:
+                self._remove(old_id)
+                self.evictions += 1
+        self._notify()
+        return entry
+
+    def update(self, entry: SnapshotEntry, fields: Dict[str, Any]):
+        """Update prediction fields of a stored entry (e.g. when background enrichment finishes)."""
+        entry.prediction.update(fields)
+        entry.version += 1
+        entry.updated_at = time.time()
+        if entry.id in self._entries:
+            self._account(entry)
+            self._notify()
+
+    async def wait_for_change(self, device_id: Optional[str], etag: Optional[str], timeout: float) -> Optional[SnapshotEntry]:
+        """
+        Wait until the latest snapshot of a device (any device if None) has an ETag different from `etag`.
+
+        Returns:
+            The new latest entry, or None if nothing changed within `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = self.latest(device_id)
+            if entry is not None and entry.etag != etag:
+                return entry
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def latest(self, device_id: Optional[str] = None) -> Optional[SnapshotEntry]:
+        """Return the newest snapshot of a device (of any device if `device_id` is None), or None."""
+        if device_id is None:
+            return self._entries[next(reversed(self._entries))] if self._entries else None
+        history = self._devices.get(device_id)
+        if not history:
+            return None
+        return self._entries[history[-1]]
+
+    def history(self, device_id: str) -> List[SnapshotEntry]:
+        """Return the stored snapshots of a device, newest first."""
+        return [self._entries[i] for i in reversed(self._devices.get(device_id, ()))]
+
+    def get(self, snapshot_id: int) -> Optional[SnapshotEntry]:
+        return self._entries.get(snapshot_id)
+
+    def devices(self) -> List[str]:
+        return list(self._devices)
+
+    def _account(self, entry: SnapshotEntry):
+        size = len(entry.image) + sum(len(str(v)) for v in entry.prediction.values())
+        self._bytes += size - entry.size
+        entry.size = size
+
+    def _remove(self, snapshot_id: int):
+        entry = self._entries.pop(snapshot_id)
+        self._bytes -= entry.size
+        history = self._devices[entry.device_id]
+        history.remove(snapshot_id)
+        if not history:
+            del self._devices[entry.device_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._devices),
+            "snapshots": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "history_per_device": self.history_per_device,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from knowledge_base import QUERY_TYPES
+from session_memory import process_memory
+
+
+async def run(args):
+    import httpx
+    import prediction_server as server
+    from disease_labels import labels
+    from load_test import install_fakes
+
+    logging.getLogger().setLevel(logging.WARNING)
+    install_fakes(server, args)
+    rng = random.Random(args.seed)
+    names = list(labels.values())
+    samples = []
+    done = 0
+    errors = 0
+
+    async def worker(count):
+        nonlocal done, errors
+        for _ in range(count):
+            session = f"soak-{rng.randrange(args.sessions)}"
+            body = {"disease_name": rng.choice(names), "query_type": rng.choice(QUERY_TYPES)}
+            if rng.random() < args.follow_up_rate:
+                body["follow_up"] = f"What should I do next about {body['disease_name']}?"
+            response = await client.post("/query_disease", json=body, headers={"X-Session-Id": session})
+            if response.status_code != 200:
+                errors += 1
+            done += 1
+            if done % args.sample_every == 0:
+                gc.collect()
+                samples.append({"requests": done, "rss_mb": process_memory()["rss_mb"], "sessions": len(server.session_memory)})
+            await asyncio.sleep(0)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.lifespan(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://soak", timeout=args.timeout) as client:
+            started = time.monotonic()
+            per_worker = args.requests // args.concurrency
+            await asyncio.gather(*[worker(per_worker) for _ in range(args.concurrency)])
+            duration = time.monotonic() - started
+            server_stats = (await client.get("/stats")).json()
+
+    # RSS growth after warm-up, as a least-squares slope over the remaining samples
+    steady = samples[len(samples) // 4:]
+    slope = None
+    if len(steady) >= 2:
+        x = np.array([s["requests"] for s in steady], dtype=float)
+        y = np.array([s["rss_mb"] for s in steady], dtype=float)
+        slope = round(float(np.polyfit(x, y, 1)[0]) * 1000, 3)
+    return {
+        "requests": done,
+        "errors": errors,
+        "duration_seconds": round(duration, 2),
+        "rss_mb": {"first": samples[0]["rss_mb"] if samples else None, "last": samples[-1]["rss_mb"] if samples else None},
+        "rss_growth_mb_per_1000_requests_after_warmup": slope,
+        "memory": server_stats.get("memory"),
+        "disease_info_cache": server_stats.get("disease_info_cache"),
+        "samples": samples,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak test: drive thousands of /query_disease requests and track RSS and session memory")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=2000, help="Distinct X-Session-Id values the requests are spread over")
+    parser.add_argument("--follow-up-rate", type=float, default=0.3, help="Fraction of requests that are follow-up questions")
+    parser.add_argument("--sample-every", type=int, default=250, help="Requests between RSS samples")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake Gemini call")
+    parser.add_argument("--corpus", default=os.path.join("VectorDB", "processed_documents.pkl"), help="Pickled chunks used as the vector store")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    # Settings install_fakes reads from the load test's arguments: external services answer immediately
+    for name in ("search_latency", "youtube_latency", "weather_latency", "geocoder_latency", "jitter", "failure_rate",
+                 "model_batch_latency", "model_item_latency"):
+        setattr(args, name, 0.0)
+
+    # Isolated, offline server with the disease cache disabled so every request runs the agent
+    scratch = tempfile.mkdtemp(prefix="agriguardian-soak-")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-soak-test")
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    os.environ["DISEASE_CACHE_PATH"] = ""
+    os.environ["AREA_CACHE_PATH"] = ""
+    os.environ["KNOWLEDGE_BASE_PATH"] = os.path.join(scratch, "knowledge_base.json")
+    os.environ["KNOWLEDGE_BASE_REFRESH_HOURS"] = "0"
+    os.environ["KNOWLEDGE_BASE_WARM_MINUTES"] = "0"
+    os.environ["DISEASE_CACHE_TTL_SECONDS"] = "0"
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ResourceNotReady(Exception):
+    """Raised when a resource is read synchronously before it has finished loading."""
+
+
+class ResourceRegistry:
+    """
+    Loads heavy resources (model, vector store, location, weather) concurrently in the background instead
+    of at import time, and records how long each one took.
+
+    Loaders are blocking functions run in an executor. A loader receives the values of the resources it
+    depends on as positional arguments. If a loader fails or exceeds its timeout, the resource's fallback
+    value is used when one is provided, so the server can still come up without network access.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._values: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, loader: Callable[..., Any], depends_on: Iterable[str] = (),
+                 fallback: Any = None, timeout: Optional[float] = None, executor=None):
+        """
+        Register a resource loader.
+
+        Args:
+            name: Resource name used with `get`
+            loader: Blocking function returning the resource, called with the values of `depends_on`
+            depends_on: Names of resources that must be loaded first
+            fallback: Value used if the loader raises or times out (None means the failure is raised to callers)
+            timeout: Seconds to wait for the loader before giving up
+            executor: Executor the loader runs in (default loop executor if None)
+        """
+        self._specs[name] = {
+            "loader": loader,
+            "depends_on": list(depends_on),
+            "fallback": fallback,
+            "timeout": timeout,
+            "executor": executor,
+        }
+        self._status[name] = {"status": "pending", "seconds": None, "error": None}
+
+    def start(self, names: Optional[Iterable[str]] = None):
+        """Start loading the given resources (all registered ones by default) concurrently in the background."""
+        for name in (names or list(self._specs)):
+            # Resources provided with `set` are not loaded
+            if name not in self._values:
+                self._ensure_task(name)
+
+    def _ensure_task(self, name: str) -> asyncio.Task:
+        if name not in self._specs:
+            raise KeyError(f"Unknown resource: {name}")
+        task = self._tasks.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load(name))
+            self._tasks[name] = task
+        return task
+
+    async def _load(self, name: str):
+        spec = self._specs[name]
+        deps = [await self.get(dep) for dep in spec["depends_on"]]
+
+        self._status[name]["status"] = "loading"
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            value = await asyncio.wait_for(
+                loop.run_in_executor(spec["executor"], spec["loader"], *deps),
+                timeout=spec["timeout"]
+            )
+            status = "ready"
+            error = None
+        except Exception as e:
+            error = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            if spec["fallback"] is None:
+                self._record(name, "failed", started, error)
+                logging.error(f"Resource '{name}' failed to load: {error}")
+                raise
+            logging.error(f"Resource '{name}' failed to load ({error}), using fallback")
+            value = spec["fallback"]
+            status = "fallback"
+
+        self._values[name] = value
+        self._record(name, status, started, error)
+        logging.info(f"Resource '{name}' {status} in {self._status[name]['seconds']}s")
+        return value
+
+    def _record(self, name: str, status: str, started: float, error: Optional[str]):
+        self._status[name].update({
+            "status": status,
+            "seconds": round(time.perf_counter() - started, 3),
+            "error": error,
+        })
+
+    async def get(self, name: str) -> Any:
+        """Return the resource, loading it now if it has not been started yet and waiting if it is in progress."""
+        if name in self._values:
+            return self._values[name]
+        return await asyncio.shield(self._ensure_task(name))
+
+    def get_nowait(self, name: str) -> Any:
+        """Return an already loaded resource, raising ResourceNotReady otherwise (for use from worker threads)."""
+        if name not in self._values:
+            raise ResourceNotReady(f"Resource '{name}' is not loaded yet")
+        return self._values[name]
+
+    def set(self, name: str, value: Any):
+        """Provide a resource value directly, bypassing its loader (e.g. to inject a stand-in)."""
+        self._values[name] = value
+        self._status.setdefault(name, {})
+        self._status[name].update({"status": "ready", "seconds": 0.0, "error": None})
+
+    def is_ready(self) -> bool:
+        """True once every registered resource has loaded (fallback values count as loaded)."""
+        return all(name in self._values for name in self._specs)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-resource load status and timing."""
+        return {name: dict(status) for name, status in self._status.items()}
+
+    async def stop(self):
+        """Cancel loaders that are still running."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,135 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class JsonFieldStream:
+    """
+    Incremental parser that yields the top-level fields of a JSON object as soon as each one is complete.
+
+    Text is fed in arbitrary chunks (e.g. LLM tokens). Anything before the first "{" (prose, a ```json
+    fence) is skipped. A string value is emitted as soon as its closing quote arrives; other values (numbers,
+    nested objects, lists) when the following "," or the closing "}" arrives. Nothing after the end of the
+    top-level object is parsed.
+    """
+
+    def __init__(self):
+        # Text from the start of the key or value being read (or from the last chunk when none is), and the
+        # absolute offset of its first character; everything before it has been parsed and is dropped
+        self._parts: List[str] = []
+        self._offset = 0
+        self._pos = 0  # number of characters scanned
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._token_start = None  # absolute offset where the current key or value starts
+        self._expect = "key"  # "key", "colon", "value" or "comma" at depth 1
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing brace of the top-level object has been seen."""
+        return self._finished
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of text. Only the new text is scanned, and only an unfinished key or value is kept, so
+        feeding a long generation token by token takes linear time.
+
+        Returns:
+            (field, value) pairs completed by this chunk, in order
+        """
+        if self._finished or not text:
+            return []
+        self._parts.append(text)
+        fields = []
+
+        for index, char in enumerate(text):
+            pos = self._pos + index
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect == "key":
+                            self._key = json.loads(self._token(pos + 1))
+                            self._expect = "colon"
+                        elif self._expect == "value":
+                            fields.append((self._key, json.loads(self._token(pos + 1))))
+                            self._expect = "comma"
+                        self._token_start = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value"):
+                    self._token_start = pos
+            elif self._depth == 1 and self._expect == "colon":
+                if char == ":":
+                    self._expect = "value"
+                    self._token_start = None
+            elif char in "{[":
+                if self._depth == 1 and self._expect == "value" and self._token_start is None:
+                    self._token_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_scalar(pos, fields)
+                    self._finished = True
+                    self._parts = []
+                    self._pos = pos + 1
+                    return fields
+            elif char == "," and self._depth == 1:
+                self._complete_scalar(pos, fields)
+                self._expect = "key"
+            elif self._depth == 1 and self._expect == "value" and self._token_start is None and not char.isspace():
+                # Start of a number, true, false or null
+                self._token_start = pos
+
+        self._pos += len(text)
+        if self._token_start is None:
+            self._parts = []
+            self._offset = self._pos
+        elif self._token_start > self._offset:
+            # Drop the parsed text in front of the current token
+            data = "".join(self._parts)[self._token_start - self._offset:]
+            self._parts = [data]
+            self._offset = self._token_start
+        return fields
+
+    def _token(self, end: int) -> str:
+        """Text of the current key or value, from its start up to absolute offset `end` (exclusive)."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0][self._token_start - self._offset:end - self._offset]
+
+    def _complete_scalar(self, pos: int, fields: List[Tuple[str, Any]]):
+        """Emit a non-string value ending just before `pos` (string values are emitted at their closing quote)."""
+        if self._expect != "value" or self._token_start is None:
+            return
+        try:
+            fields.append((self._key, json.loads(self._token(pos))))
+        except ValueError:
+            pass
+        self._expect = "comma"
+        self._token_start = None
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Format one server-sent event with a JSON payload."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
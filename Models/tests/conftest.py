@@ -0,0 +1,21 @@
+import importlib.util
+import os
+import sys
+
+MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VECTORDB_DIR = os.path.join(MODELS_DIR, "VectorDB")
+
+# The server modules import each other by bare name, as when run from Models/
+for path in (MODELS_DIR, VECTORDB_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_vectordb_main():
+    """Import VectorDB/main.py under its own name (Models/main.py is the benchmark)."""
+    if "vectordb_main" not in sys.modules:
+        spec = importlib.util.spec_from_file_location("vectordb_main", os.path.join(VECTORDB_DIR, "main.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["vectordb_main"] = module
+    return sys.modules["vectordb_main"]
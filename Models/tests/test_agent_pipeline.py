@@ -0,0 +1,63 @@
+import pytest
+
+from agent_pipeline import NOT_AVAILABLE, AgentPipeline, PipelineRegistry, parse_json_object, response_text
+
+
+def test_parse_plain_object():
+    assert parse_json_object('{"a": 1}') == {"a": 1}
+
+
+def test_parse_code_fence_and_prose():
+    text = 'Sure! ```json\n{"about": "x", "list": [1, 2]}\n``` Let me know {if} you need more.'
+    assert parse_json_object(text) == {"about": "x", "list": [1, 2]}
+
+
+def test_parse_skips_braces_that_are_not_json():
+    assert parse_json_object('Use {caution} here: {"a": {"b": 2}}') == {"a": {"b": 2}}
+
+
+def test_parse_escaped_quotes():
+    assert parse_json_object(r'{\"a\": \"b\"}') == {"a": "b"}
+
+
+def test_parse_agent_response_dict():
+    assert parse_json_object({"output": '{"a": 1}'}) == {"a": 1}
+    assert parse_json_object({"a": 1}) == {"a": 1}
+
+
+def test_parse_raises_without_object():
+    with pytest.raises(ValueError):
+        parse_json_object("no json here [1, 2]")
+
+
+def test_response_text():
+    assert response_text({"output": "answer"}) == "answer"
+    assert response_text({"text": "answer", "output": "other"}) == "answer"
+    assert response_text("plain") == "plain"
+
+
+def make_pipeline():
+    return AgentPipeline("disease", "system {agent_scratchpad}", ["about", "causes", "recommended_crops"], llm=None,
+                         tools=[], query_fields=["about", "causes"])
+
+
+def test_query_type_gates_query_fields_only():
+    pipeline = make_pipeline()
+    assert pipeline.wants("about", "about")
+    assert not pipeline.wants("causes", "about")
+    assert pipeline.wants("causes", "all")
+    assert pipeline.wants("recommended_crops", "about")
+    assert not pipeline.wants("unknown")
+
+
+def test_extract_fills_missing_and_unwanted_fields():
+    data = {"about": "a", "causes": "c", "extra": "x"}
+    assert make_pipeline().extract(data, "about") == {"about": "a", "causes": NOT_AVAILABLE, "recommended_crops": NOT_AVAILABLE}
+
+
+def test_registry():
+    pipeline = make_pipeline()
+    registry = PipelineRegistry([pipeline])
+    assert registry["disease"] is pipeline
+    assert registry.names() == ["disease"]
+    assert registry.stats()["disease"]["runs"] == 0
@@ -0,0 +1,59 @@
+import time
+
+from area_cache import AreaLookupCache, geohash
+
+
+def test_geohash_reference_value():
+    # Example from the geohash specification
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_geohash_nearby_points_share_a_cell():
+    assert geohash(40.7128, -74.0060) == geohash(40.7130, -74.0058)
+    assert geohash(40.7128, -74.0060) != geohash(34.0522, -118.2437)
+    assert len(geohash(0.0, 0.0, 7)) == 7
+
+
+def test_area_cache_fetches_once():
+    cache = AreaLookupCache(persist_path=None)
+    calls = []
+    fetch = lambda: calls.append(1) or "Paris"
+    assert cache.get_or_fetch("city:u09", fetch) == "Paris"
+    assert cache.get_or_fetch("city:u09", fetch) == "Paris"
+    assert len(calls) == 1
+
+
+def test_area_cache_does_not_cache_failures():
+    cache = AreaLookupCache(persist_path=None)
+
+    def fail():
+        raise ConnectionError("offline")
+
+    try:
+        cache.get_or_fetch("city:u09", fail)
+    except ConnectionError:
+        pass
+    assert cache.get_or_fetch("city:u09", lambda: "Paris") == "Paris"
+
+
+def test_area_cache_retries_rejected_results_after_negative_ttl():
+    cache = AreaLookupCache(persist_path=None, negative_ttl_seconds=0.05)
+    is_valid = lambda city: city != "Unknown"
+    assert cache.get_or_fetch("city:u09", lambda: "Unknown", is_valid) == "Unknown"
+    # Reused while recent, retried afterwards
+    assert cache.get_or_fetch("city:u09", lambda: "Paris", is_valid) == "Unknown"
+    time.sleep(0.1)
+    assert cache.get_or_fetch("city:u09", lambda: "Paris", is_valid) == "Paris"
+    assert cache.stats()["rejected"] == 1
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_area_cache_refresh_keeps_good_value_over_rejected_one():
+    cache = AreaLookupCache(ttl_seconds=0.05, persist_path=None)
+    is_valid = lambda city: city != "Unknown"
+    cache.get_or_fetch("city:u09", lambda: "Paris", is_valid)
+    time.sleep(0.1)
+    # Stale: served as is and refreshed inline (no executor)
+    assert cache.get_or_fetch("city:u09", lambda: "Unknown", is_valid) == "Paris"
+    assert cache.get_or_fetch("city:u09", lambda: "Unknown", is_valid) == "Paris"
+    assert cache.stats()["refresh_failures"] >= 1
@@ -0,0 +1,58 @@
+import time
+
+from cache import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache(max_entries=4, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.set("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_misses_but_can_be_peeked():
+    cache = TTLCache(ttl_seconds=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a", "default") == "default"
+    assert cache.peek("a") == (1, False)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_delete_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    TTLCache(persist_path=path).set("a", [1, 2])
+    reopened = TTLCache(persist_path=path)
+    assert reopened.get("a") == [1, 2]
+    assert reopened.stats()["persistent"]
+
+
+def test_evicted_entries_are_removed_from_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TTLCache(max_entries=1, persist_path=path)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert TTLCache(persist_path=path).get("a") is None
@@ -0,0 +1,98 @@
+import numpy as np
+
+from dedup import ChunkDeduplicator, compact_store, normalize
+
+PARAGRAPH = (
+    "Late blight spreads quickly in cool, wet weather. Remove infected leaves, avoid overhead watering "
+    "and apply a copper based fungicide every seven to ten days while conditions favour the disease."
+)
+
+
+class InMemoryStore:
+    """The slice of the Chroma API compact_store uses."""
+
+    def __init__(self, rows):
+        self.rows = dict(rows)  # id -> (text, metadata)
+
+    def get(self, include):
+        ids = list(self.rows)
+        return {
+            "ids": ids,
+            "documents": [self.rows[i][0] for i in ids],
+            "metadatas": [self.rows[i][1] for i in ids],
+            "embeddings": np.zeros((len(ids), 4)),
+        }
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.rows[doc_id]
+
+
+def test_normalize_ignores_case_and_punctuation():
+    assert normalize("Late  Blight!\n(Potato)") == "late blight potato"
+
+
+def test_exact_duplicate_after_normalization():
+    dedup = ChunkDeduplicator()
+    assert dedup.add(PARAGRAPH, key="a") is None
+    assert dedup.add(PARAGRAPH.upper() + "  ", key="b") == "exact"
+    assert dedup.duplicate_of == {"b": "a"}
+
+
+def test_near_duplicate():
+    dedup = ChunkDeduplicator()
+    dedup.add(PARAGRAPH, key="a")
+    assert dedup.add(PARAGRAPH.replace("seven to ten", "seven or ten"), key="b") == "near"
+    assert dedup.duplicate_of["b"] == "a"
+
+
+def test_distinct_chunks_are_kept():
+    dedup = ChunkDeduplicator()
+    assert dedup.add(PARAGRAPH, key="a") is None
+    assert dedup.add("Apple scab shows olive green spots on leaves and fruit in spring.", key="b") is None
+    stats = dedup.stats()
+    assert stats["chunks_kept"] == 2
+    assert stats["reduction"] == 0.0
+    assert dedup.duplicate_of == {}
+
+
+def test_many_chunks_grow_the_signature_table():
+    rng = np.random.default_rng(0)
+    texts = ["".join(rng.choice(list("abcdefghij "), size=80)) for _ in range(1500)]
+    dedup = ChunkDeduplicator()
+    for i, text in enumerate(texts):
+        assert dedup.add(text, key=i) is None
+    assert dedup.add(texts[1499], key="again") == "exact"
+    assert dedup.duplicate_of["again"] == 1499
+
+
+def test_keys_are_optional():
+    dedup = ChunkDeduplicator()
+    dedup.add(PARAGRAPH)
+    assert dedup.add(PARAGRAPH) == "exact"
+    assert dedup.duplicate_of == {}
+
+
+def test_compact_store_moves_removed_chunks_to_duplicate_of():
+    store = InMemoryStore({
+        "a1": (PARAGRAPH, {"file": "a.pdf"}),
+        "a2": ("Apple scab shows olive green spots on leaves and fruit in spring.", {"file": "a.pdf"}),
+        "b1": (PARAGRAPH, {"file": "b.pdf"}),
+    })
+    manifest = {
+        "a.pdf": {"sha256": "1", "chunk_ids": ["a1", "a2"], "duplicate_of": {}},
+        "b.pdf": {"sha256": "2", "chunk_ids": ["b1"], "duplicate_of": {}},
+    }
+    report = compact_store(store, ChunkDeduplicator(), manifest=manifest)
+    assert sorted(store.rows) == ["a1", "a2"]
+    assert manifest["b.pdf"] == {"sha256": "2", "chunk_ids": [], "duplicate_of": {"b1": "a1"}}
+    assert report["embedding_calls_saved"] == 1
+    assert report["index_bytes_after"] < report["index_bytes_before"]
+
+
+def test_compact_store_dry_run_changes_nothing():
+    store = InMemoryStore({"a1": (PARAGRAPH, {"file": "a.pdf"}), "b1": (PARAGRAPH, {"file": "b.pdf"})})
+    manifest = {"b.pdf": {"sha256": "2", "chunk_ids": ["b1"]}}
+    compact_store(store, ChunkDeduplicator(), dry_run=True, manifest=manifest)
+    assert sorted(store.rows) == ["a1", "b1"]
+    assert manifest["b.pdf"]["chunk_ids"] == ["b1"]
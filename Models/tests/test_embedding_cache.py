@@ -0,0 +1,93 @@
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic 3-dimensional vectors from the text length and first character."""
+
+    model = "counting"
+
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def vector(self, text, kind):
+        return [float(len(text)), float(ord(text[0]) if text else 0), 1.0 if kind == "query" else 0.0]
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [self.vector(text, "document") for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.vector(text, "query")
+
+
+def test_query_is_embedded_once():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path="")
+    first = cache.embed_query("apple scab")
+    assert cache.embed_query("apple scab") == first == inner.vector("apple scab", "query")
+    assert inner.queries == ["apple scab"]
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["memory_hits"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_queries_and_documents_are_cached_separately():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path="")
+    cache.embed_query("rust")
+    assert cache.embed_documents(["rust"]) == [inner.vector("rust", "document")]
+    assert inner.documents == ["rust"]
+
+
+def test_documents_embed_only_distinct_missing_texts():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path="")
+    cache.embed_documents(["a", "bb"])
+    vectors = cache.embed_documents(["bb", "ccc", "ccc", "a"])
+    assert inner.documents == ["a", "bb", "ccc"]
+    assert [v[0] for v in vectors] == [2.0, 3.0, 3.0, 1.0]
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddings(CountingEmbeddings(), path=path).embed_query("blight")
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path=path)
+    assert cache.embed_query("blight") == inner.vector("blight", "query")
+    assert inner.queries == []
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_model_name_is_part_of_the_key(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddings(CountingEmbeddings(), path=path, model_name="old-model").embed_query("blight")
+    inner = CountingEmbeddings()
+    CachedEmbeddings(inner, path=path, model_name="new-model").embed_query("blight")
+    assert inner.queries == ["blight"]
+
+
+def test_memory_lru_is_bounded():
+    cache = CachedEmbeddings(CountingEmbeddings(), path="", memory_entries=2)
+    for text in ["a", "bb", "ccc"]:
+        cache.embed_query(text)
+    assert cache.stats()["memory_entries"] == 2
+    cache.embed_query("a")
+    # Evicted from memory, still on disk
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_store_is_trimmed_by_least_recent_use():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path="", max_entries=3, memory_entries=0)
+    for text in ["a", "bb", "ccc"]:
+        cache.embed_query(text)
+    cache.embed_query("a")  # refresh "a" so "bb" is the least recently used
+    cache.embed_query("dddd")
+    assert cache.stats()["entries"] == 3
+    inner.queries.clear()
+    cache.embed_query("a")
+    cache.embed_query("bb")
+    assert inner.queries == ["bb"]
@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from image_processing import (
+    FrameChangeDetector, MODEL_INPUT_SIZE, decode_for_model, decode_for_model_reference, difference_hash,
+    hamming_distance,
+)
+
+
+def gradient_frame(width=640, height=480, flip=False):
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    if flip:
+        x = x[::-1]
+    y = np.linspace(0, 128, height, dtype=np.float32)[:, None]
+    red = np.clip(x[None, :] * 0.5 + y, 0, 255)
+    frame = np.stack([red, np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width))], axis=-1)
+    return frame.astype(np.uint8)
+
+
+def encode(frame, quality=90):
+    bio = io.BytesIO()
+    Image.fromarray(frame).save(bio, format="JPEG", quality=quality)
+    return bio.getvalue()
+
+
+def test_decode_for_model_shape_and_range():
+    arr, content_type = decode_for_model(encode(gradient_frame(1600, 1200)))
+    assert arr.shape == (MODEL_INPUT_SIZE[1], MODEL_INPUT_SIZE[0], 3)
+    assert arr.dtype == np.float32
+    assert 0.0 <= arr.min() and arr.max() <= 1.0
+    assert content_type == "image/jpeg"
+
+
+def test_decode_for_model_is_close_to_reference():
+    buf = encode(gradient_frame(1600, 1200))
+    fast, _ = decode_for_model(buf)
+    reference, _ = decode_for_model_reference(buf)
+    assert np.abs(fast - reference).mean() < 0.02
+
+
+def test_decode_for_model_png():
+    bio = io.BytesIO()
+    Image.fromarray(gradient_frame(300, 200)).save(bio, format="PNG")
+    arr, content_type = decode_for_model(bio.getvalue())
+    assert arr.shape == (MODEL_INPUT_SIZE[1], MODEL_INPUT_SIZE[0], 3)
+    assert content_type == "image/png"
+
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(5, 5) == 0
+
+
+def test_difference_hash_is_stable_under_jpeg_noise():
+    frame = gradient_frame()
+    a, _ = decode_for_model(encode(frame, quality=95))
+    b, _ = decode_for_model(encode(frame, quality=60))
+    assert hamming_distance(difference_hash(a), difference_hash(b)) <= 4
+
+
+def test_difference_hash_separates_different_frames():
+    a, _ = decode_for_model(encode(gradient_frame()))
+    b, _ = decode_for_model(encode(gradient_frame(flip=True)))
+    assert hamming_distance(difference_hash(a), difference_hash(b)) > 20
+
+
+def test_difference_hash_size():
+    frame = np.random.default_rng(0).random((64, 64, 3), dtype=np.float32)
+    assert difference_hash(frame, hash_size=4) < 1 << 16
+
+
+def test_change_detector():
+    detector = FrameChangeDetector(threshold=4, max_age_seconds=60)
+    assert not detector.is_unchanged(None, 0, 0b1)
+    assert detector.is_unchanged(0b1111, 10, 0b0111)
+    assert not detector.is_unchanged(0b11111, 10, 0b0)
+    assert not detector.is_unchanged(0b1, 120, 0b1)
+    assert detector.stats()["skipped"] == 1
+    assert detector.stats()["processed"] == 3
+
+
+def test_change_detector_negative_threshold_disables_skipping():
+    assert not FrameChangeDetector(threshold=-1).is_unchanged(0b1, 0, 0b1)
@@ -0,0 +1,123 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from inference import BatchInferenceEngine
+
+
+class RecordingModel:
+    """Returns each image's first pixel as its output row and remembers the batch sizes it saw."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batch_sizes = []
+
+    def predict_on_batch(self, batch):
+        self.batch_sizes.append(len(batch))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return batch[:, 0, 0, :]
+
+
+def image(value):
+    return np.full((4, 4, 3), value, dtype=np.float32)
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_every_caller_gets_its_own_row():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(), max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(engine.predict(image(i)) for i in range(5)))
+        await engine.stop()
+        return engine, results
+
+    engine, results = run(scenario)
+    assert [float(row[0]) for row in results] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert engine.model.batch_sizes == [5]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(), max_batch_size=4, max_wait_ms=50)
+        await asyncio.gather(*(engine.predict(image(i)) for i in range(10)))
+        await engine.stop()
+        return engine
+
+    engine = run(scenario)
+    assert max(engine.model.batch_sizes) == 4
+    assert sum(engine.model.batch_sizes) == 10
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(), max_batch_size=16, max_wait_ms=20)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(engine.predict(image(1)), engine.predict(image(2)))
+        elapsed = loop.time() - started
+        await engine.stop()
+        return engine, elapsed
+
+    engine, elapsed = run(scenario)
+    assert engine.model.batch_sizes == [2]
+    assert elapsed < 1.0
+
+
+def test_single_image_batch_of_one_is_accepted():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel())
+        row = await engine.predict(image(3)[np.newaxis])
+        with pytest.raises(ValueError):
+            await engine.predict(np.stack([image(1), image(2)]))
+        await engine.stop()
+        return row
+
+    assert float(run(scenario)[0]) == 3.0
+
+
+def test_model_error_fails_every_future_in_the_batch():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(fail=True), max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(engine.predict(image(i)) for i in range(3)), return_exceptions=True)
+        await engine.stop()
+        return engine, results
+
+    engine, results = run(scenario)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert engine.stats()["errors"] == 1
+
+
+def test_mismatched_shape_fails_its_batch_and_keeps_the_worker():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(), max_batch_size=8, max_wait_ms=20)
+        bad = await asyncio.gather(engine.predict(image(1)), engine.predict(np.zeros((5, 5, 3), np.float32)),
+                                   return_exceptions=True)
+        good = await asyncio.wait_for(engine.predict(image(7)), timeout=2)
+        await engine.stop()
+        return bad, good
+
+    bad, good = run(scenario)
+    assert all(isinstance(r, ValueError) for r in bad)
+    assert float(good[0]) == 7.0
+
+
+def test_stats_counters():
+    async def scenario():
+        engine = BatchInferenceEngine(RecordingModel(), max_batch_size=2, max_wait_ms=20)
+        await asyncio.gather(*(engine.predict(image(i)) for i in range(4)))
+        await engine.predict(image(9))
+        await engine.stop()
+        return engine.stats()
+
+    stats = run(scenario)
+    assert stats["requests"] == 5
+    assert stats["batches"] == 3
+    assert stats["batch_size_histogram"] == {"1": 1, "2": 2}
+    assert stats["avg_batch_size"] == pytest.approx(5 / 3)
+    assert stats["errors"] == 0
+    assert stats["queue_wait_ms"]["max"] >= 0.0
+    assert stats["model_time_ms"]["avg"] >= 0.0
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from jobs import JobQueue, JobQueueFull
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+async def wait_until_done(queue, *jobs):
+    for _ in range(200):
+        if all(queue.get(job.id).status in ("done", "failed", "superseded") for job in jobs):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+def test_job_result_and_failure():
+    async def scenario():
+        queue = JobQueue(concurrency=1)
+
+        async def ok(job):
+            job.update("working", 0.5)
+            return {"answer": 42}
+
+        async def boom(job):
+            raise RuntimeError("no model")
+
+        good = await queue.submit("enrich", ok, snapshot_id=1)
+        bad = await queue.submit("enrich", boom)
+        await wait_until_done(queue, good, bad)
+        await queue.stop()
+        return queue, good, bad
+
+    queue, good, bad = run(scenario)
+    assert good.status == "done" and good.result == {"answer": 42} and good.progress == 1.0
+    assert good.to_dict()["metadata"] == {"snapshot_id": 1}
+    assert bad.status == "failed" and bad.error == "no model"
+    assert queue.stats()["completed"] == 1 and queue.stats()["failed"] == 1
+
+
+def test_jobs_with_same_key_replace_each_other_while_queued():
+    async def scenario():
+        queue = JobQueue(concurrency=1)
+        release = asyncio.Event()
+        ran = []
+
+        async def blocker(job):
+            await release.wait()
+
+        def work(name):
+            async def func(job):
+                ran.append(name)
+            return func
+
+        running = await queue.submit("enrich", blocker)
+        await asyncio.sleep(0.01)
+        first = await queue.submit("enrich", work("first"), coalesce_key="cam1")
+        second = await queue.submit("enrich", work("second"), coalesce_key="cam1")
+        other = await queue.submit("enrich", work("other"), coalesce_key="cam2")
+        queued = queue.stats()["queued"]
+        release.set()
+        await wait_until_done(queue, running, first, second, other)
+        await queue.stop()
+        return queue, first, second, ran, queued
+
+    queue, first, second, ran, queued = run(scenario)
+    assert queued == 2
+    assert first.status == "superseded" and second.id in first.error
+    assert second.status == "done"
+    assert ran == ["second", "other"]
+    assert queue.stats()["superseded"] == 1
+
+
+def test_full_queue_rejects_new_jobs_but_not_replacements():
+    async def scenario():
+        queue = JobQueue(concurrency=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def blocker(job):
+            await release.wait()
+
+        await queue.submit("enrich", blocker)
+        await asyncio.sleep(0.01)
+        await queue.submit("enrich", blocker, coalesce_key="cam1")
+        with pytest.raises(JobQueueFull):
+            await queue.submit("enrich", blocker, coalesce_key="cam2")
+        await queue.submit("enrich", blocker, coalesce_key="cam1")
+        release.set()
+        await queue.stop()
+        return queue
+
+    assert run(scenario).stats()["rejected"] == 1
+
+
+def test_cancelled_job_does_not_stop_the_worker():
+    async def scenario():
+        queue = JobQueue(concurrency=1)
+
+        async def cancelled(job):
+            future = asyncio.get_running_loop().create_future()
+            future.cancel()
+            await future
+
+        async def ok(job):
+            return "ok"
+
+        first = await queue.submit("enrich", cancelled)
+        second = await queue.submit("enrich", ok)
+        await wait_until_done(queue, first, second)
+        await queue.stop()
+        return first, second
+
+    first, second = run(scenario)
+    assert first.status == "failed" and first.error == "Job cancelled"
+    assert second.status == "done"
+
+
+def test_stop_fails_queued_jobs():
+    async def scenario():
+        queue = JobQueue(concurrency=1)
+        release = asyncio.Event()
+
+        async def blocker(job):
+            await release.wait()
+
+        await queue.submit("enrich", blocker)
+        await asyncio.sleep(0.01)
+        waiting = await queue.submit("enrich", blocker, coalesce_key="cam1")
+        await queue.stop()
+        return waiting
+
+    waiting = run(scenario)
+    assert waiting.status == "failed" and waiting.error == "Job queue stopped"
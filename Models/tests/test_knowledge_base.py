@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+from knowledge_base import KNOWLEDGE_BASE_FORMAT, KnowledgeBase, precompute
+
+
+def make_kb(tmp_path, version="v1", max_age_seconds=3600):
+    return KnowledgeBase(str(tmp_path / "kb.json"), version=version, max_age_seconds=max_age_seconds)
+
+
+def test_put_get_is_case_insensitive(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Tomato Early Blight", "about", {"about": "x"})
+    assert kb.get("tomato early blight ", "about") == {"about": "x"}
+    assert kb.get("Tomato Early Blight", "causes") is None
+    assert kb.stats()["hits"] == 1 and kb.stats()["misses"] == 1
+
+
+def test_returned_info_is_a_copy(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Apple Scab", "all", {"about": "x"})
+    kb.get("Apple Scab", "all")["about"] = "changed"
+    assert kb.get("Apple Scab", "all") == {"about": "x"}
+
+
+def test_conditions_buckets_are_separate_entries(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Apple Scab", "all", {"about": "general"})
+    kb.put("Apple Scab", "all", {"about": "warm"}, conditions="temperature=24.0")
+    assert kb.get("Apple Scab", "all") == {"about": "general"}
+    assert kb.get("Apple Scab", "all", "temperature=24.0") == {"about": "warm"}
+    assert kb.get("Apple Scab", "all", "temperature=26.0") is None
+    assert kb.stats()["condition_buckets"] == 1
+
+
+def test_drop_conditions_keeps_general_entries_and_the_current_bucket(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Apple Scab", "all", {})
+    kb.put("Apple Scab", "all", {}, conditions="a")
+    kb.put("Apple Scab", "all", {}, conditions="b")
+    assert kb.drop_conditions(keep="b") == 1
+    assert kb.get("Apple Scab", "all") is not None
+    assert kb.get("Apple Scab", "all", "b") is not None
+    assert kb.get("Apple Scab", "all", "a") is None
+
+
+def test_old_entries_are_stale_misses(tmp_path):
+    kb = make_kb(tmp_path, max_age_seconds=60)
+    kb.put("Apple Scab", "all", {"about": "x"})
+    kb.entries[kb.key("Apple Scab", "all")]["generated_at"] = time.time() - 120
+    assert kb.is_stale("Apple Scab", "all")
+    assert kb.get("Apple Scab", "all") is None
+    assert kb.stats()["stale_misses"] == 1
+    assert kb.stats()["stale_entries"] == 1
+
+
+def test_entries_from_another_version_are_stale(tmp_path):
+    kb = make_kb(tmp_path, version="v1")
+    kb.put("Apple Scab", "all", {"about": "x"})
+    kb.save()
+    reloaded = make_kb(tmp_path, version="v2").load()
+    assert len(reloaded.entries) == 1
+    assert reloaded.is_stale("Apple Scab", "all")
+    assert reloaded.get("Apple Scab", "all") is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Apple Scab", "all", {"about": "x"}, conditions="temperature=24.0")
+    kb.save()
+    with open(kb.path, encoding="utf-8") as f:
+        assert json.load(f)["format"] == KNOWLEDGE_BASE_FORMAT
+    assert make_kb(tmp_path).load().get("Apple Scab", "all", "temperature=24.0") == {"about": "x"}
+
+
+def test_missing_or_corrupt_artifact_loads_empty(tmp_path):
+    assert make_kb(tmp_path).load().entries == {}
+    (tmp_path / "kb.json").write_text("{not json")
+    assert make_kb(tmp_path).load().entries == {}
+
+
+def test_precompute_fills_stale_pairs_and_skips_fresh_ones(tmp_path):
+    kb = make_kb(tmp_path)
+    kb.put("Apple Scab", "about", {"about": "kept"})
+    calls = []
+
+    async def generate(disease_name, query_type):
+        calls.append((disease_name, query_type))
+        await asyncio.sleep(0)
+        return {"about": f"{disease_name} {query_type}", "_complete": True}
+
+    summary = asyncio.run(precompute(kb, generate, ["Apple Scab", "Corn Rust"], ["about", "all"], save_every=2))
+    assert summary["total"] == 4 and summary["skipped"] == 1 and summary["generated"] == 3
+    assert ("Apple Scab", "about") not in calls
+    assert kb.get("Apple Scab", "about") == {"about": "kept"}
+    assert kb.get("Corn Rust", "all") == {"about": "Corn Rust all"}
+    assert len(make_kb(tmp_path).load().entries) == 4
+
+
+def test_precompute_does_not_store_failures_or_fallbacks(tmp_path):
+    kb = make_kb(tmp_path)
+
+    async def generate(disease_name, query_type):
+        if disease_name == "Broken":
+            raise RuntimeError("agent down")
+        return {"about": "fallback", "_complete": False}
+
+    summary = asyncio.run(precompute(kb, generate, ["Broken", "Apple Scab"], ["all"]))
+    assert summary["failed"] == 2 and summary["generated"] == 0
+    assert kb.entries == {}
+
+
+def test_precompute_stores_under_the_conditions_bucket(tmp_path):
+    kb = make_kb(tmp_path)
+
+    async def generate(disease_name, query_type):
+        return {"about": "warm"}
+
+    asyncio.run(precompute(kb, generate, ["Apple Scab"], ["all"], conditions="temperature=24.0"))
+    assert kb.get("Apple Scab", "all") is None
+    assert kb.get("Apple Scab", "all", "temperature=24.0") == {"about": "warm"}
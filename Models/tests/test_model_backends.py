@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+import model_backends
+from model_backends import TFLiteBackend, load_model_backend
+
+
+class IdentityInterpreter:
+    """
+    Stand-in for the TFLite interpreter of a (N, 4) -> (N, 4) identity model, with float32 or int8 tensors.
+    The int8 variant quantizes with the tensors' scale and zero point like a fully quantized model.
+    """
+
+    dtype = np.float32
+    input_quantization = (0.0, 0)
+    output_quantization = (0.0, 0)
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.shape = [1, 4]
+        self.allocations = 0
+        self.tensor = None
+
+    def allocate_tensors(self):
+        self.allocations += 1
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.shape), "dtype": self.dtype, "quantization": self.input_quantization}]
+
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array(self.shape), "dtype": self.dtype, "quantization": self.output_quantization}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = list(shape)
+
+    def set_tensor(self, index, value):
+        assert value.dtype == self.dtype and list(value.shape) == self.shape
+        self.tensor = value
+
+    def invoke(self):
+        pass
+
+    def get_tensor(self, index):
+        if self.dtype == np.float32:
+            return self.tensor
+        # Requantize the input values into the output tensor's scale
+        in_scale, in_zero = self.input_quantization
+        out_scale, out_zero = self.output_quantization
+        real = (self.tensor.astype(np.float32) - in_zero) * in_scale
+        return np.clip(np.round(real / out_scale + out_zero), -128, 127).astype(np.int8)
+
+
+class Int8Interpreter(IdentityInterpreter):
+    dtype = np.int8
+    input_quantization = (1.0 / 255.0, -128)
+    output_quantization = (1.0 / 256.0, -128)
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "model.tflite"
+    path.write_bytes(b"")
+    return str(path)
+
+
+def backend(monkeypatch, model_file, interpreter):
+    monkeypatch.setattr(model_backends, "_tflite_interpreter_class", lambda: interpreter)
+    return TFLiteBackend(model_file, num_threads=2)
+
+
+def test_float_model_passes_float32_through(monkeypatch, model_file):
+    model = backend(monkeypatch, model_file, IdentityInterpreter)
+    batch = np.random.default_rng(0).random((1, 4)).astype(np.float32)
+    np.testing.assert_array_equal(model.predict_on_batch(batch), batch)
+    assert model.input_dtype == "float32"
+    assert model.interpreter.num_threads == 2
+
+
+def test_int8_model_quantizes_input_and_dequantizes_output(monkeypatch, model_file):
+    model = backend(monkeypatch, model_file, Int8Interpreter)
+    batch = np.array([[0.0, 0.25, 0.5, 1.0]], dtype=np.float32)
+    output = model.predict_on_batch(batch)
+    assert output.dtype == np.float32
+    np.testing.assert_allclose(output, batch, atol=1 / 255 + 1 / 256)
+    assert model.stats()["input_dtype"] == "int8"
+
+
+def test_int8_inputs_outside_the_range_are_clipped(monkeypatch, model_file):
+    model = backend(monkeypatch, model_file, Int8Interpreter)
+    output = model.predict_on_batch(np.array([[-1.0, 2.0, 0.5, 0.5]], dtype=np.float32))
+    assert output[0, 0] == pytest.approx(0.0, abs=1 / 256)
+    assert output[0, 1] == pytest.approx(127 / 128 * 1.0 + 1 / 256, abs=1 / 128)
+
+
+def test_input_is_resized_only_when_the_batch_size_changes(monkeypatch, model_file):
+    model = backend(monkeypatch, model_file, IdentityInterpreter)
+    for size in (4, 4, 2, 2, 4):
+        assert model.predict_on_batch(np.zeros((size, 4), dtype=np.float32)).shape == (size, 4)
+    assert model.stats()["resizes"] == 3
+
+
+def test_invalid_thread_count_lets_tflite_decide(monkeypatch, model_file):
+    monkeypatch.setattr(model_backends, "_tflite_interpreter_class", lambda: IdentityInterpreter)
+    assert TFLiteBackend(model_file, num_threads=-1).num_threads is None
+
+
+def test_load_model_backend_errors(monkeypatch, model_file):
+    with pytest.raises(ValueError):
+        load_model_backend("onnx", model_file)
+    with pytest.raises(FileNotFoundError):
+        load_model_backend("tflite", model_file + ".missing")
+    monkeypatch.setattr(model_backends, "_tflite_interpreter_class", lambda: IdentityInterpreter)
+    assert load_model_backend("TFLite", model_file).name == "tflite"
@@ -0,0 +1,82 @@
+import pytest
+from langchain_core.documents import Document
+
+from disease_labels import labels
+from retrieval import CropScopedSearch, crop_for_label
+
+
+class InMemoryStore:
+    """Similarity search over fixed documents: returns them in order, filtered on metadata equality."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def similarity_search(self, query, k=4, filter=None):
+        self.calls.append(filter)
+        docs = [d for d in self.docs if not filter or all(d.metadata.get(key) == value for key, value in filter.items())]
+        return docs[:k]
+
+
+def doc(text, crop, file="a.pdf"):
+    return Document(page_content=text, metadata={"crop": crop, "file": file})
+
+
+@pytest.mark.parametrize("label, crop", [
+    ("Potato Late Blight", "Potato"),
+    ("Maize Common Rust", "Corn"),
+    ("Cedar Apple Rust", "Apple"),
+    ("Orange Citrus Greening", "Orange"),
+    ("Pepper Bell Bacterial Spot", "Pepper"),
+    ("Healthy Tomato", "Tomato"),
+    ("tomatoes", "Tomato"),
+    ("Grapes", "Grape"),
+    ("Healthy Blueberry", None),
+    ("Healthy Soybean", None),
+    ("", None),
+])
+def test_crop_for_label(label, crop):
+    assert crop_for_label(label) == crop
+
+
+def test_every_label_with_a_folder_maps_to_a_crop():
+    unmapped = {name for name in labels.values() if crop_for_label(name) is None}
+    assert unmapped == {"Healthy Blueberry", "Healthy Raspberry", "Healthy Soybean"}
+
+
+def test_scoped_search_uses_the_crop_filter():
+    store = InMemoryStore([doc(f"tomato {i}", "Tomato") for i in range(5)] + [doc("potato", "Potato")])
+    search = CropScopedSearch(min_results=4)
+    results = search.search(store, "blight", k=4, crop="Tomato")
+    assert [d.metadata["crop"] for d in results] == ["Tomato"] * 4
+    assert store.calls == [{"crop": "Tomato"}]
+    assert search.is_scoped("Tomato")
+    assert search.stats()["scoped"] == 1
+
+
+def test_thin_partition_falls_back_to_global_results_without_duplicates():
+    store = InMemoryStore([doc("peach 0", "Peach"), doc("apple 0", "Apple"), doc("apple 1", "Apple", "b.pdf")])
+    search = CropScopedSearch(min_results=2)
+    results = search.search(store, "spot", k=3, crop="Peach")
+    assert [d.page_content for d in results] == ["peach 0", "apple 0", "apple 1"]
+    assert store.calls == [{"crop": "Peach"}, None]
+    assert not search.is_scoped("Peach")
+    # Later searches for the thin crop go straight to the global search
+    search.search(store, "spot", k=3, crop="Peach")
+    assert store.calls[-1] is None
+    stats = search.stats()
+    assert stats["fallbacks"] == 1 and stats["unscoped"] == 1 and stats["thin_crops"] == ["Peach"]
+
+
+def test_fallback_stops_at_k():
+    store = InMemoryStore([doc("peach", "Peach")] + [doc(f"apple {i}", "Apple", f"{i}.pdf") for i in range(10)])
+    results = CropScopedSearch(min_results=4).search(store, "spot", k=3, crop="Peach")
+    assert len(results) == 3
+
+
+def test_no_crop_searches_globally():
+    store = InMemoryStore([doc("apple", "Apple")])
+    search = CropScopedSearch()
+    assert len(search.search(store, "spot", k=2)) == 1
+    assert store.calls == [None]
+    assert not search.is_scoped(None)
@@ -0,0 +1,69 @@
+import session_memory
+from session_memory import SessionMemoryStore, process_memory, render_history
+
+
+def test_each_session_keeps_a_window_of_exchanges():
+    store = SessionMemoryStore(window=2)
+    for i in range(3):
+        store.save("a", f"q{i}", f"r{i}")
+    store.save("b", "other", "answer")
+    assert store.history("a") == [("q1", "r1"), ("q2", "r2")]
+    assert store.history("b") == [("other", "answer")]
+    assert store.history("missing") == []
+    assert store.stats()["trimmed_exchanges"] == 1
+
+
+def test_least_recently_used_sessions_are_evicted_above_the_session_cap():
+    store = SessionMemoryStore(max_sessions=2)
+    store.save("a", "q", "r")
+    store.save("b", "q", "r")
+    store.history("a")  # reading a session counts as using it
+    store.save("c", "q", "r")
+    assert store.history("b") == []
+    assert len(store) == 2
+    assert store.stats()["capacity_evictions"] == 1
+
+
+def test_byte_budget_trims_the_current_session_when_it_is_the_only_one_left():
+    store = SessionMemoryStore(max_bytes=10)
+    store.save("a", "12345", "")
+    store.save("b", "123456", "")
+    assert store.history("a") == []
+    store.save("b", "78901", "")
+    assert store.history("b") == [("78901", "")]
+    assert store.stats()["bytes"] == 5
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_memory.time, "time", lambda: now[0])
+    store = SessionMemoryStore(idle_seconds=60)
+    store.save("old", "q", "r")
+    now[0] += 30
+    store.save("recent", "q", "r")
+    now[0] += 45
+    assert store.evict_idle() == 1
+    assert store.history("old") == []
+    assert store.history("recent") == [("q", "r")]
+
+
+def test_long_messages_are_truncated_and_sessions_can_be_cleared():
+    store = SessionMemoryStore(max_message_chars=4)
+    store.save("a", "question", "é" * 10)
+    assert store.history("a") == [("ques", "éééé")]
+    assert store.stats()["bytes"] == 4 + 8
+    store.clear("a")
+    assert len(store) == 0 and store.stats()["bytes"] == 0
+
+
+def test_render_history_keeps_the_most_recent_exchanges_within_the_budget():
+    exchanges = [("first", "1"), ("second", "2"), ("third", "3")]
+    assert render_history(exchanges, 1000) == "User: first\nAssistant: 1\n\nUser: second\nAssistant: 2\n\nUser: third\nAssistant: 3"
+    assert render_history(exchanges, 50) == "User: second\nAssistant: 2\n\nUser: third\nAssistant: 3"
+    assert render_history(exchanges, 0) == ""
+    assert render_history([], 1000) == ""
+
+
+def test_process_memory_reports_rss_in_mb():
+    memory = process_memory()
+    assert 0 < memory["rss_mb"] <= memory["peak_rss_mb"] + 1
@@ -0,0 +1,73 @@
+import asyncio
+
+from snapshot_store import SnapshotStore
+
+
+def test_history_per_device_is_a_ring_buffer():
+    store = SnapshotStore(history_per_device=2)
+    first = store.add("cam1", b"a", {})
+    second = store.add("cam1", b"b", {})
+    third = store.add("cam1", b"c", {})
+    store.add("cam2", b"d", {})
+    assert [e.id for e in store.history("cam1")] == [third.id, second.id]
+    assert store.get(first.id) is None
+    assert store.latest("cam1") is third
+    assert store.latest().device_id == "cam2"
+    assert sorted(store.devices()) == ["cam1", "cam2"]
+
+
+def test_global_budget_evicts_oldest_but_never_the_new_snapshot():
+    store = SnapshotStore(max_bytes=10)
+    old = store.add("cam1", b"x" * 6, {})
+    new = store.add("cam2", b"y" * 6, {})
+    assert store.get(old.id) is None
+    assert store.get(new.id) is new
+    big = store.add("cam3", b"z" * 50, {})
+    assert store.latest("cam3") is big
+    assert store.stats()["evictions"] == 2
+
+
+def test_update_changes_size_and_version():
+    store = SnapshotStore()
+    entry = store.add("cam1", b"img", {"disease": "x"})
+    size = store.stats()["bytes"]
+    store.update(entry, {"about": "a long description"})
+    assert entry.version == 2
+    assert store.stats()["bytes"] > size
+
+
+def test_update_changes_etag():
+    store = SnapshotStore()
+    entry = store.add("cam1", b"img", {})
+    etag = entry.etag
+    store.update(entry, {"about": "x"})
+    assert entry.etag != etag
+
+
+def test_etags_differ_between_store_instances():
+    first = SnapshotStore().add("cam1", b"img", {})
+    second = SnapshotStore().add("cam1", b"img", {})
+    assert first.id == second.id
+    assert first.etag != second.etag
+
+
+def test_wait_for_change_returns_new_snapshot():
+    async def scenario():
+        store = SnapshotStore()
+        entry = store.add("cam1", b"a", {})
+        waiter = asyncio.create_task(store.wait_for_change("cam1", entry.etag, timeout=2))
+        await asyncio.sleep(0.01)
+        store.update(entry, {"about": "done"})
+        return entry, await waiter
+
+    entry, changed = asyncio.run(scenario())
+    assert changed is entry
+
+
+def test_wait_for_change_times_out():
+    async def scenario():
+        store = SnapshotStore()
+        entry = store.add("cam1", b"a", {})
+        return await store.wait_for_change("cam1", entry.etag, timeout=0.05)
+
+    assert asyncio.run(scenario()) is None
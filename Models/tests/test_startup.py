@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from startup import ResourceNotReady, ResourceRegistry
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_dependencies_are_passed_to_loaders():
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("location", lambda: (1.0, 2.0))
+        registry.register("weather", lambda location: {"at": location}, depends_on=["location"])
+        registry.start()
+        weather = await registry.get("weather")
+        return registry, weather
+
+    registry, weather = run(scenario)
+    assert weather == {"at": (1.0, 2.0)}
+    assert registry.is_ready()
+    assert registry.status()["weather"]["status"] == "ready"
+
+
+def test_resources_load_concurrently_and_once():
+    calls = []
+    lock = threading.Lock()
+
+    def slow(name):
+        def load():
+            with lock:
+                calls.append(name)
+            time.sleep(0.2)
+            return name
+        return load
+
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("a", slow("a"))
+        registry.register("b", slow("b"))
+        started = time.perf_counter()
+        registry.start()
+        values = await asyncio.gather(registry.get("a"), registry.get("b"), registry.get("a"))
+        return values, time.perf_counter() - started
+
+    values, elapsed = run(scenario)
+    assert values == ["a", "b", "a"]
+    assert sorted(calls) == ["a", "b"]
+    assert elapsed < 0.35
+
+
+def test_failed_loader_uses_fallback():
+    def fail():
+        raise ConnectionError("offline")
+
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("location", fail, fallback=[40.7, -74.0])
+        return registry, await registry.get("location")
+
+    registry, value = run(scenario)
+    assert value == [40.7, -74.0]
+    status = registry.status()["location"]
+    assert status["status"] == "fallback" and status["error"] == "offline"
+    assert registry.is_ready()
+
+
+def test_timeout_uses_fallback():
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("weather", lambda: time.sleep(0.5), fallback={}, timeout=0.05)
+        return registry, await registry.get("weather")
+
+    registry, value = run(scenario)
+    assert value == {}
+    assert registry.status()["weather"]["error"] == "timed out"
+
+
+def test_failure_without_fallback_is_raised():
+    def fail():
+        raise RuntimeError("no model file")
+
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("model", fail)
+        with pytest.raises(RuntimeError):
+            await registry.get("model")
+        return registry
+
+    registry = run(scenario)
+    assert registry.status()["model"]["status"] == "failed"
+    assert not registry.is_ready()
+
+
+def test_get_nowait_and_set():
+    async def scenario():
+        registry = ResourceRegistry()
+        registry.register("model", lambda: "real")
+        with pytest.raises(ResourceNotReady):
+            registry.get_nowait("model")
+        registry.set("model", "stand-in")
+        registry.start()
+        return registry, await registry.get("model")
+
+    registry, value = run(scenario)
+    assert value == "stand-in"
+    assert registry.get_nowait("model") == "stand-in"
+
+
+def test_unknown_resource():
+    async def scenario():
+        with pytest.raises(KeyError):
+            await ResourceRegistry().get("missing")
+
+    run(scenario)
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from streaming import JsonFieldStream, format_sse
+
+ANSWER = {
+    "about": "Early blight is caused by \"Alternaria solani\".\nIt starts on old leaves.",
+    "severity": 0.7,
+    "stages": ["spots", {"rings": True}],
+    "details": {"spread": "wind, rain", "nested": [1, 2, {"x": "}"}]},
+    "treated": False,
+    "notes": None,
+}
+
+
+def feed_in_chunks(text, size):
+    stream = JsonFieldStream()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(stream.feed(text[start:start + size]))
+    return stream, fields
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_fields_match_json_loads_for_any_chunking(size):
+    stream, fields = feed_in_chunks(json.dumps(ANSWER), size)
+    assert fields == list(ANSWER.items())
+    assert stream.finished
+
+
+def test_prose_and_code_fence_before_the_object_are_skipped():
+    text = "Here is the answer:\n```json\n" + json.dumps({"a": "b", "c": 1}) + "\n```\nHope this helps {not parsed}"
+    stream, fields = feed_in_chunks(text, 2)
+    assert fields == [("a", "b"), ("c", 1)]
+    assert stream.feed('{"d": 1}') == []
+
+
+def test_string_value_is_emitted_at_its_closing_quote():
+    stream = JsonFieldStream()
+    assert stream.feed('{"about": "blight') == []
+    assert stream.feed('", "sev') == [("about", "blight")]
+    assert stream.feed('erity": 3') == []
+    assert stream.feed('}') == [("severity", 3)]
+
+
+def test_invalid_scalar_is_skipped():
+    _, fields = feed_in_chunks('{"a": nope, "b": "ok"}', 4)
+    assert fields == [("b", "ok")]
+
+
+def test_parser_only_keeps_the_pending_token():
+    stream = JsonFieldStream()
+    for _ in range(1000):
+        stream.feed('"k": "' + "x" * 50 + '", ')
+    assert stream.feed("{") == []
+    stream.feed('"about": "')
+    stream.feed("y" * 100)
+    assert sum(len(part) for part in stream._parts) <= 110
+
+
+def test_format_sse():
+    assert format_sse("field", {"a": 1}, event_id="3") == 'event: field\nid: 3\ndata: {"a": 1}\n\n'
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from vector_index import NumpyVectorIndex, export_from_chroma
+
+CROPS = ["Potato", "Tomato", "Apple"]
+
+
+class InMemoryCollection:
+    """The slice of the Chroma API export_from_chroma reads."""
+
+    def __init__(self, vectors, texts, metadatas):
+        self.vectors = vectors
+        self.texts = texts
+        self.metadatas = metadatas
+
+    def get(self, include, limit, offset):
+        rows = range(offset, min(offset + limit, len(self.texts)))
+        return {
+            "ids": [f"id{i}" for i in rows],
+            "documents": [self.texts[i] for i in rows],
+            "metadatas": [self.metadatas[i] for i in rows],
+            "embeddings": [self.vectors[i] for i in rows],
+        }
+
+
+class FixedEmbeddings(Embeddings):
+    def __init__(self, vector):
+        self.vector = vector
+
+    def embed_documents(self, texts):
+        return [list(self.vector) for _ in texts]
+
+    def embed_query(self, text):
+        return list(self.vector)
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    vectors[7] = 0.0  # a zero vector must not break normalization
+    texts = [f"chunk {i}" for i in range(300)]
+    metadatas = [{"crop": CROPS[i % 3], "source": "bulletin" if i % 2 else "manual"} for i in range(300)]
+    return vectors, texts, metadatas
+
+
+def brute_force(vectors, query, rows, k):
+    matrix = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = matrix[rows] @ (query / np.linalg.norm(query))
+    return [rows[i] for i in np.argsort(-scores)[:k]]
+
+
+def export(tmp_path, corpus, dtype):
+    export_from_chroma(InMemoryCollection(*corpus), str(tmp_path), dtype=dtype, batch_size=64)
+
+
+def test_export_and_load_round_trip(tmp_path, corpus):
+    export(tmp_path, corpus, "float16")
+    index = NumpyVectorIndex.load(str(tmp_path))
+    assert index.ids[:2] == ["id0", "id1"]
+    assert index.texts[5] == "chunk 5"
+    assert index.metadatas[4] == {"crop": "Tomato", "source": "manual"}
+    assert index.manifest["count"] == 300 and index.manifest["dtype"] == "float16"
+    # float16 on disk, upcast once at load time
+    assert index.matrix.dtype == np.float32
+    assert NumpyVectorIndex.load(str(tmp_path), dtype=None).matrix.dtype == np.float16
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_top_k_matches_brute_force(tmp_path, corpus, dtype):
+    export(tmp_path, corpus, dtype)
+    index = NumpyVectorIndex.load(str(tmp_path))
+    query = np.random.default_rng(1).normal(size=16).astype(np.float32)
+    rows = [row for row, _ in index.search_vector(query, k=10)]
+    expected = brute_force(corpus[0], query, np.arange(300), 10)
+    if dtype == "float32":
+        assert rows == expected
+    else:
+        assert len(set(rows) & set(expected)) >= 9
+
+
+def test_filter_matches_brute_force_over_matching_rows(tmp_path, corpus):
+    export(tmp_path, corpus, "float32")
+    index = NumpyVectorIndex.load(str(tmp_path))
+    query = np.random.default_rng(2).normal(size=16).astype(np.float32)
+    results = index.search_vector(query, k=5, filter={"crop": "Potato", "source": "bulletin"})
+    matching = np.array([i for i, m in enumerate(corpus[2]) if m["crop"] == "Potato" and m["source"] == "bulletin"])
+    assert [row for row, _ in results] == brute_force(corpus[0], query, matching, 5)
+    assert all(index.metadatas[row]["crop"] == "Potato" for row, _ in results)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_unknown_filter_value_and_small_k(tmp_path, corpus):
+    export(tmp_path, corpus, "float32")
+    index = NumpyVectorIndex.load(str(tmp_path))
+    query = np.ones(16, dtype=np.float32)
+    assert index.search_vector(query, k=5, filter={"crop": "Mango"}) == []
+    assert index.search_vector(query, k=0) == []
+    assert len(index.search_vector(query, k=1000, filter={"crop": "Apple"})) == 100
+
+
+def test_similarity_search_returns_documents(tmp_path, corpus):
+    export(tmp_path, corpus, "float32")
+    vectors = corpus[0]
+    index = NumpyVectorIndex.load(str(tmp_path), embedding=FixedEmbeddings(vectors[41]))
+    docs = index.similarity_search("anything", k=3, filter={"crop": "Apple"})
+    assert docs[0].page_content == "chunk 41" and docs[0].id == "id41"
+    assert docs[0].metadata == {"crop": "Apple", "source": "bulletin"}
+    scored = index.similarity_search_with_score("anything", k=1)
+    assert scored[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert index.stats()["searches"] == 2
+
+
+def test_index_is_read_only(tmp_path, corpus):
+    export(tmp_path, corpus, "float32")
+    with pytest.raises(NotImplementedError):
+        NumpyVectorIndex.load(str(tmp_path)).add_texts(["new"])
@@ -0,0 +1,114 @@
+import json
+import pickle
+
+import pytest
+
+from conftest import load_vectordb_main
+
+
+@pytest.fixture
+def vectordb(tmp_path, monkeypatch):
+    module = load_vectordb_main()
+    monkeypatch.setattr(module, "manifest_file", str(tmp_path / "manifest.jsonl"))
+    return module
+
+
+@pytest.fixture
+def library(tmp_path):
+    def write(name, content):
+        path = tmp_path / name
+        path.write_bytes(content)
+        return str(path)
+    return write
+
+
+def record(vectordb, path, chunk_ids, duplicate_of=None):
+    return {"sha256": vectordb.file_hash(path), "chunk_ids": chunk_ids, "duplicate_of": duplicate_of or {}}
+
+
+def test_chunk_ids_are_deterministic(vectordb):
+    assert vectordb.chunk_id("a.pdf", "h", 0) == vectordb.chunk_id("a.pdf", "h", 0)
+    assert vectordb.chunk_id("a.pdf", "h", 0) != vectordb.chunk_id("a.pdf", "h", 1)
+    assert vectordb.chunk_id("a.pdf", "h", 0) != vectordb.chunk_id("a.pdf", "h2", 0)
+
+
+class InMemoryCollection:
+    def __init__(self, records):
+        self.records = records
+
+    def get(self, include):
+        return {"documents": [text for text, _ in self.records], "metadatas": [metadata for _, metadata in self.records]}
+
+
+def test_export_corpus_writes_every_chunk(vectordb, tmp_path):
+    path = str(tmp_path / "corpus.pkl")
+    count = vectordb.export_corpus(InMemoryCollection([("late blight", {"crop": "Potato"}), (None, None)]), path)
+    assert count == 2
+    with open(path, "rb") as f:
+        documents = pickle.load(f)
+    assert [(d.page_content, d.metadata) for d in documents] == [("late blight", {"crop": "Potato"}), ("", {})]
+
+
+def test_added_changed_unchanged_removed(vectordb, library):
+    same = library("same.pdf", b"same")
+    changed = library("changed.pdf", b"new content")
+    added = library("added.pdf", b"added")
+    manifest = {
+        same: record(vectordb, same, ["s1"]),
+        changed: {"sha256": "old", "chunk_ids": ["c1"], "duplicate_of": {}},
+        "gone.pdf": {"sha256": "x", "chunk_ids": ["g1"], "duplicate_of": {}},
+    }
+    files = [(same, {}), (changed, {}), (added, {"crop": "Tomato"})]
+    to_index, diff = vectordb.diff_library(files, manifest)
+    assert diff == {"added": [added], "changed": [changed], "unchanged": [same], "removed": ["gone.pdf"], "requeued": []}
+    assert [(path, metadata) for path, metadata, _ in to_index] == [(changed, {}), (added, {"crop": "Tomato"})]
+    assert to_index[1][2] == vectordb.file_hash(added)
+
+
+def test_manifest_replay_and_compaction(vectordb):
+    lines = [
+        {"path": "a.pdf", "sha256": "1", "chunk_ids": ["a1"]},
+        {"path": "b.pdf", "sha256": "2", "chunk_ids": ["b1"], "duplicate_of": {"b2": "a1"}},
+        {"path": "a.pdf", "sha256": "3", "chunk_ids": ["a2"]},
+        {"path": "b.pdf", "removed": True},
+    ]
+    with open(vectordb.manifest_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(line) for line in lines) + "\n\n")
+    manifest = vectordb.load_manifest()
+    assert manifest == {"a.pdf": {"sha256": "3", "chunk_ids": ["a2"], "duplicate_of": {}}}
+
+    vectordb.compact_manifest(manifest)
+    with open(vectordb.manifest_file, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    assert vectordb.load_manifest() == manifest
+
+
+def test_dependents_of_released_chunks_are_requeued(vectordb, library):
+    keeper = library("keeper.pdf", b"edited")
+    copy = library("copy.pdf", b"copy")
+    copy_of_copy = library("copy_of_copy.pdf", b"copy of copy")
+    other = library("other.pdf", b"other")
+    manifest = {
+        keeper: {"sha256": "old", "chunk_ids": ["k1"], "duplicate_of": {}},
+        # copy.pdf's chunk c2 was dropped as a duplicate of k1; copy_of_copy.pdf depends on copy.pdf's c1
+        copy: record(vectordb, copy, ["c1"], {"c2": "k1"}),
+        copy_of_copy: record(vectordb, copy_of_copy, [], {"cc1": "c1"}),
+        other: record(vectordb, other, ["o1"]),
+    }
+    files = [(keeper, {}), (copy, {}), (copy_of_copy, {}), (other, {})]
+    to_index, diff = vectordb.diff_library(files, manifest)
+    assert diff["changed"] == [keeper]
+    assert diff["requeued"] == [copy, copy_of_copy]
+    assert diff["unchanged"] == [other]
+    assert [path for path, _, _ in to_index] == [keeper, copy, copy_of_copy]
+
+
+def test_removed_keeper_requeues_dependents(vectordb, library):
+    copy = library("copy.pdf", b"copy")
+    manifest = {
+        "gone.pdf": {"sha256": "x", "chunk_ids": ["g1"], "duplicate_of": {}},
+        copy: record(vectordb, copy, [], {"c1": "g1"}),
+    }
+    _, diff = vectordb.diff_library([(copy, {})], manifest)
+    assert diff["removed"] == ["gone.pdf"]
+    assert diff["requeued"] == [copy]
@@ -0,0 +1,80 @@
+import asyncio
+
+from fakes import FaultInjector, FakeWeatherClient
+from weather import WeatherService
+
+DEFAULT = {"temperature": 20.0, "humidity": 50.0, "precipitation": 0.0, "wind_speed": 0.0}
+
+
+def make_service(values=(25.0, 60.0, 0.0, 5.0), failure_rate=0.0, **kwargs):
+    client = FakeWeatherClient(FaultInjector("weather", failure_rate=failure_rate, seed=0), values)
+    return WeatherService(client, DEFAULT, **kwargs), client
+
+
+def test_first_read_fetches_inline_then_reads_from_memory():
+    service, client = make_service()
+    reading = service.reading(40.7128, -74.0060)
+    assert reading["values"] == {"temperature": 25.0, "humidity": 60.0, "precipitation": 0.0, "wind_speed": 5.0}
+    assert reading["source"] == "open-meteo" and not reading["stale"]
+    service.conditions(40.7128, -74.0060)
+    # Nearby coordinates share the rounded location
+    service.conditions(40.7131, -74.0058)
+    assert client.injector.calls == 1
+    assert service.stats()["inline_fetches"] == 1 and service.stats()["reads"] == 3
+
+
+def test_refresh_batches_tracked_locations():
+    service, client = make_service(batch_size=2)
+    for i in range(5):
+        service.track(10.0 + i, 20.0)
+    assert not service.track(10.0, 20.0)
+    assert service.refresh() == 5
+    assert client.injector.calls == 3
+    assert service.stats()["fetched_locations"] == 5
+
+
+def test_refresh_updates_readings():
+    service, client = make_service()
+    service.conditions(1.0, 2.0)
+    client.values[0] = 30.0
+    service.refresh()
+    assert service.conditions(1.0, 2.0)["temperature"] == 30.0
+
+
+def test_failed_fetch_keeps_previous_reading():
+    service, client = make_service()
+    service.conditions(1.0, 2.0)
+    client.injector.failure_rate = 1.0
+    client.values[0] = 30.0
+    assert service.refresh() == 0
+    assert service.conditions(1.0, 2.0)["temperature"] == 25.0
+    assert service.stats()["failed_requests"] == 1
+
+
+def test_default_until_the_first_successful_fetch():
+    service, _ = make_service(failure_rate=1.0)
+    reading = service.reading(1.0, 2.0)
+    assert reading["values"] == DEFAULT
+    assert reading["source"] == "default" and reading["stale"] and reading["fetched_at"] is None
+
+
+def test_old_readings_are_flagged_stale():
+    service, _ = make_service(max_age_seconds=60)
+    service.conditions(1.0, 2.0)
+    service._readings[(1.0, 2.0)]["fetched_at"] -= 120
+    reading = service.reading(1.0, 2.0)
+    assert reading["stale"] and reading["age_seconds"] >= 120
+    assert reading["values"]["temperature"] == 25.0
+    assert service.stats()["stale_readings"] == 1
+
+
+def test_run_refreshes_in_the_background():
+    async def scenario():
+        service, client = make_service(refresh_seconds=0.02)
+        service.track(1.0, 2.0)
+        task = asyncio.create_task(service.run())
+        await asyncio.sleep(0.15)
+        task.cancel()
+        return service
+
+    assert asyncio.run(scenario()).stats()["refreshes"] >= 2
@@ -0,0 +1,212 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+INDEX_MATRIX_FILE = "embeddings.npy"
+INDEX_DOCUMENTS_FILE = "documents.json"
+INDEX_MANIFEST_FILE = "manifest.json"
+
+
+class NumpyVectorIndex(VectorStore):
+    """
+    Read-only, in-process vector index over a snapshot of the Chroma collection.
+
+    Vectors are L2-normalized and stored as one contiguous float16/float32 matrix that is memory-mapped
+    from disk, so a top-k search is a single matrix-vector product plus `argpartition`. Equality filters
+    on metadata (e.g. {"crop": "Potato"}) are applied before scoring using precomputed per-key code arrays.
+
+    Build an index with `export_from_chroma` (or `python vector_index.py`) and open it with `load`.
+    """
+
+    def __init__(self, matrix: np.ndarray, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                 embedding: Optional[Embeddings] = None, manifest: Optional[Dict[str, Any]] = None):
+        self.matrix = matrix
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self._embedding = embedding
+        self.manifest = manifest or {}
+        # metadata key -> (value -> code, int32 code per row)
+        self._columns: Dict[str, Tuple[Dict[Any, int], np.ndarray]] = {}
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    @classmethod
+    def load(cls, index_dir: str, embedding: Optional[Embeddings] = None, dtype: Optional[str] = "float32") -> "NumpyVectorIndex":
+        """
+        Open an exported index.
+
+        The matrix is memory-mapped as stored. NumPy has no fast float16 matrix-vector product, so by default a
+        float16 index is upcast to float32 once at load time (the file stays half-size on disk); pass
+        dtype=None to search the float16 memory map directly and trade latency for memory.
+        """
+        matrix = np.load(os.path.join(index_dir, INDEX_MATRIX_FILE), mmap_mode='r')
+        if dtype and matrix.dtype != np.dtype(dtype):
+            matrix = np.asarray(matrix, dtype=dtype)
+        with open(os.path.join(index_dir, INDEX_DOCUMENTS_FILE), 'r', encoding='utf-8') as f:
+            documents = json.load(f)
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        index = cls(
+            matrix,
+            documents["ids"],
+            documents["texts"],
+            documents["metadatas"],
+            embedding=embedding,
+            manifest=manifest
+        )
+        # Index the metadata keys used for retrieval filters up front
+        for key in ("crop", "source"):
+            index._column(key)
+        logging.info(f"Loaded vector index from {index_dir}: {len(index.ids)} vectors, dim {matrix.shape[1]}, {matrix.dtype}")
+        return index
+
+    def _column(self, key: str) -> Tuple[Dict[Any, int], np.ndarray]:
+        if key not in self._columns:
+            codes: Dict[Any, int] = {}
+            column = np.array([codes.setdefault(m.get(key), len(codes)) for m in self.metadatas], dtype=np.int32)
+            self._columns[key] = (codes, column)
+        return self._columns[key]
+
+    def _candidates(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row indices matching an equality filter, or None for no filter."""
+        if not filter:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in filter.items():
+            codes, column = self._column(key)
+            code = codes.get(value)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= column == code
+        return np.flatnonzero(mask)
+
+    def search_vector(self, vector: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) of the top-k rows for a query vector."""
+        started = time.perf_counter()
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self._candidates(filter)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.shape[0] == 0 or k <= 0:
+            return []
+        scores = matrix @ query.astype(matrix.dtype)
+
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = [(int(i if rows is None else rows[i]), float(scores[i])) for i in top]
+
+        self.searches += 1
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row])
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs) -> List[Document]:
+        return [self._document(row) for row, _ in self.search_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs) -> List[Tuple[Document, float]]:
+        vector = self._embedding.embed_query(query)
+        return [(self._document(row), score) for row, score in self.search_vector(vector, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities already
+        return lambda score: score
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self.ids),
+            "dim": int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+            "dtype": str(self.matrix.dtype),
+            "matrix_bytes": int(self.matrix.nbytes),
+            "exported_at": self.manifest.get("exported_at"),
+            "searches": self.searches,
+            "avg_search_ms": round(1000 * self.search_seconds / self.searches, 3) if self.searches else 0.0,
+        }
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs) -> List[str]:
+        raise NotImplementedError("NumpyVectorIndex is read-only; re-export it from Chroma instead")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs):
+        raise NotImplementedError("Build the index with export_from_chroma")
+
+
+def export_from_chroma(vectorstore, index_dir: str, dtype: str = "float16", batch_size: int = 5000) -> Dict[str, Any]:
+    """
+    Snapshot a Chroma collection into a NumpyVectorIndex directory.
+
+    Args:
+        vectorstore: langchain Chroma store to export
+        index_dir: Output directory
+        dtype: "float16" (half the memory) or "float32"
+        batch_size: Number of records read from Chroma at a time
+
+    Returns:
+        The manifest written alongside the index
+    """
+    ids, texts, metadatas, vectors = [], [], [], []
+    offset = 0
+    while True:
+        batch = vectorstore.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        ids.extend(batch["ids"])
+        texts.extend(batch["documents"])
+        metadatas.extend(m or {} for m in batch["metadatas"])
+        vectors.append(np.asarray(batch["embeddings"], dtype=np.float32))
+        offset += len(batch["ids"])
+
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, INDEX_MATRIX_FILE), np.ascontiguousarray(matrix.astype(dtype)))
+    with open(os.path.join(index_dir, INDEX_DOCUMENTS_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"ids": ids, "texts": texts, "metadatas": metadatas}, f, ensure_ascii=False)
+
+    manifest = {
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "dtype": dtype,
+        "exported_at": datetime.datetime.utcnow().isoformat() + 'Z',
+    }
+    with open(os.path.join(index_dir, INDEX_MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    from langchain_chroma import Chroma
+
+    parser = argparse.ArgumentParser(description="Export the Chroma collection to a memory-mapped NumPy index")
+    parser.add_argument("--persist-dir", default=os.getenv("VECTOR_DB_DIR", "vector_db"), help="Chroma persistence directory")
+    parser.add_argument("--out", default=os.getenv("VECTOR_INDEX_DIR", "vector_index"), help="Output index directory")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    args = parser.parse_args()
+
+    manifest = export_from_chroma(Chroma(persist_directory=args.persist_dir), args.out, args.dtype)
+    print(json.dumps(manifest, indent=2))
+    print(f"Vector index stored in {args.out}")
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Sequence, Tuple
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+# Open-Meteo "current" variables, in the order they are read back
+CURRENT_VARIABLES = ["temperature_2m", "relative_humidity_2m", "precipitation", "wind_speed_10m"]
+CONDITION_NAMES = ["temperature", "humidity", "precipitation", "wind_speed"]
+
+
+class WeatherService:
+    """
+    Current weather for a set of tracked locations, refreshed on a schedule and served from memory.
+
+    Locations are rounded to `precision` decimal places (2 is about 1 km), so nearby coordinates share a
+    reading. `refresh` fetches every tracked location with one Open-Meteo request per `batch_size`
+    locations (the API takes comma-separated coordinate lists), and `run` repeats it in the background.
+    Reads never touch the network, except the first read of a location that was not tracked before, which
+    fetches that location inline.
+
+    Readings carry freshness metadata. A reading older than `max_age_seconds` is still returned but flagged
+    stale. Locations that have never been fetched get `default` marked with source "default".
+
+    Args:
+        client: openmeteo_requests.Client (or anything with a compatible `weather_api`)
+        default: Conditions used before a location's first successful fetch
+        refresh_seconds: Interval between background refreshes
+        max_age_seconds: Age after which a reading is reported as stale
+        batch_size: Maximum locations per Open-Meteo request
+        precision: Decimal places coordinates are rounded to
+    """
+
+    def __init__(self, client, default: Dict[str, float], refresh_seconds: float = 900.0, max_age_seconds: float = 3600.0,
+                 batch_size: int = 50, precision: int = 2):
+        self.client = client
+        self.default = dict(default)
+        self.refresh_seconds = refresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.batch_size = max(1, int(batch_size))
+        self.precision = precision
+
+        self._readings: Dict[Tuple[float, float], Dict[str, Any]] = {}
+        self._tracked: Dict[Tuple[float, float], None] = {}
+        self._lock = threading.Lock()
+
+        self.refreshes = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.reads = 0
+        self.inline_fetches = 0
+        self.last_refresh_seconds = None
+
+    def _key(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        return round(float(latitude), self.precision), round(float(longitude), self.precision)
+
+    def track(self, latitude: float, longitude: float) -> bool:
+        """Add a location to the refresh schedule. Returns False if it was already tracked."""
+        key = self._key(latitude, longitude)
+        with self._lock:
+            if key in self._tracked:
+                return False
+            self._tracked[key] = None
+            return True
+
+    def _fetch(self, keys: Sequence[Tuple[float, float]]) -> int:
+        """Fetch the current weather of `keys` in batches and store the readings. Returns how many were updated."""
+        updated = 0
+        for start in range(0, len(keys), self.batch_size):
+            batch = list(keys[start:start + self.batch_size])
+            params = {
+                "latitude": [lat for lat, _ in batch],
+                "longitude": [lon for _, lon in batch],
+                "current": CURRENT_VARIABLES
+            }
+            self.requests += 1
+            try:
+                responses = self.client.weather_api(OPEN_METEO_URL, params=params)
+            except Exception as e:
+                self.failed_requests += 1
+                logging.error(f"Error fetching weather for {len(batch)} locations: {e}")
+                continue
+            fetched_at = time.time()
+            for key, response in zip(batch, responses):
+                try:
+                    current = response.Current()
+                    values = {name: current.Variables(i).Value() for i, name in enumerate(CONDITION_NAMES)}
+                except Exception as e:
+                    logging.error(f"Malformed weather response for {key}: {e}")
+                    continue
+                with self._lock:
+                    self._readings[key] = {"values": values, "fetched_at": fetched_at, "source": "open-meteo"}
+                updated += 1
+        return updated
+
+    def refresh(self) -> int:
+        """Fetch every tracked location now (blocking). Failed locations keep their previous reading."""
+        started = time.perf_counter()
+        with self._lock:
+            keys = list(self._tracked)
+        updated = self._fetch(keys)
+        self.refreshes += 1
+        self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+        return updated
+
+    async def run(self, executor=None):
+        """Refresh all tracked locations every `refresh_seconds` until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                updated = await loop.run_in_executor(executor, self.refresh)
+                logging.info(f"Weather refresh updated {updated} locations")
+            except Exception as e:
+                logging.error(f"Weather refresh failed: {e}", exc_info=True)
+
+    def reading(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """
+        Return the latest reading of a location (blocking only on the first read of an untracked location).
+
+        Returns:
+            {"values": conditions, "fetched_at": epoch seconds or None, "age_seconds", "stale", "source"}
+        """
+        key = self._key(latitude, longitude)
+        if self.track(*key):
+            self.inline_fetches += 1
+            self._fetch([key])
+        self.reads += 1
+        with self._lock:
+            entry = self._readings.get(key)
+        if entry is None:
+            return {"values": dict(self.default), "fetched_at": None, "age_seconds": None, "stale": True, "source": "default"}
+        age = time.time() - entry["fetched_at"]
+        return {
+            "values": dict(entry["values"]),
+            "fetched_at": entry["fetched_at"],
+            "age_seconds": round(age, 1),
+            "stale": age > self.max_age_seconds,
+            "source": entry["source"],
+        }
+
+    def conditions(self, latitude: float, longitude: float) -> Dict[str, float]:
+        """Return just the weather values of a location, as used for environmental conditions."""
+        return self.reading(latitude, longitude)["values"]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            ages = [now - entry["fetched_at"] for entry in self._readings.values()]
+            tracked = len(self._tracked)
+        return {
+            "tracked_locations": tracked,
+            "fetched_locations": len(ages),
+            "oldest_reading_seconds": round(max(ages), 1) if ages else None,
+            "stale_readings": sum(age > self.max_age_seconds for age in ages),
+            "refresh_seconds": self.refresh_seconds,
+            "refreshes": self.refreshes,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "reads": self.reads,
+            "inline_fetches": self.inline_fetches,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   View,
   Text,
@@ -56,6 +56,8 @@ const PlantMonitorApp = () => {
   const [error, setError] = useState<string | null>(null);
   const [data, setData] = useState<any>(null);
   const [refreshing, setRefreshing] = useState(false);
+  // ETag of the snapshot we already have, so unchanged polls get an empty 304
+  const etagRef = useRef<string | null>(null);
 
   // Accordion state
   const [aboutOpen, setAboutOpen] = useState(false);
@@ -69,9 +71,14 @@ const PlantMonitorApp = () => {
       setLoading(true);
       setError(null);
 
-      const res = await fetch(`${SERVER_URL}/latest_snapshot`);
+      const headers: Record<string, string> = {};
+      if (etagRef.current) headers['If-None-Match'] = etagRef.current;
+
+      const res = await fetch(`${SERVER_URL}/latest_snapshot`, { headers });
+      if (res.status === 304) return;
       if (!res.ok) throw new Error(`Status ${res.status}`);
       const json = await res.json();
+      etagRef.current = res.headers.get('ETag');
       setData(json);
     } catch (err: any) {
       console.error('Fetch error:', err);